@@ -1,6 +1,3 @@
-import os
-print("DEBUG BACKEND_URL =", os.environ.get("API_BASE_URL"), flush=True)
-
 """
 Configuration for the Triathlon Tracker backend.
 Loads environment variables and defines block windows.
@@ -14,9 +11,40 @@ load_dotenv(override=False)
 # --- Strava ---
 STRAVA_CLIENT_ID = os.getenv("STRAVA_CLIENT_ID", "")
 STRAVA_CLIENT_SECRET = os.getenv("STRAVA_CLIENT_SECRET", "")
-STRAVA_AUTH_URL = "https://www.strava.com/oauth/authorize"
-STRAVA_TOKEN_URL = "https://www.strava.com/api/v3/oauth/token"
-STRAVA_API_BASE = "https://www.strava.com/api/v3"
+# Overridable to point at scripts/fake_strava.py for local load tests
+STRAVA_AUTH_URL = os.getenv("STRAVA_AUTH_URL", "https://www.strava.com/oauth/authorize")
+STRAVA_API_BASE = os.getenv("STRAVA_API_BASE", "https://www.strava.com/api/v3").rstrip("/")
+STRAVA_TOKEN_URL = os.getenv("STRAVA_TOKEN_URL", f"{STRAVA_API_BASE}/oauth/token")
+STRAVA_WEBHOOK_VERIFY_TOKEN = os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN", "")
+# Id Strava returned when the push subscription was created; other events get a 403
+STRAVA_WEBHOOK_SUBSCRIPTION_ID = os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID", "")
+# Retries for GETs failing with 5xx or a network error; delays double from the base
+STRAVA_MAX_RETRIES = int(os.getenv("STRAVA_MAX_RETRIES", "3"))
+STRAVA_RETRY_BACKOFF_SECONDS = float(os.getenv("STRAVA_RETRY_BACKOFF_SECONDS", "0.5"))
+# Activity detail requests a sync keeps in flight at once
+SYNC_DETAIL_CONCURRENCY = int(os.getenv("SYNC_DETAIL_CONCURRENCY", "4"))
+
+# --- Admin ---
+# Required in X-Admin-Token for request profiling and profile downloads
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Profile 1 in N requests automatically (0 disables sampling)
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "20"))
+
+# --- Dashboard snapshots ---
+# Directory for static dashboard JSON written after each block lock (empty disables)
+DASHBOARD_SNAPSHOT_DIR = os.getenv("DASHBOARD_SNAPSHOT_DIR", "")
+
+# --- Calorie estimation ---
+# Estimate calories from heart-rate streams when Strava reports none
+# (one extra Strava call per such activity; the result is cached)
+HR_CALORIES_ENABLED = os.getenv("HR_CALORIES_ENABLED", "false").lower() == "true"
+# Age assumed by the heart-rate model (Strava does not share it)
+HR_DEFAULT_AGE = int(os.getenv("HR_DEFAULT_AGE", "35"))
+
+# --- Duplicate activities ---
+# Overlapping same-sport activities (watch + phone): flag for review, suppress, or off
+DUPLICATE_ACTIVITIES = os.getenv("DUPLICATE_ACTIVITIES", "flag")
 
 # --- Firebase ---
 FIREBASE_SERVICE_ACCOUNT_JSON = os.getenv("FIREBASE_SERVICE_ACCOUNT_JSON", "")
@@ -1,19 +1,70 @@
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+from unit_of_work import current_unit_of_work
 
 _db = None
+_first_use_hooks = []
+_hooks_due = False
+_running_hooks = False
 
-def get_db():
-    global _db
+
+def on_first_use(hook):
+    """
+    Run hook() right after get_client() creates the client (e.g. lazy seeding).
+    Hooks are retried on the next call if one raises; clients installed with
+    set_db() don't trigger them.
+    """
+    _first_use_hooks.append(hook)
+
+
+def _run_first_use_hooks():
+    global _hooks_due, _running_hooks
+    _running_hooks = True
+    try:
+        for hook in _first_use_hooks:
+            hook()
+        _hooks_due = False
+    finally:
+        _running_hooks = False
+
+
+def get_client():
+    """The process-wide Firestore client, bypassing any unit of work."""
+    global _db, _hooks_due
     if _db is None:
-        if not firebase_admin._apps:
-            service_account_json = os.environ.get("FIREBASE_SERVICE_ACCOUNT_JSON")
-            if not service_account_json:
-                raise ValueError("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
-            service_account_info = json.loads(service_account_json)
-            cred = credentials.Certificate(service_account_info)
-            firebase_admin.initialize_app(cred)
-        _db = firestore.client()
+        backend = os.environ.get("FIRESTORE_BACKEND", "firestore")
+        if backend == "memory":
+            from memory_firestore import InMemoryFirestore
+            _db = InMemoryFirestore()
+        elif backend == "sqlite":
+            from sqlite_firestore import SQLiteFirestore
+            _db = SQLiteFirestore(os.environ.get("SQLITE_PATH", "triathlon.db"))
+        else:
+            # Imported here: firebase_admin pulls in gRPC and the Firestore
+            # client, which dominate cold-start time
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            if not firebase_admin._apps:
+                service_account_json = os.environ.get("FIREBASE_SERVICE_ACCOUNT_JSON")
+                if not service_account_json:
+                    raise ValueError("FIREBASE_SERVICE_ACCOUNT_JSON environment variable not set")
+                service_account_info = json.loads(service_account_json)
+                cred = credentials.Certificate(service_account_info)
+                firebase_admin.initialize_app(cred)
+            _db = firestore.client()
+        _hooks_due = True
+    if _hooks_due and not _running_hooks:
+        _run_first_use_hooks()
     return _db
+
+
+def get_db():
+    """The Firestore client, or the current request's unit-of-work view of it."""
+    uow = current_unit_of_work()
+    return uow.view() if uow is not None else get_client()
+
+
+def set_db(db):
+    """Install a client (e.g. an InMemoryFirestore) for get_db() to return; None resets."""
+    global _db
+    _db = db
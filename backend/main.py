@@ -1,37 +1,27 @@
-import os
-print(f"API_BASE_URL = {os.environ.get('API_BASE_URL')}")
-print(f"BACKEND_URL = {os.environ.get('BACKEND_URL')}")
-print(f"FRONTEND_URL = {os.environ.get('FRONTEND_URL')}")
-
 """
 Triathlon Competition Tracker — FastAPI Application
 """
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from config import FRONTEND_URL, BACKEND_URL
-from services.block_service import seed_blocks, seed_players
-from routers import auth, players, activities, scores, admin
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Startup: seed blocks and players + logging configuration."""
-    print("--- Startup Configuration ---")
-    print(f"FRONTEND_URL: {FRONTEND_URL}")
-    print(f"BACKEND_URL: {BACKEND_URL}")
-    print(f"API_BASE_URL (env): {os.getenv('API_BASE_URL')}")
-    print("-----------------------------")
-    
-    seed_blocks()
-    seed_players()
-    yield
+from config import FRONTEND_URL
+from firebase_client import get_client, on_first_use
+from metrics import MetricsMiddleware, render
+from profiling import ProfilingMiddleware
+from responses import GZIP_MINIMUM_SIZE, GZipMiddleware, ORJSONResponse
+from unit_of_work import UnitOfWorkMiddleware
+from services.block_service import ensure_seeded
+from routers import auth, players, activities, scores, admin, webhooks, groups
 
+# Seeding happens on first Firestore use, not at startup, so a cold start
+# costs no Firestore client creation or reads; it is skipped entirely while
+# meta/schema matches the current block definitions.
+on_first_use(ensure_seeded)
 
 app = FastAPI(
     title="Triathlon Competition Tracker",
     description="March 2026 Triathlon Challenge Backend",
     version="1.0.0",
-    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -44,12 +34,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger payloads (dashboard, activity histories)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+# One Firestore unit of work per request: cached reads, batched writes
+app.add_middleware(UnitOfWorkMiddleware, client_factory=get_client)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(players.router)
 app.include_router(activities.router)
 app.include_router(scores.router)
 app.include_router(admin.router)
+app.include_router(webhooks.router)
+app.include_router(groups.router)
 
 
 @app.get("/")
@@ -60,3 +60,9 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render()
+    return Response(body, media_type=content_type)
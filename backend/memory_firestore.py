@@ -0,0 +1,800 @@
+"""
+In-memory Firestore stand-in for tests, offline runs and benchmarks.
+
+Implements the subset of the google-cloud-firestore client API the backend
+uses — documents and subcollections, queries (where / order_by / limit /
+cursors / select), batches, bulk writers, transactions and get_all — and
+counts operations so tests and benchmarks can assert round trips.
+
+Select it with FIRESTORE_BACKEND=memory, or install one directly with
+firebase_client.set_db(InMemoryFirestore()).
+"""
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from google.api_core.exceptions import Aborted, AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_query import And, FieldFilter, Or
+
+DOCUMENT_ID = "__name__"
+MAX_BATCH_WRITES = 500
+BULK_WRITER_BATCH_SIZE = 20
+
+_MISSING = object()
+
+
+# ─── Value helpers ───
+
+def _copy(value):
+    """Deep copy for JSON-like document data (much cheaper than copy.deepcopy)."""
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _get_field(data: dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _type_rank(value) -> int:
+    """Firestore's cross-type ordering: null < bool < number < timestamp < string < … < map."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, DocumentReference):
+        return 6
+    if isinstance(value, list):
+        return 8
+    return 9
+
+
+def _order_key(value):
+    rank = _type_rank(value)
+    if rank == 0:
+        return (0, 0)
+    if rank == 6:
+        return (rank, value.path)
+    if rank == 8:
+        return (rank, tuple(_order_key(v) for v in value))
+    if rank == 9:
+        return (rank, tuple((k, _order_key(v)) for k, v in sorted(value.items())))
+    return (rank, value)
+
+
+def _resolve(current, value):
+    """Apply a write value (possibly a transform sentinel) on top of `current`."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+    if isinstance(value, transforms.Increment):
+        return (current if numeric else 0) + value.value
+    if isinstance(value, transforms.Maximum):
+        return max(current, value.value) if numeric else value.value
+    if isinstance(value, transforms.Minimum):
+        return min(current, value.value) if numeric else value.value
+    if isinstance(value, transforms.ArrayUnion):
+        base = list(current) if isinstance(current, list) else []
+        return base + [v for v in value.values if v not in base]
+    if isinstance(value, transforms.ArrayRemove):
+        base = list(current) if isinstance(current, list) else []
+        return [v for v in base if v not in value.values]
+    if isinstance(value, dict):
+        return {k: _resolve(_MISSING, v) for k, v in value.items() if v is not transforms.DELETE_FIELD}
+    return _copy(value)
+
+
+def _merge_into(target: dict, data: dict) -> None:
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge_into(target[key], value)
+        else:
+            target[key] = _resolve(target.get(key, _MISSING), value)
+
+
+def _update_path(target: dict, field_path: str, value) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            child = target[part] = {}
+        target = child
+    if value is transforms.DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = _resolve(target.get(parts[-1], _MISSING), value)
+
+
+def _project(data: dict, field_paths) -> dict:
+    out = {}
+    for path in field_paths:
+        value = _get_field(data, path)
+        if value is not _MISSING:
+            _update_path(out, path, value)
+    return out
+
+
+# ─── Snapshots and references ───
+
+class WriteResult:
+    def __init__(self, update_time: datetime):
+        self.update_time = update_time
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: dict | None,
+                 update_time: datetime | None = None):
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if self._data is None:
+            raise KeyError(field_path)
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class DocumentReference:
+    def __init__(self, client: "InMemoryFirestore", path: str):
+        self._client = client
+        self.path = path
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"<DocumentReference {self.path}>"
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "CollectionReference":
+        return CollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id: str) -> "CollectionReference":
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def collections(self):
+        return [CollectionReference(self._client, p) for p in self._client._subcollections(self.path)]
+
+    def get(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        if transaction is not None:
+            return next(iter(transaction.get(self)))
+        return self._client._get_many([self], field_paths)[0]
+
+    def create(self, document_data: dict) -> WriteResult:
+        return self._client._commit([("create", self.path, document_data, None)])[0]
+
+    def set(self, document_data: dict, merge: bool = False) -> WriteResult:
+        return self._client._commit([("set", self.path, document_data, merge)])[0]
+
+    def update(self, field_updates: dict) -> WriteResult:
+        return self._client._commit([("update", self.path, field_updates, None)])[0]
+
+    def delete(self) -> WriteResult:
+        return self._client._commit([("delete", self.path, None, None)])[0]
+
+
+class AggregationResult:
+    def __init__(self, alias: str, value):
+        self.alias = alias
+        self.value = value
+
+
+class _CountQuery:
+    def __init__(self, query: "Query", alias: str):
+        self._query = query
+        self._alias = alias
+
+    def get(self, transaction=None):
+        count = self._query._client._run_query(self._query, count_only=True)
+        return [[AggregationResult(self._alias, count)]]
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client: "InMemoryFirestore", collection_path: str,
+                 all_descendants: bool = False):
+        self._client = client
+        self._collection_path = collection_path
+        self._all_descendants = all_descendants
+        self._filters: list = []
+        self._orders: list[tuple[str, str]] = []
+        self._limit: int | None = None
+        self._limit_to_last = False
+        self._offset = 0
+        self._start: tuple | None = None   # (values, inclusive)
+        self._end: tuple | None = None
+        self._projection: list[str] | None = None
+
+    def _clone(self) -> "Query":
+        q = Query.__new__(Query)
+        q.__dict__.update(self.__dict__)
+        q._filters = list(self._filters)
+        q._orders = list(self._orders)
+        return q
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "Query":
+        q = self._clone()
+        q._filters.append(filter if filter is not None else FieldFilter(field_path, op_string, value))
+        return q
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        q = self._clone()
+        q._orders.append((field_path, direction))
+        return q
+
+    def limit(self, count: int) -> "Query":
+        q = self._clone()
+        q._limit, q._limit_to_last = count, False
+        return q
+
+    def limit_to_last(self, count: int) -> "Query":
+        q = self._clone()
+        q._limit, q._limit_to_last = count, True
+        return q
+
+    def offset(self, num_to_skip: int) -> "Query":
+        q = self._clone()
+        q._offset = num_to_skip
+        return q
+
+    def select(self, field_paths) -> "Query":
+        q = self._clone()
+        q._projection = list(field_paths)
+        return q
+
+    def _cursor(self, document_fields_or_snapshot, attr: str, inclusive: bool) -> "Query":
+        q = self._clone()
+        setattr(q, attr, (document_fields_or_snapshot, inclusive))
+        return q
+
+    def start_at(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, "_start", True)
+
+    def start_after(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, "_start", False)
+
+    def end_at(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, "_end", True)
+
+    def end_before(self, document_fields_or_snapshot) -> "Query":
+        return self._cursor(document_fields_or_snapshot, "_end", False)
+
+    def count(self, alias: str = "count") -> _CountQuery:
+        return _CountQuery(self, alias)
+
+    def stream(self, transaction=None):
+        if transaction is not None:
+            return iter(transaction.get(self))
+        return iter(self._client._run_query(self))
+
+    def get(self, transaction=None) -> list[DocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "InMemoryFirestore", path: str):
+        super().__init__(client, path)
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> DocumentReference | None:
+        if "/" not in self.path:
+            return None
+        return DocumentReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def document(self, document_id: str | None = None) -> DocumentReference:
+        return DocumentReference(self._client, f"{self.path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, document_data: dict, document_id: str | None = None):
+        ref = self.document(document_id)
+        result = ref.create(document_data)
+        return result.update_time, ref
+
+    def list_documents(self, page_size=None):
+        return [self.document(doc_id) for doc_id in self._client._collection_ids(self.path)]
+
+
+# ─── Query evaluation ───
+
+def _compare(doc_value, op: str, value) -> bool:
+    if op == "==":
+        return _order_key(doc_value) == _order_key(value)
+    if op == "!=":
+        return doc_value is not None and _order_key(doc_value) != _order_key(value)
+    if op == "in":
+        return any(_order_key(doc_value) == _order_key(v) for v in value)
+    if op == "not-in":
+        return doc_value is not None and all(_order_key(doc_value) != _order_key(v) for v in value)
+    if op == "array_contains":
+        return isinstance(doc_value, list) and any(_order_key(v) == _order_key(value) for v in doc_value)
+    if op == "array_contains_any":
+        return isinstance(doc_value, list) and any(
+            _order_key(v) == _order_key(w) for v in doc_value for w in value
+        )
+    # Range operators only match values of the same type
+    if _type_rank(doc_value) != _type_rank(value):
+        return False
+    a, b = _order_key(doc_value), _order_key(value)
+    if op == "<":
+        return a < b
+    if op == "<=":
+        return a <= b
+    if op == ">":
+        return a > b
+    if op == ">=":
+        return a >= b
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _matches(flt, doc_id: str, path: str, data: dict) -> bool:
+    if isinstance(flt, Or):
+        return any(_matches(f, doc_id, path, data) for f in flt.filters)
+    if isinstance(flt, And):
+        return all(_matches(f, doc_id, path, data) for f in flt.filters)
+    if flt.field_path != DOCUMENT_ID:
+        doc_value = _get_field(data, flt.field_path)
+        if doc_value is _MISSING:
+            return False
+        return _compare(doc_value, flt.op_string, flt.value)
+
+    # Document ID filters compare full paths, accepting refs or bare IDs
+    parent = path.rsplit("/", 1)[0]
+
+    def as_path(v):
+        return v.path if isinstance(v, DocumentReference) else f"{parent}/{v}"
+
+    value = flt.value
+    value = [as_path(v) for v in value] if isinstance(value, (list, tuple)) else as_path(value)
+    return _compare(path, flt.op_string, value)
+
+
+_INEQUALITY_OPS = {"<", "<=", ">", ">=", "!=", "not-in"}
+
+
+def _flat_filters(filters):
+    for f in filters:
+        if isinstance(f, (And, Or)):
+            yield from _flat_filters(f.filters)
+        else:
+            yield f
+
+
+class InMemoryFirestore:
+    """Process-local Firestore client. Thread-safe; all data lives in dicts."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # collection path → {document id → (data, version, update_time)}
+        self._collections: dict[str, dict[str, tuple]] = {}
+        self.stats = Counter()
+
+    # ── public client API ──
+
+    def collection(self, *path: str) -> CollectionReference:
+        return CollectionReference(self, "/".join(path))
+
+    def document(self, *path: str) -> DocumentReference:
+        return DocumentReference(self, "/".join(path))
+
+    def collection_group(self, collection_id: str) -> Query:
+        return Query(self, collection_id, all_descendants=True)
+
+    def collections(self):
+        with self._lock:
+            roots = self._root_collections()
+        return [CollectionReference(self, p) for p in roots]
+
+    def batch(self) -> "WriteBatch":
+        return WriteBatch(self)
+
+    def bulk_writer(self, **kwargs) -> "BulkWriter":
+        return BulkWriter(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> "Transaction":
+        return Transaction(self, max_attempts, read_only)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        if transaction is not None:
+            return iter(transaction.get_all(references))
+        return iter(self._get_many(references, field_paths))
+
+    def recursive_delete(self, reference, *, chunk_size: int = MAX_BATCH_WRITES) -> int:
+        """Delete a collection or document and everything beneath it."""
+        with self._lock:
+            doomed = self._paths_under(reference.path)
+        for start in range(0, len(doomed), chunk_size):
+            self._commit([("delete", p, None, None) for p in doomed[start:start + chunk_size]])
+        return len(doomed)
+
+    def reset_stats(self) -> None:
+        self.stats.clear()
+
+    # ── storage primitives (overridden by persistent backends) ──
+
+    def _load(self, path: str):
+        """Return (data, version, update_time) for a document path, or None."""
+        cpath, doc_id = path.rsplit("/", 1)
+        return self._collections.get(cpath, {}).get(doc_id)
+
+    def _store(self, path: str, data: dict | None, version: int, update_time: datetime) -> None:
+        cpath, doc_id = path.rsplit("/", 1)
+        if data is None:
+            self._collections.get(cpath, {}).pop(doc_id, None)
+        else:
+            self._collections.setdefault(cpath, {})[doc_id] = (data, version, update_time)
+
+    def _scan(self, collection_path: str, all_descendants: bool, filters=()):
+        """
+        Yield (path, doc_id, data, update_time) for every document a query
+        may match. `filters` lets indexed backends narrow the scan; results
+        are still checked against every filter.
+        """
+        if all_descendants:
+            cpaths = [p for p in self._collections if p.rsplit("/", 1)[-1] == collection_path]
+        else:
+            cpaths = [collection_path]
+        for cpath in cpaths:
+            for doc_id, (data, _, update_time) in self._collections.get(cpath, {}).items():
+                yield f"{cpath}/{doc_id}", doc_id, data, update_time
+
+    def _root_collections(self) -> list[str]:
+        return sorted({p for p in self._collections if "/" not in p and self._collections[p]})
+
+    def _paths_under(self, prefix: str) -> list[str]:
+        """Paths of the document or collection at prefix and all their descendants."""
+        doomed = []
+        for cpath, docs in self._collections.items():
+            for doc_id in docs:
+                full = f"{cpath}/{doc_id}"
+                if full == prefix or full.startswith(prefix + "/") or cpath == prefix:
+                    doomed.append(full)
+        return doomed
+
+    def _collection_ids(self, collection_path: str) -> list[str]:
+        with self._lock:
+            return list(self._collections.get(collection_path, {}))
+
+    def _subcollections(self, doc_path: str) -> list[str]:
+        with self._lock:
+            return sorted(
+                p for p, docs in self._collections.items()
+                if docs and p.rsplit("/", 1)[0] == doc_path
+            )
+
+    # ── operations ──
+
+    def _count(self, op: str, path: str, n: int = 1) -> None:
+        collection = path.split("/")[0] if path else ""
+        self.stats[op] += n
+        self.stats[f"{op}:{collection}"] += n
+
+    def _get_many(self, references, field_paths=None) -> list[DocumentSnapshot]:
+        with self._lock:
+            self.stats["round_trips"] += 1
+            snaps = []
+            for ref in references:
+                self._count("reads", ref.path)
+                entry = self._load(ref.path)
+                if entry is None:
+                    snaps.append(DocumentSnapshot(ref, None))
+                else:
+                    data = entry[0] if field_paths is None else _project(entry[0], field_paths)
+                    snaps.append(DocumentSnapshot(ref, data, entry[2]))
+            return snaps
+
+    def _version(self, path: str) -> int:
+        entry = self._load(path)
+        return entry[1] if entry else 0
+
+    def _commit(self, writes: list[tuple], read_versions: dict | None = None) -> list[WriteResult]:
+        if len(writes) > MAX_BATCH_WRITES:
+            raise ValueError(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        with self._lock:
+            self.stats["round_trips"] += 1
+            for path, version in (read_versions or {}).items():
+                if self._version(path) != version:
+                    raise Aborted(f"Transaction conflict on {path}")
+            # Validate first so the commit is all-or-nothing
+            staged: dict[str, dict | None] = {}
+
+            def current(path):
+                if path in staged:
+                    return staged[path]
+                entry = self._load(path)
+                return entry[0] if entry else None
+
+            for kind, path, data, merge in writes:
+                existing = current(path)
+                if kind == "create":
+                    if existing is not None:
+                        raise AlreadyExists(f"Document already exists: {path}")
+                    staged[path] = _resolve(_MISSING, data)
+                elif kind == "set":
+                    if merge and existing is not None:
+                        merged = _copy(existing)
+                        _merge_into(merged, data)
+                        staged[path] = merged
+                    else:
+                        staged[path] = _resolve(_MISSING, data)
+                elif kind == "update":
+                    if existing is None:
+                        raise NotFound(f"No document to update: {path}")
+                    updated = _copy(existing)
+                    for field_path, value in data.items():
+                        _update_path(updated, field_path, value)
+                    staged[path] = updated
+                elif kind == "delete":
+                    staged[path] = None
+
+            now = datetime.now(timezone.utc)
+            for path, data in staged.items():
+                self._store(path, data, self._version(path) + 1, now)
+            for kind, path, _, _ in writes:
+                self._count("deletes" if kind == "delete" else "writes", path)
+            return [WriteResult(now) for _ in writes]
+
+    def _run_query(self, query: Query, count_only: bool = False):
+        with self._lock:
+            self.stats["round_trips"] += 1
+            rows = [
+                (path, doc_id, data, update_time)
+                for path, doc_id, data, update_time
+                in self._scan(query._collection_path, query._all_descendants, query._filters)
+                if all(_matches(f, doc_id, path, data) for f in query._filters)
+            ]
+            rows = self._order_and_slice(query, rows)
+            collection = query._collection_path
+            if count_only:
+                self._count("reads", collection, max(1, (len(rows) + 999) // 1000))
+                return len(rows)
+            self._count("reads", collection, max(1, len(rows)))
+            return [
+                DocumentSnapshot(
+                    DocumentReference(self, path),
+                    data if query._projection is None else _project(data, query._projection),
+                    update_time,
+                )
+                for path, _, data, update_time in rows
+            ]
+
+    @staticmethod
+    def _order_and_slice(query: Query, rows: list) -> list:
+        orders = list(query._orders)
+        if not orders:
+            inequality = next(
+                (f.field_path for f in _flat_filters(query._filters) if f.op_string in _INEQUALITY_OPS),
+                None,
+            )
+            if inequality:
+                orders.append((inequality, Query.ASCENDING))
+        if not any(field == DOCUMENT_ID for field, _ in orders):
+            last_direction = orders[-1][1] if orders else Query.ASCENDING
+            orders.append((DOCUMENT_ID, last_direction))
+
+        def values(path, doc_id, data, update_time):
+            return [
+                _order_key(path if field == DOCUMENT_ID else _get_field(data, field))
+                for field, _ in orders
+            ]
+
+        # Documents missing an ordered field are excluded, as in Firestore
+        keyed = []
+        for row in rows:
+            data = row[2]
+            if any(field != DOCUMENT_ID and _get_field(data, field) is _MISSING for field, _ in orders):
+                continue
+            keyed.append((values(*row), row))
+        for i in reversed(range(len(orders))):
+            reverse = orders[i][1] == Query.DESCENDING
+            keyed.sort(key=lambda kv: kv[0][i], reverse=reverse)
+
+        def position(key, cursor):
+            """-1 / 0 / 1 comparing a row's order key with a cursor prefix."""
+            for i, cursor_value in enumerate(cursor):
+                if key[i] != cursor_value:
+                    less = key[i] < cursor_value
+                    if orders[i][1] == Query.DESCENDING:
+                        less = not less
+                    return -1 if less else 1
+            return 0
+
+        def cursor_values(spec):
+            source, _ = spec
+            if isinstance(source, DocumentSnapshot):
+                data = source._data or {}
+                return [
+                    _order_key(source.reference.path if f == DOCUMENT_ID else _get_field(data, f))
+                    for f, _ in orders
+                ]
+            if isinstance(source, dict):
+                vals = []
+                for f, _ in orders:
+                    if f not in source:
+                        break
+                    v = source[f]
+                    if f == DOCUMENT_ID and not isinstance(v, DocumentReference):
+                        v = f"{query._collection_path}/{v}"
+                    vals.append(_order_key(v.path if isinstance(v, DocumentReference) else v))
+                return vals
+            return [_order_key(v) for v in source]
+
+        if query._start is not None:
+            cursor, inclusive = cursor_values(query._start), query._start[1]
+            keyed = [kv for kv in keyed if position(kv[0], cursor) > 0 or (inclusive and position(kv[0], cursor) == 0)]
+        if query._end is not None:
+            cursor, inclusive = cursor_values(query._end), query._end[1]
+            keyed = [kv for kv in keyed if position(kv[0], cursor) < 0 or (inclusive and position(kv[0], cursor) == 0)]
+
+        result = [row for _, row in keyed][query._offset:]
+        if query._limit is not None:
+            result = result[-query._limit:] if query._limit_to_last else result[:query._limit]
+        return result
+
+
+# ─── Writes ───
+
+class _WriteQueue:
+    def __init__(self, client: InMemoryFirestore):
+        self._client = client
+        self._writes: list[tuple] = []
+
+    def create(self, reference: DocumentReference, document_data: dict):
+        self._writes.append(("create", reference.path, document_data, None))
+
+    def set(self, reference: DocumentReference, document_data: dict, merge: bool = False):
+        self._writes.append(("set", reference.path, document_data, merge))
+
+    def update(self, reference: DocumentReference, field_updates: dict):
+        self._writes.append(("update", reference.path, field_updates, None))
+
+    def delete(self, reference: DocumentReference):
+        self._writes.append(("delete", reference.path, None, None))
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class WriteBatch(_WriteQueue):
+    """Atomic batch of up to 500 writes, committed in one round trip."""
+
+    def commit(self) -> list[WriteResult]:
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes) if writes else []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+
+class BulkWriter(_WriteQueue):
+    """Non-atomic writer that flushes in batches of 20, like the real BulkWriter."""
+
+    def _maybe_flush(self):
+        if len(self._writes) >= BULK_WRITER_BATCH_SIZE:
+            self.flush()
+
+    def create(self, reference, document_data):
+        super().create(reference, document_data)
+        self._maybe_flush()
+
+    def set(self, reference, document_data, merge=False):
+        super().set(reference, document_data, merge)
+        self._maybe_flush()
+
+    def update(self, reference, field_updates):
+        super().update(reference, field_updates)
+        self._maybe_flush()
+
+    def delete(self, reference):
+        super().delete(reference)
+        self._maybe_flush()
+
+    def flush(self):
+        writes, self._writes = self._writes, []
+        for start in range(0, len(writes), BULK_WRITER_BATCH_SIZE):
+            self._client._commit(writes[start:start + BULK_WRITER_BATCH_SIZE])
+
+    def close(self):
+        self.flush()
+
+
+class Transaction(_WriteQueue):
+    """
+    Optimistic transaction compatible with firestore.transactional: reads
+    record document versions and _commit() aborts if any changed since.
+    """
+
+    def __init__(self, client: InMemoryFirestore, max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions: dict[str, int] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        if self._id is not None:
+            raise ValueError("Transaction already in progress")
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self) -> list[WriteResult]:
+        try:
+            if self._read_only and self._writes:
+                raise ValueError("Cannot write in a read-only transaction")
+            return self._client._commit(self._writes, self._read_versions)
+        finally:
+            self._clean_up()
+
+    def _record(self, snapshots):
+        with self._client._lock:
+            for snap in snapshots:
+                self._read_versions.setdefault(snap.reference.path, self._client._version(snap.reference.path))
+        return snapshots
+
+    def get_all(self, references):
+        return self._record(self._client._get_many(list(references)))
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, DocumentReference):
+            return iter(self.get_all([ref_or_query]))
+        return iter(self._record(self._client._run_query(ref_or_query)))
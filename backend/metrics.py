@@ -0,0 +1,107 @@
+"""
+Prometheus metrics for requests, Strava calls and retries, Firestore
+operations, sync stages and interruptions, and the scoring/dashboard
+computations. Served at GET /metrics.
+"""
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+HTTP_REQUESTS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency",
+    ["method", "route", "status"],
+)
+HTTP_FIRESTORE_READS = Histogram(
+    "http_request_firestore_reads",
+    "Firestore documents read per API request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+STRAVA_REQUESTS = Histogram(
+    "strava_request_duration_seconds",
+    "Strava API call latency",
+    ["endpoint", "status"],
+)
+STRAVA_RETRIES = Counter(
+    "strava_retries_total",
+    "Strava calls retried after a 5xx or network error",
+    ["endpoint", "reason"],
+)
+FIRESTORE_OPS = Histogram(
+    "firestore_operation_duration_seconds",
+    "Firestore round-trip latency",
+    ["collection", "op"],
+)
+FIRESTORE_DOCS = Counter(
+    "firestore_documents_total",
+    "Firestore documents read, written or deleted",
+    ["collection", "op"],
+)
+SYNC_STAGES = Histogram(
+    "sync_stage_duration_seconds",
+    "Time spent in each stage of a player sync",
+    ["stage"],
+)
+SYNC_INTERRUPTIONS = Counter(
+    "sync_interruptions_total",
+    "Player syncs stopped by a Strava failure after retries, by Strava status",
+    ["status"],
+)
+COMPUTATIONS = Histogram(
+    "computation_duration_seconds",
+    "Scoring and dashboard computation time",
+    ["name"],
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the duration of the block (also usable as a decorator)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+def collection_label(path: str) -> str:
+    """Collection id for a collection or document path (groups/g1/athletes/p1 → athletes)."""
+    parts = path.split("/")
+    return parts[-1] if len(parts) % 2 else parts[-2]
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and Firestore reads per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def record_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            route = scope.get("route")
+            label = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.labels(scope["method"], label, str(status["code"])).observe(
+                time.perf_counter() - start
+            )
+            uow = scope.get("state", {}).get("unit_of_work")
+            if uow is not None:
+                HTTP_FIRESTORE_READS.labels(label).observe(uow.stats["reads"])
@@ -0,0 +1,127 @@
+"""
+Typed records for activities and per-sport aggregates.
+
+Activities used to travel through sync and scoring as plain dicts; these
+slotted dataclasses keep them compact and give one place that converts to
+and from the Firestore document shape.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Activity:
+    """A stored activity, as written to the `activities` collection."""
+
+    activity_id: str
+    player_id: str
+    sport_type: str
+    sport_category: str
+    block_id: str
+    start_date_utc: str
+    calories: float = 0.0
+    calorie_source: str = "strava_native"
+    kilojoules: float = 0.0
+    distance_meters: float = 0.0
+    moving_time_seconds: int = 0
+    elapsed_time_seconds: int = 0
+    elevation_gain_meters: float = 0.0
+    calorie_confidence: str | None = None
+    strava_athlete_id: str | None = None
+    name: str = ""
+    duplicate_of: str | None = None
+    duplicate_status: str | None = None  # pending | suppressed | kept | discarded
+
+    @property
+    def counts(self) -> bool:
+        """Whether the activity counts toward scores (not an unreviewed or discarded duplicate)."""
+        return self.duplicate_status in (None, "kept")
+
+    @property
+    def is_estimated(self) -> bool:
+        return self.calorie_source in ("met_estimated", "heart_rate_estimated")
+
+    @classmethod
+    def from_firestore(cls, data: dict) -> "Activity":
+        """Build a record from a Firestore document dict (missing numbers → 0)."""
+        return cls(
+            activity_id=str(data.get("activity_id", "")),
+            player_id=data["player_id"],
+            sport_type=data.get("sport_type", ""),
+            sport_category=data["sport_category"],
+            block_id=data.get("block_id", ""),
+            start_date_utc=data.get("start_date_utc", ""),
+            calories=data.get("calories", 0) or 0,
+            calorie_source=data.get("calorie_source") or "strava_native",
+            kilojoules=data.get("kilojoules", 0) or 0,
+            distance_meters=data.get("distance_meters", 0) or 0,
+            moving_time_seconds=data.get("moving_time_seconds", 0) or 0,
+            elapsed_time_seconds=data.get("elapsed_time_seconds", 0) or 0,
+            elevation_gain_meters=data.get("elevation_gain_meters", 0) or 0,
+            calorie_confidence=data.get("calorie_confidence"),
+            strava_athlete_id=data.get("strava_athlete_id"),
+            name=data.get("name", "") or "",
+            duplicate_of=data.get("duplicate_of"),
+            duplicate_status=data.get("duplicate_status"),
+        )
+
+    def to_firestore(self) -> dict:
+        """Document dict in the shape stored in Firestore."""
+        return {
+            "activity_id": self.activity_id,
+            "player_id": self.player_id,
+            "strava_athlete_id": self.strava_athlete_id,
+            "sport_type": self.sport_type,
+            "sport_category": self.sport_category,
+            "block_id": self.block_id,
+            "start_date_utc": self.start_date_utc,
+            "calories": self.calories,
+            "calorie_source": self.calorie_source,
+            "kilojoules": self.kilojoules,
+            "distance_meters": self.distance_meters,
+            "moving_time_seconds": self.moving_time_seconds,
+            "elapsed_time_seconds": self.elapsed_time_seconds,
+            "elevation_gain_meters": self.elevation_gain_meters,
+            "calorie_confidence": self.calorie_confidence,
+            "name": self.name,
+            "duplicate_of": self.duplicate_of,
+            "duplicate_status": self.duplicate_status,
+        }
+
+
+@dataclass(slots=True)
+class SportTotals:
+    """Running totals for one player in one sport within a block."""
+
+    calories: float = 0.0
+    distance: float = 0.0
+    time: float = 0.0
+    count: int = 0
+    is_estimated: bool = False
+
+    def add(self, activity: Activity) -> None:
+        self.calories += activity.calories
+        self.distance += activity.distance_meters
+        self.time += activity.moving_time_seconds
+        self.count += 1
+        if activity.is_estimated:
+            self.is_estimated = True
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SportTotals":
+        return cls(
+            calories=data.get("calories", 0) or 0,
+            distance=data.get("distance", 0) or 0,
+            time=data.get("time", 0) or 0,
+            count=data.get("count", 0) or 0,
+            is_estimated=bool(data.get("is_estimated", False)),
+        )
+
+    def to_dict(self) -> dict:
+        """Shape used for `details_by_player_sport` in score documents."""
+        return {
+            "calories": self.calories,
+            "distance": self.distance,
+            "time": self.time,
+            "count": self.count,
+            "is_estimated": self.is_estimated,
+        }
@@ -0,0 +1,137 @@
+"""
+Opt-in per-request cProfile capture.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+`X-Admin-Token`, or when it is picked by 1-in-N sampling
+(PROFILE_SAMPLE_EVERY). Results are kept in memory — the most recent
+PROFILE_HISTORY of them — and downloaded through /api/admin/profiles.
+
+A profile covers the whole process, not just its request: cProfile hooks
+the event loop's thread, so every other request and background task that
+runs while it is enabled is recorded too. Only one profiler runs at a
+time, so a request arriving while another is being profiled is served
+unprofiled. Time spent awaiting I/O shows up under the awaiting coroutine.
+Long-lived streaming routes (STREAMING_PATHS) are never profiled, as they
+would hold the profiler for as long as the client stays connected.
+"""
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import time
+import uuid
+from collections import OrderedDict
+from config import ADMIN_TOKEN, PROFILE_HISTORY, PROFILE_SAMPLE_EVERY
+
+_profiles: OrderedDict[str, dict] = OrderedDict()
+_request_counter = itertools.count(1)
+_active = False
+# Server-Sent Events; a profile would last as long as the connection
+STREAMING_PATHS = frozenset({"/api/dashboard/stream"})
+
+
+def is_admin(token: str | None) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def list_profiles() -> list[dict]:
+    """Metadata for stored profiles, newest first."""
+    return [
+        {k: v for k, v in p.items() if k != "stats"}
+        for p in reversed(_profiles.values())
+    ]
+
+
+def get_profile(profile_id: str) -> dict | None:
+    return _profiles.get(profile_id)
+
+
+def profile_as_text(profile: dict, sort: str = "cumulative", limit: int = 60) -> str:
+    stream = io.StringIO()
+    stats = pstats.Stats(_Loaded(profile["stats"]), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def profile_as_pstats(profile: dict) -> bytes:
+    """Binary dump loadable with pstats.Stats(path) or snakeviz."""
+    return marshal.dumps(profile["stats"])
+
+
+class _Loaded:
+    """Adapter so pstats.Stats can load a stored stats dict."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _store(profile: dict) -> None:
+    _profiles[profile["id"]] = profile
+    while len(_profiles) > PROFILE_HISTORY:
+        _profiles.popitem(last=False)
+
+
+def _should_profile(scope) -> str | None:
+    if scope.get("path") in STREAMING_PATHS:
+        return None
+    headers = dict(scope.get("headers") or [])
+    if headers.get(b"x-profile") == b"1":
+        token = headers.get(b"x-admin-token")
+        if is_admin(token.decode() if token else None):
+            return "header"
+    if PROFILE_SAMPLE_EVERY and next(_request_counter) % PROFILE_SAMPLE_EVERY == 0:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware wrapping selected requests in cProfile."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _active
+        if scope["type"] != "http" or _active:
+            await self.app(scope, receive, send)
+            return
+        trigger = _should_profile(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = {"code": 500}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        _active = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            _active = False
+            profiler.create_stats()
+            _store({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "trigger": trigger,
+                "wall_s": round(time.perf_counter() - start, 6),
+                "captured_at": time.time(),
+                "stats": profiler.stats,
+            })
@@ -0,0 +1,45 @@
+"""
+Response classes — orjson serialization for every router.
+
+FastAPI still runs jsonable_encoder over plain return values, so hot
+endpoints (dashboard, activity listing) return an ORJSONResponse directly
+and skip that pass; orjson handles the dicts, lists and datetimes read
+from Firestore natively.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware as _GZipMiddleware
+
+GZIP_MINIMUM_SIZE = 1024
+
+
+def _default(value: Any):
+    """Fallback for types orjson doesn't know (sets, Firestore refs, ...)."""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "path"):
+        return value.path
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+class GZipMiddleware(_GZipMiddleware):
+    """GZip that leaves Server-Sent Events alone (compression would buffer them)."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept = dict(scope.get("headers") or []).get(b"accept", b"")
+            if b"text/event-stream" in accept:
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -1,12 +1,22 @@
 """
-Activities router — sync from Strava, list stored activities.
+Activities router — sync from Strava, list stored activities, review
+overlapping duplicates.
 """
-from fastapi import APIRouter, HTTPException
+import base64
+import json
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
 from firebase_client import get_db
-from services.sync_service import sync_player_activities
+from responses import ORJSONResponse
+from services.sync_service import SyncInterrupted, sync_player_activities
+from services.broadcast_service import notify_dashboard_changed
+from services.overlap_service import list_duplicates, resolve_duplicate
 
 router = APIRouter(prefix="/api/activities", tags=["activities"])
 
+PAGE_SIZE = 100  # page length when start_after is given without a limit
+
 
 @router.post("/sync/{player_id}")
 async def sync_activities(player_id: str):
@@ -20,9 +30,17 @@ async def sync_activities(player_id: str):
 
     try:
         result = await sync_player_activities(player_id)
-        return {"status": "ok", "synced": result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except SyncInterrupted as e:
+        # Whatever was stored before the failure still counts; the next sync resumes
+        if e.synced["new"]:
+            notify_dashboard_changed()
+        status = 429 if e.status_code == 429 else 502
+        headers = {}
+        if e.status_code == 429 and "Retry-After" in e.cause.response.headers:
+            headers["Retry-After"] = e.cause.response.headers["Retry-After"]
+        raise HTTPException(status_code=status, detail=e.to_dict(), headers=headers)
+    notify_dashboard_changed()
+    return {"status": "ok", "synced": result}
 
 
 @router.post("/sync-all")
@@ -36,20 +54,106 @@ async def sync_all_activities():
             try:
                 result = await sync_player_activities(doc.id)
                 results[doc.id] = result
+            except SyncInterrupted as e:
+                results[doc.id] = e.to_dict()
             except Exception as e:
                 results[doc.id] = {"error": str(e)}
+    notify_dashboard_changed()
     return {"status": "ok", "results": results}
 
 
+class DuplicateReview(BaseModel):
+    action: str  # keep | discard
+
+
+@router.get("/duplicates")
+async def get_duplicates(
+    player_id: str | None = Query(None),
+    status: str = Query("pending"),
+):
+    """Activities flagged as overlapping another, with the activity they overlap."""
+    return {"duplicates": list_duplicates(player_id, status)}
+
+
+@router.post("/duplicates/{activity_id}")
+async def review_duplicate(activity_id: str, body: DuplicateReview):
+    """Keep (count) or discard a flagged duplicate."""
+    try:
+        activity = resolve_duplicate(activity_id, body.action)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    notify_dashboard_changed()
+    return {"status": "ok", "activity": activity}
+
+
+def _encode_cursor(activity: dict) -> str:
+    """Opaque cursor pointing just past the given activity in listing order."""
+    raw = json.dumps([activity.get("start_date_utc"), activity.get("activity_id")])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        start_date_utc, activity_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid start_after cursor")
+    return {"start_date_utc": start_date_utc, "activity_id": activity_id}
+
+
+def _parse_utc(value: str, name: str) -> str:
+    """Normalise an ISO timestamp to the UTC isoformat stored on activities."""
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
 @router.get("/{player_id}")
-async def list_activities(player_id: str):
-    """List all stored activities for a player."""
+async def list_activities(
+    player_id: str,
+    limit: int | None = Query(None, ge=1, le=500),
+    start_after: str | None = Query(None),
+    block_id: str | None = Query(None),
+    sport: str | None = Query(None),
+    after: str | None = Query(None),
+    before: str | None = Query(None),
+):
+    """
+    List stored activities for a player, oldest first.
+    Ordering, filtering and paging happen in Firestore (see
+    firestore.indexes.json). Without limit or start_after every matching
+    activity is returned, as before paging existed; with them, pages hold
+    up to `limit` (default PAGE_SIZE) activities and the returned
+    next_cursor is passed as start_after to fetch the following page.
+    """
     db = get_db()
-    activities = []
-    query = db.collection("activities").where("player_id", "==", player_id).stream()
-    for doc in query:
-        activities.append(doc.to_dict())
-
-    # Sort by start date
-    activities.sort(key=lambda a: a.get("start_date_utc", ""))
-    return {"activities": activities}
+    query = db.collection("activities").where("player_id", "==", player_id)
+    if block_id:
+        query = query.where("block_id", "==", block_id)
+    if sport:
+        query = query.where("sport_category", "==", sport)
+    if after:
+        query = query.where("start_date_utc", ">=", _parse_utc(after, "after"))
+    if before:
+        query = query.where("start_date_utc", "<=", _parse_utc(before, "before"))
+
+    query = query.order_by("start_date_utc").order_by("activity_id")
+    if start_after:
+        query = query.start_after(_decode_cursor(start_after))
+
+    if limit is None and not start_after:
+        return {"activities": [doc.to_dict() for doc in query.stream()], "next_cursor": None}
+    limit = limit or PAGE_SIZE
+
+    # Fetch one extra document to know whether another page exists
+    activities = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+    next_cursor = None
+    if len(activities) > limit:
+        activities = activities[:limit]
+        next_cursor = _encode_cursor(activities[-1])
+
+    return ORJSONResponse({"activities": activities, "next_cursor": next_cursor})
@@ -1,8 +1,15 @@
 """
 Admin router for development and testing utilities.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from config import BLOCK_DEFINITIONS
 from firebase_client import get_db
+from services.group_service import COUNTERS
+from services.maintenance_service import delete_collections, delete_recursively, print_progress
+from services.rollup_service import rebuild_rollups, verify_rollup
+from tenancy import GROUPS
+from profiling import get_profile, is_admin, list_profiles, profile_as_pstats, profile_as_text
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -11,17 +18,17 @@ router = APIRouter(prefix="/api/admin", tags=["admin"])
 async def reset_data():
     """
     Reset all athlete data, activities, and scores for testing.
-    - Deletes all docs in 'athletes', 'activities', 'scores'.
+    - Deletes all docs in 'athletes', 'activities', 'scores', 'rollups', 'sync_checkpoints', 'counters'.
+    - Deletes every group with its subcollections.
     - Re-creates player_1 and player_2 with status 'disconnected'.
     """
     db = get_db()
 
-    # 1. Clear collections
-    for collection_name in ["athletes", "activities", "scores"]:
-        coll_ref = db.collection(collection_name)
-        docs = coll_ref.stream()
-        for doc in docs:
-            doc.reference.delete()
+    # 1. Clear collections (batched, parallel deletes)
+    deleted = delete_collections(
+        db, ["athletes", "activities", "scores", "rollups", "sync_checkpoints", COUNTERS], on_progress=print_progress,
+    )
+    deleted[GROUPS] = delete_recursively(db, GROUPS, on_progress=print_progress)
 
     # 2. Reset player slots
     player_slots = [
@@ -41,7 +48,65 @@ async def reset_data():
                 "token_expiry": None,
                 "strava_firstname": None,
                 "strava_lastname": None,
+                "root": True,
             }
         )
 
-    return {"message": "All athlete data, activities, and scores have been cleared and player slots reset."}
+    return {
+        "message": "All athlete data, activities, and scores have been cleared and player slots reset.",
+        "deleted": deleted,
+    }
+
+
+def _require_admin(token: str | None) -> None:
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@router.get("/profiles")
+async def profiles(x_admin_token: str | None = Header(None)):
+    """List captured request profiles, newest first."""
+    _require_admin(x_admin_token)
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    sort: str = Query("cumulative"),
+    x_admin_token: str | None = Header(None),
+):
+    """
+    Download a captured profile: a pstats text report, or with
+    format=pstats a binary file for pstats/snakeviz.
+    """
+    _require_admin(x_admin_token)
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            profile_as_pstats(profile),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'},
+        )
+    try:
+        return PlainTextResponse(profile_as_text(profile, sort=sort))
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key {sort}")
+
+
+@router.get("/rollups/verify")
+async def verify_rollups(x_admin_token: str | None = Header(None)):
+    """Compare each block's rollup with its activities; lists any drift."""
+    _require_admin(x_admin_token)
+    mismatches = [m for b in BLOCK_DEFINITIONS for m in verify_rollup(b["block_id"])]
+    return {"ok": not mismatches, "mismatches": mismatches}
+
+
+@router.post("/rollups/rebuild")
+async def rebuild_all_rollups(x_admin_token: str | None = Header(None)):
+    """Recompute every block's rollup from its activities."""
+    _require_admin(x_admin_token)
+    return {"rebuilt": rebuild_rollups()}
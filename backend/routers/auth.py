@@ -12,6 +12,7 @@ from config import (
 )
 from firebase_client import get_db
 from services.strava_service import exchange_code, get_athlete_profile
+from tenancy import competitors
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -121,7 +122,7 @@ async def auth_status():
     players = []
     all_connected = True
 
-    for doc in db.collection("athletes").stream():
+    for doc in competitors(db).stream():
         data = doc.to_dict()
         connected = data.get("status") == "connected"
         if not connected:
@@ -0,0 +1,98 @@
+"""
+Groups router — create groups (leagues), manage their members, and score
+their blocks. Each group is scored only from its own subcollections.
+"""
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from responses import ORJSONResponse
+from services.block_service import get_all_blocks
+from services.group_service import (
+    add_member,
+    create_group,
+    get_group,
+    list_members,
+    remove_member,
+)
+from services.scoring_service import (
+    calculate_block_scores,
+    get_dashboard_data,
+    get_provisional_scores,
+)
+
+router = APIRouter(prefix="/api/groups", tags=["groups"])
+
+
+class CreateGroupRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+
+
+class AddMemberRequest(BaseModel):
+    player_id: str
+
+
+def _existing(group_id: str) -> dict:
+    try:
+        return get_group(group_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("")
+async def new_group(req: CreateGroupRequest):
+    """Create a group with its own blocks."""
+    return create_group(req.name)
+
+
+@router.get("/{group_id}")
+async def group_detail(group_id: str):
+    """The group, its members and its blocks."""
+    group = _existing(group_id)
+    return {**group, "players": list_members(group_id), "blocks": get_all_blocks(group_id)}
+
+
+@router.post("/{group_id}/members")
+async def join_group(group_id: str, req: AddMemberRequest):
+    """Add a registered athlete; their activities count in the group from now on."""
+    _existing(group_id)
+    try:
+        return add_member(group_id, req.player_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/{group_id}/members/{player_id}")
+async def leave_group(group_id: str, player_id: str):
+    """Remove an athlete from the group."""
+    _existing(group_id)
+    try:
+        remove_member(group_id, player_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "ok"}
+
+
+@router.post("/{group_id}/scores/calculate/{block_id}")
+async def calculate_group_scores(group_id: str, block_id: str):
+    """Score and lock one of the group's blocks."""
+    _existing(group_id)
+    try:
+        return {"status": "ok", "scores": calculate_block_scores(block_id, group_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{group_id}/scores/{block_id}/provisional")
+async def group_provisional_scores(group_id: str, block_id: str):
+    """Standings so far for one of the group's blocks, without locking."""
+    _existing(group_id)
+    try:
+        return get_provisional_scores(block_id, group_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/{group_id}/dashboard")
+async def group_dashboard(group_id: str):
+    """The group's scoreboard, block scores and sport breakdown."""
+    _existing(group_id)
+    return ORJSONResponse(get_dashboard_data(group_id))
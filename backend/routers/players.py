@@ -4,12 +4,14 @@ Player management router.
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from firebase_client import get_db
+from services.group_service import add_member, allocate_player_id, get_group
 
 router = APIRouter(prefix="/api", tags=["players"])
 
 
 class RegisterRequest(BaseModel):
     display_name: str
+    group_id: str | None = None  # join only this group, not the root competition
 
 
 @router.get("/players")
@@ -35,12 +37,16 @@ async def list_players():
 
 @router.post("/register")
 async def register_player(req: RegisterRequest):
-    """Admin: create a new player slot."""
+    """Admin: create a new player slot, in the root competition or in one group."""
     db = get_db()
+    if req.group_id is not None:
+        try:
+            get_group(req.group_id)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
 
-    # Auto-generate player ID
-    existing = list(db.collection("athletes").stream())
-    player_id = f"player_{len(existing) + 1}"
+    # Auto-generate player ID from a counter, without reading the athletes
+    player_id = allocate_player_id()
 
     db.collection("athletes").document(player_id).set(
         {
@@ -51,7 +57,10 @@ async def register_player(req: RegisterRequest):
             "access_token": None,
             "refresh_token": None,
             "token_expiry": None,
+            "root": req.group_id is None,
         }
     )
+    if req.group_id is not None:
+        add_member(req.group_id, player_id)
 
     return {"player_id": player_id, "display_name": req.display_name, "status": "pending"}
@@ -1,41 +1,75 @@
 """
 Scores router — calculate, retrieve, and dashboard aggregation.
 """
-from fastapi import APIRouter, HTTPException
+import os
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from firebase_client import get_db
+from responses import ORJSONResponse
 from services.scoring_service import (
     calculate_block_scores,
     get_all_scores,
-    get_dashboard_data,
+    get_provisional_scores,
 )
+from services.dashboard_service import get_dashboard_delta, get_versioned_dashboard
+from services.broadcast_service import broadcaster, event_stream, notify_dashboard_changed
+from services.snapshot_service import export_after_lock, snapshot_path
+from services.what_if_service import simulate_block
 from services.block_service import get_most_recently_closed_block, get_all_blocks
+from services.group_service import due_group_blocks
 
 router = APIRouter(prefix="/api", tags=["scores"])
 
 
+class HypotheticalActivity(BaseModel):
+    player_id: str
+    sport_category: str
+    calories: float = Field(ge=0)
+    distance_meters: float = Field(0, ge=0)
+    moving_time_seconds: int = Field(0, ge=0)
+
+
+class WhatIfRequest(BaseModel):
+    activities: list[HypotheticalActivity] = Field(default_factory=list, max_length=50)
+
+
 @router.post("/scores/calculate/{block_id}")
-async def calculate_scores(block_id: str):
+async def calculate_scores(block_id: str, background_tasks: BackgroundTasks):
     """Manually trigger scoring for a specific block."""
     try:
         result = calculate_block_scores(block_id)
+        notify_dashboard_changed()
+        background_tasks.add_task(export_after_lock)
         return {"status": "ok", "scores": result}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/scores/calculate-job")
-async def calculate_job():
+async def calculate_job(background_tasks: BackgroundTasks):
     """
-    Scheduled job endpoint: score the most recently closed block.
+    Scheduled job endpoint: score the most recently closed block, and every
+    closed, unlocked block of every group.
     Called every Monday 12:00 UTC by Cloud Scheduler.
     """
+    groups = {}
+    for group_id, block_id in due_group_blocks():
+        try:
+            calculate_block_scores(block_id, group_id)
+            groups.setdefault(group_id, []).append(block_id)
+        except ValueError as e:
+            print(f"Scoring {block_id} of group {group_id} failed: {e}")
+
     block = get_most_recently_closed_block()
     if block is None:
-        return {"status": "no_block", "message": "No unlocked closed blocks to score"}
+        return {"status": "no_block", "message": "No unlocked closed blocks to score", "groups": groups}
 
     try:
         result = calculate_block_scores(block["block_id"])
-        return {"status": "ok", "block_id": block["block_id"], "scores": result}
+        notify_dashboard_changed()
+        background_tasks.add_task(export_after_lock)
+        return {"status": "ok", "block_id": block["block_id"], "scores": result, "groups": groups}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -57,11 +91,91 @@ async def get_score(block_id: str):
     return doc.to_dict()
 
 
+@router.get("/scores/{block_id}/provisional")
+async def provisional_score(block_id: str):
+    """Standings so far for a block, scored from its rollup without locking."""
+    try:
+        return get_provisional_scores(block_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/scores/{block_id}/what-if")
+async def what_if(block_id: str, req: WhatIfRequest):
+    """
+    Points, clean sweep status and standings for an open block as it stands
+    and with the hypothetical activities added. Nothing is written.
+    """
+    try:
+        return simulate_block(block_id, [a.model_dump() for a in req.activities])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/dashboard")
-async def dashboard():
-    """Aggregated dashboard data for all panels."""
-    data = get_dashboard_data()
-    return data
+async def dashboard(if_none_match: str | None = Header(None)):
+    """
+    Aggregated dashboard data for all panels, with its version (also sent
+    as the ETag; a matching If-None-Match gets a 304).
+    """
+    version, data = get_versioned_dashboard()
+    etag = f'"{version}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse({**data, "version": version}, headers={"ETag": etag})
+
+
+@router.get("/dashboard/delta")
+async def dashboard_delta(since: str | None = Query(None)):
+    """Changes to the dashboard since the client's last version."""
+    return ORJSONResponse(get_dashboard_delta(since))
+
+
+@router.get("/dashboard/stream")
+async def dashboard_stream():
+    """
+    Server-Sent Events: a full snapshot, then a patch (same shape as
+    /dashboard/delta) each time sync, scoring or a webhook changes data.
+    """
+    queue, snapshot = await broadcaster.subscribe()
+    return StreamingResponse(
+        event_stream(queue, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _snapshot_response(path: str | None, cache_control: str, if_none_match: str | None):
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="No dashboard snapshot exported yet")
+    stat = os.stat(path)
+    etag = f'"{int(stat.st_mtime_ns):x}-{stat.st_size:x}"'
+    headers = {"Cache-Control": cache_control, "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+
+@router.get("/dashboard/snapshot")
+async def dashboard_snapshot(if_none_match: str | None = Header(None)):
+    """Latest static dashboard export (changes only when a block locks)."""
+    return _snapshot_response(
+        snapshot_path(),
+        "public, max-age=300, stale-while-revalidate=86400",
+        if_none_match,
+    )
+
+
+@router.get("/dashboard/snapshot/{version}")
+async def dashboard_snapshot_version(version: str, if_none_match: str | None = Header(None)):
+    """A specific exported version; immutable, so cached for a year."""
+    if not version.isalnum():
+        raise HTTPException(status_code=400, detail="Invalid snapshot version")
+    return _snapshot_response(
+        snapshot_path(version),
+        "public, max-age=31536000, immutable",
+        if_none_match,
+    )
 
 
 @router.get("/blocks")
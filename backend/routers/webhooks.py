@@ -0,0 +1,97 @@
+"""
+Strava webhook router — subscription validation and activity/athlete events.
+"""
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from config import STRAVA_WEBHOOK_SUBSCRIPTION_ID, STRAVA_WEBHOOK_VERIFY_TOKEN
+from firebase_client import get_db
+from models import Activity
+from services.rollup_service import remove_activity
+from services.sync_service import sync_player_activities
+from services.broadcast_service import notify_dashboard_changed
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+
+async def _sync_in_background(player_id: str):
+    try:
+        result = await sync_player_activities(player_id)
+        if result["new"]:
+            notify_dashboard_changed()
+    except Exception as e:
+        print(f"Webhook sync failed for {player_id}: {e}")
+
+
+@router.get("/strava")
+async def validate_subscription(
+    mode: str = Query(..., alias="hub.mode"),
+    challenge: str = Query(..., alias="hub.challenge"),
+    verify_token: str = Query(..., alias="hub.verify_token"),
+):
+    """Echo the challenge when Strava validates a push subscription."""
+    if (
+        mode != "subscribe"
+        or not STRAVA_WEBHOOK_VERIFY_TOKEN
+        or verify_token != STRAVA_WEBHOOK_VERIFY_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Invalid verify token")
+    return {"hub.challenge": challenge}
+
+
+@router.post("/strava")
+async def receive_event(event: dict, background_tasks: BackgroundTasks):
+    """
+    Handle a Strava push event. Strava expects a 200 within two seconds,
+    so syncs triggered by new or updated activities run after the response.
+    Events must carry our subscription id: this endpoint is public and can
+    disconnect athletes and delete activities.
+    """
+    if (
+        not STRAVA_WEBHOOK_SUBSCRIPTION_ID
+        or str(event.get("subscription_id", "")) != STRAVA_WEBHOOK_SUBSCRIPTION_ID
+    ):
+        raise HTTPException(status_code=403, detail="Unknown subscription")
+
+    db = get_db()
+    owner_id = str(event.get("owner_id", ""))
+    matches = list(
+        db.collection("athletes")
+        .where("strava_athlete_id", "==", owner_id)
+        .limit(1)
+        .stream()
+    )
+    if not matches:
+        return {"status": "ignored"}
+    player_id = matches[0].id
+
+    if event.get("object_type") == "athlete":
+        if (event.get("updates") or {}).get("authorized") == "false":
+            db.collection("athletes").document(player_id).update(
+                {
+                    "status": "disconnected",
+                    "access_token": None,
+                    "refresh_token": None,
+                    "token_expiry": None,
+                }
+            )
+            notify_dashboard_changed()
+            return {"status": "deauthorized", "player_id": player_id}
+        return {"status": "ignored"}
+
+    if event.get("object_type") != "activity":
+        return {"status": "ignored"}
+
+    if event.get("aspect_type") == "delete":
+        activity_ref = db.collection("activities").document(str(event.get("object_id")))
+        activity_doc = activity_ref.get()
+        if not activity_doc.exists or activity_doc.to_dict().get("player_id") != player_id:
+            return {"status": "ignored"}
+        block_id = activity_doc.to_dict().get("block_id")
+        block_doc = db.collection("blocks").document(block_id).get()
+        if block_doc.exists and block_doc.to_dict().get("locked", False):
+            return {"status": "ignored", "reason": "block locked"}
+        remove_activity(db, Activity.from_firestore(activity_doc.to_dict()))
+        notify_dashboard_changed()
+        return {"status": "deleted", "player_id": player_id}
+
+    background_tasks.add_task(_sync_in_background, player_id)
+    return {"status": "sync_scheduled", "player_id": player_id}
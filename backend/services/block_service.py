@@ -1,54 +1,156 @@
 """
 Block management service — seeding, window lookups, lock management.
 """
+import hashlib
+import json
 from datetime import datetime, timezone
 from config import BLOCK_DEFINITIONS
-from firebase_client import get_db
+from firebase_client import get_client, get_db
+from tenancy import GROUPS, group_collection
 
 
-def seed_blocks():
-    """Seed block documents in Firestore if they don't exist."""
+SCHEMA_DOC = ("meta", "schema")
+PLAYER_SLOTS = 2
+# Block fields that come from BLOCK_DEFINITIONS (the rest is lock state)
+DEFINITION_FIELDS = ("block_id", "label", "window_open_utc", "window_close_utc", "sports")
+# Bump when ensure_seeded() gains a data migration, so it runs once everywhere
+SEED_REVISION = 1
+
+
+def _block_document(block: dict) -> dict:
+    return {
+        "block_id": block["block_id"],
+        "label": block["label"],
+        "window_open_utc": block["window_open_utc"].isoformat(),
+        "window_close_utc": block["window_close_utc"].isoformat(),
+        "sports": block["sports"],
+        "locked": False,
+        "calculated_at": None,
+    }
+
+
+def _player_document(index: int) -> dict:
+    return {
+        "display_name": f"Player {index + 1}",
+        "strava_athlete_id": None,
+        "status": "pending",
+        "profile_photo": None,
+        "access_token": None,
+        "refresh_token": None,
+        "token_expiry": None,
+        "root": True,
+    }
+
+
+def schema_version(player_count: int = PLAYER_SLOTS) -> str:
+    """Fingerprint of the seed data; changes whenever block definitions change."""
+    payload = json.dumps(
+        {
+            "blocks": [_block_document(b) for b in BLOCK_DEFINITIONS],
+            "players": player_count,
+            "revision": SEED_REVISION,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _seed_missing(db, seeds: list[tuple], always: list[tuple] = (), refresh: tuple = ()) -> int:
+    """
+    Create the (ref, data) seeds that don't exist yet, plus the `always`
+    writes, with one read and one batch. Seeds that do exist get their
+    `refresh` fields updated where the stored values differ.
+    """
+    snapshots = db.get_all([ref for ref, _ in seeds])
+    stored = {snap.reference.path: snap.to_dict() for snap in snapshots if snap.exists}
+    missing, changed = [], []
+    for ref, data in seeds:
+        current = stored.get(ref.path)
+        if current is None:
+            missing.append((ref, data))
+            continue
+        fields = {f: data[f] for f in refresh if f in data and current.get(f) != data[f]}
+        if fields:
+            changed.append((ref, fields))
+    if missing or changed or always:
+        batch = db.batch()
+        for ref, data in [*missing, *always]:
+            batch.set(ref, data)
+        for ref, fields in changed:
+            batch.update(ref, fields)
+        batch.commit()
+    return len(missing)
+
+
+def _block_seeds(db, group_id: str | None = None) -> list[tuple]:
+    return [
+        (group_collection(db, "blocks", group_id).document(b["block_id"]), _block_document(b))
+        for b in BLOCK_DEFINITIONS
+    ]
+
+
+def seed_blocks(group_id: str | None = None):
+    """
+    Seed block documents in Firestore (for a group, in its blocks) if they
+    don't exist, and bring existing ones in line with BLOCK_DEFINITIONS.
+    """
     db = get_db()
-    for block in BLOCK_DEFINITIONS:
-        doc_ref = db.collection("blocks").document(block["block_id"])
-        if not doc_ref.get().exists:
-            doc_ref.set(
-                {
-                    "block_id": block["block_id"],
-                    "label": block["label"],
-                    "window_open_utc": block["window_open_utc"].isoformat(),
-                    "window_close_utc": block["window_close_utc"].isoformat(),
-                    "sports": block["sports"],
-                    "locked": False,
-                    "calculated_at": None,
-                }
-            )
-
-
-def seed_players(count: int = 2):
-    """Seed player slots in Firestore if none exist."""
+    _seed_missing(db, _block_seeds(db, group_id), refresh=DEFINITION_FIELDS)
+
+
+def seed_players(count: int = PLAYER_SLOTS):
+    """Seed missing player slots in Firestore."""
     db = get_db()
-    athletes_ref = db.collection("athletes")
-    existing = list(athletes_ref.stream())
-
-    if len(existing) >= count:
-        return  # Already seeded
-
-    for i in range(count):
-        player_id = f"player_{i + 1}"
-        doc_ref = athletes_ref.document(player_id)
-        if not doc_ref.get().exists:
-            doc_ref.set(
-                {
-                    "display_name": f"Player {i + 1}",
-                    "strava_athlete_id": None,
-                    "status": "pending",
-                    "profile_photo": None,
-                    "access_token": None,
-                    "refresh_token": None,
-                    "token_expiry": None,
-                }
-            )
+    _seed_missing(db, [
+        (db.collection("athletes").document(f"player_{i + 1}"), _player_document(i))
+        for i in range(count)
+    ])
+
+
+def _mark_root_competitors(db) -> int:
+    """Flag athletes registered before root membership existed as root competitors."""
+    unmarked = [
+        doc.reference for doc in db.collection("athletes").select(["root"]).stream()
+        if "root" not in doc.to_dict()
+    ]
+    if unmarked:
+        writer = db.bulk_writer()
+        for ref in unmarked:
+            writer.update(ref, {"root": True})
+        writer.close()
+    return len(unmarked)
+
+
+def ensure_seeded() -> bool:
+    """
+    Seed blocks and player slots only when meta/schema is missing or stale.
+    The common case is a single document read. Returns True if it seeded.
+    When BLOCK_DEFINITIONS change, existing blocks (every group's too) get
+    the changed definition fields; locked and calculated_at are kept.
+    Athletes stored before the `root` flag get it (see tenancy.py).
+    Runs on the raw client: as a first-use hook it can fire inside a
+    request's unit of work, whose identity map must not keep the
+    pre-seeding snapshots.
+    """
+    db = get_client()
+    version = schema_version()
+    schema_ref = db.collection(SCHEMA_DOC[0]).document(SCHEMA_DOC[1])
+    schema = schema_ref.get()
+    if schema.exists and schema.to_dict().get("version") == version:
+        return False
+
+    for group in db.collection(GROUPS).select([]).stream():
+        _seed_missing(db, _block_seeds(db, group.id), refresh=DEFINITION_FIELDS)
+    _mark_root_competitors(db)
+    seeds = _block_seeds(db) + [
+        (db.collection("athletes").document(f"player_{i + 1}"), _player_document(i))
+        for i in range(PLAYER_SLOTS)
+    ]
+    # The schema document goes last, so an interrupted upgrade is retried
+    _seed_missing(db, seeds, always=[
+        (schema_ref, {"version": version, "seeded_at": datetime.now(timezone.utc).isoformat()}),
+    ], refresh=DEFINITION_FIELDS)
+    return True
 
 
 def get_most_recently_closed_block() -> dict | None:
@@ -75,10 +177,10 @@ def get_most_recently_closed_block() -> dict | None:
     return candidates[0]
 
 
-def get_all_blocks() -> list[dict]:
+def get_all_blocks(group_id: str | None = None) -> list[dict]:
     """Return all blocks from Firestore."""
     db = get_db()
     blocks = []
-    for doc in db.collection("blocks").stream():
+    for doc in group_collection(db, "blocks", group_id).stream():
         blocks.append(doc.to_dict())
     return blocks
@@ -0,0 +1,161 @@
+"""
+Dashboard push — Server-Sent Events fan-out of dashboard changes.
+
+Sync, scoring and webhook ingestion call notify_dashboard_changed(). While
+at least one dashboard is subscribed, a single broadcaster task coalesces
+notifications, recomputes the dashboard once, and serializes the patch
+from the previous broadcast once; the same bytes are queued to every
+subscriber. New subscribers first get a full snapshot, so everyone is on
+the last broadcast version and the one patch applies to all of them.
+
+Subscribers are per process; with several instances each runs its own
+broadcaster.
+"""
+import asyncio
+import contextvars
+import threading
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from firebase_client import get_client
+from services.dashboard_service import diff_dashboards, get_versioned_dashboard
+from unit_of_work import UnitOfWork, current_unit_of_work
+
+COALESCE_SECONDS = 0.5
+HEARTBEAT_SECONDS = 15.0
+SUBSCRIBER_QUEUE_SIZE = 8
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+def _event(payload: dict) -> bytes:
+    return b"event: dashboard\nid: " + payload["version"].encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _compute() -> tuple[str, dict]:
+    # Fresh unit of work: never reuse a request's identity map
+    with UnitOfWork(get_client):
+        return get_versioned_dashboard()
+
+
+class DashboardBroadcaster:
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._refreshing: asyncio.Lock | None = None
+        self._version: str | None = None
+        self._data: dict | None = None
+        self._lock = threading.Lock()
+        self.broadcasts = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self) -> None:
+        """Mark the dashboard changed (safe from any thread)."""
+        with self._lock:
+            loop, changed = self._loop, self._changed
+        if loop is None or changed is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            changed.set()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(changed.set)
+
+    async def subscribe(self) -> tuple[asyncio.Queue, bytes]:
+        """Register a subscriber; returns its queue and the initial snapshot event."""
+        self._ensure_running()
+        if self._data is None:
+            # A pending change is still broadcast to everyone, including us
+            await self._refresh(send=False)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        snapshot = _event({"version": self._version, "full": True, "data": self._data})
+        return queue, snapshot
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        with self._lock:
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._data = None
+        self._refreshing = asyncio.Lock()
+        # Empty context: the task must not inherit the subscribing request's unit of work
+        self._task = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(COALESCE_SECONDS)
+            self._changed.clear()
+            if not self._subscribers:
+                self._data = None   # recompute on next subscribe
+                continue
+            try:
+                await self._refresh(send=True)
+            except Exception as e:
+                print(f"Dashboard broadcast failed: {e}")
+
+    async def _refresh(self, send: bool) -> None:
+        async with self._refreshing:
+            version, data = await run_in_threadpool(_compute)
+            previous_version, previous = self._version, self._data
+            self._version, self._data = version, data
+        if not send or version == previous_version:
+            return
+        if previous is None:
+            message = _event({"version": version, "full": True, "data": data})
+        else:
+            message = _event({
+                "version": version,
+                "since": previous_version,
+                "full": False,
+                "changes": diff_dashboards(previous, data),
+            })
+        self.broadcasts += 1
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow consumer: drop its oldest event, it will resync on the gap
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+
+broadcaster = DashboardBroadcaster()
+
+
+def notify_dashboard_changed() -> None:
+    """
+    Tell connected dashboards something changed. Inside a request this
+    waits until the request's writes are committed.
+    """
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.on_commit(broadcaster.notify)
+    else:
+        broadcaster.notify()
+
+
+async def event_stream(queue: asyncio.Queue, snapshot: bytes):
+    """SSE body: the snapshot, then broadcast events, with heartbeats."""
+    try:
+        yield snapshot
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,201 @@
+"""
+Calorie estimation for activities Strava has no energy data for.
+
+MET values come from speed-banded tables after the Compendium of Physical
+Activities (Ainsworth et al., 2011): the average moving speed picks the
+band, so an easy jog and a tempo run no longer get the same MET. Climbing
+adds the work against gravity at a typical 25% muscular efficiency.
+
+    kcal = MET × weight_kg × hours + weight_kg × 9.81 × elevation_m / (0.25 × 4184)
+
+Everything works on arrays, so reestimate_stored() re-estimates every
+stored activity in one pass after a formula change; estimate_activity()
+is the single-activity wrapper used by sync.
+Each estimate carries a confidence:
+
+- high:   speed-banded MET with the athlete's own weight
+- medium: speed-banded MET, default weight
+- low:    no usable distance, so the sport's flat MET was used
+
+estimate_from_heart_rate() is the better estimate when a heart-rate stream
+is available (Keytel et al., 2005, which needs no VO2max).
+"""
+import numpy as np
+from firebase_client import get_db
+from services.rollup_service import competitions, rebuild_rollup
+
+DEFAULT_WEIGHT_KG = 80.0
+CLIMB_EFFICIENCY = 0.25
+KCAL_PER_JOULE = 1 / 4184
+
+# Flat MET per sport, used when speed is unknown
+DEFAULT_MET = {
+    "Running": 9.8,
+    "Cycling": 7.5,
+    "Swimming": 8.0,
+}
+
+# (upper speed bound in km/h, MET) per band; the last band is open-ended
+MET_TABLES = {
+    "Running": [
+        (6.4, 6.0), (8.0, 8.3), (8.4, 9.0), (9.7, 9.8), (10.8, 10.5),
+        (11.3, 11.0), (12.1, 11.5), (12.9, 11.8), (13.8, 12.3), (14.5, 12.8),
+        (16.1, 14.5), (17.7, 16.0), (19.3, 19.0), (20.9, 19.8), (np.inf, 23.0),
+    ],
+    "Cycling": [
+        (16.1, 4.0), (19.3, 6.8), (22.5, 8.0), (25.7, 10.0), (30.6, 12.0), (np.inf, 15.8),
+    ],
+    "Swimming": [
+        (1.8, 5.8), (2.7, 8.3), (3.6, 9.8), (np.inf, 10.0),
+    ],
+}
+# Swimming burns roughly the same regardless of pool depth, so no climb term
+CLIMBING_SPORTS = ("Running", "Cycling")
+
+SPORTS = tuple(MET_TABLES)
+_BOUNDS = {sport: np.array([b for b, _ in table]) for sport, table in MET_TABLES.items()}
+_METS = {sport: np.array([m for _, m in table]) for sport, table in MET_TABLES.items()}
+
+
+def estimate_calories(sports, moving_time_s, distance_m, elevation_gain_m=None, weight_kg=None) -> dict:
+    """
+    Estimate calories for a batch of activities given as equal-length
+    sequences (weight and elevation entries may be None/NaN when unknown).
+    Returns arrays {"calories", "met", "confidence"}.
+    """
+    sports = np.asarray(sports, dtype=object)
+    n = len(sports)
+    hours = np.asarray(moving_time_s, dtype=float) / 3600.0
+    distance = np.asarray(distance_m, dtype=float)
+    elevation = np.zeros(n) if elevation_gain_m is None else np.asarray(elevation_gain_m, dtype=float)
+    elevation = np.nan_to_num(np.clip(elevation, 0, None))
+    weight = np.full(n, np.nan) if weight_kg is None else np.asarray(weight_kg, dtype=float)
+
+    known_weight = np.isfinite(weight) & (weight > 0)
+    weight = np.where(known_weight, weight, DEFAULT_WEIGHT_KG)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed_kmh = np.where(hours > 0, distance / 1000.0 / hours, np.nan)
+    known_speed = np.isfinite(speed_kmh) & (speed_kmh > 0)
+
+    met = np.zeros(n)
+    climbs = np.zeros(n, dtype=bool)
+    for sport in SPORTS:
+        mask = sports == sport
+        if not mask.any():
+            continue
+        banded = _METS[sport][np.searchsorted(_BOUNDS[sport], speed_kmh[mask], side="right").clip(
+            max=len(_BOUNDS[sport]) - 1)]
+        met[mask] = np.where(known_speed[mask], banded, DEFAULT_MET[sport])
+        climbs[mask] = sport in CLIMBING_SPORTS
+    unknown_sport = met == 0
+    met[unknown_sport] = 1.0
+
+    climb_kcal = np.where(climbs, weight * 9.81 * elevation / CLIMB_EFFICIENCY * KCAL_PER_JOULE, 0.0)
+    calories = np.round(met * weight * hours + climb_kcal, 2)
+    confidence = np.where(known_speed & ~unknown_sport, np.where(known_weight, "high", "medium"), "low")
+    return {"calories": calories, "met": met, "confidence": confidence}
+
+
+def estimate_activity(sport: str, moving_time_s: float, distance_m: float,
+                      elevation_gain_m: float = 0.0, weight_kg: float | None = None) -> tuple[float, str]:
+    """(calories, confidence) for a single activity."""
+    result = estimate_calories(
+        [sport], [moving_time_s], [distance_m], [elevation_gain_m],
+        [np.nan if weight_kg is None else weight_kg],
+    )
+    return float(result["calories"][0]), str(result["confidence"][0])
+
+
+# Keytel et al. (2005): kJ/min = a + b·HR + c·weight + d·age, per sex
+KEYTEL_COEFFICIENTS = {
+    "M": (-55.0969, 0.6309, 0.1988, 0.2017),
+    "F": (-20.4022, 0.4472, -0.1263, 0.0740),
+}
+HR_VALID_RANGE = (40, 230)
+HR_MAX_GAP_S = 30          # longer gaps between samples are pauses
+HR_MIN_COVERAGE = 0.5      # share of moving time that needs a valid reading
+
+
+def estimate_from_heart_rate(heart_rate, time_s, weight_kg: float | None = None,
+                             age: float = 35, sex: str | None = None) -> dict | None:
+    """
+    Calories from a heart-rate stream and its sample times (seconds from
+    start), or None when too little of the activity has valid readings.
+    Returns {"calories", "avg_hr", "samples", "minutes"}.
+    """
+    hr = np.asarray(heart_rate, dtype=float)
+    t = np.asarray(time_s, dtype=float)
+    if len(hr) < 2 or len(hr) != len(t):
+        return None
+    dt = np.clip(np.diff(t, prepend=t[0]), 0, HR_MAX_GAP_S)
+    valid = (hr >= HR_VALID_RANGE[0]) & (hr <= HR_VALID_RANGE[1])
+    total_s = dt.sum()
+    if total_s <= 0 or dt[valid].sum() / total_s < HR_MIN_COVERAGE:
+        return None
+
+    weight = weight_kg if weight_kg and weight_kg > 0 else DEFAULT_WEIGHT_KG
+    coefficients = [KEYTEL_COEFFICIENTS[sex]] if sex in KEYTEL_COEFFICIENTS else list(KEYTEL_COEFFICIENTS.values())
+    kj_per_min = np.mean([
+        a + b * hr[valid] + c * weight + d * age for a, b, c, d in coefficients
+    ], axis=0).clip(min=0)
+    kcal = float((kj_per_min * dt[valid]).sum() / 60 / 4.184)
+    return {
+        "calories": round(kcal, 2),
+        "avg_hr": round(float(np.average(hr[valid], weights=dt[valid] + 1e-9)), 1),
+        "samples": int(valid.sum()),
+        "minutes": round(float(dt[valid].sum() / 60), 1),
+    }
+
+
+def reestimate_stored(dry_run: bool = False) -> dict:
+    """
+    Re-run the estimator over every stored MET-estimated activity in
+    unlocked blocks, update the ones whose calories changed and rebuild
+    those blocks' rollups in the competitions the affected athletes play
+    in. Locked blocks are left alone.
+    """
+    db = get_db()
+    athletes = {
+        pdoc.id: pdoc.to_dict()
+        for pdoc in db.collection("athletes").select(["weight_kg", "groups", "root"]).stream()
+    }
+    weights = {pid: data.get("weight_kg") for pid, data in athletes.items()}
+    locked = {
+        bdoc.id for bdoc in db.collection("blocks").where("locked", "==", True).select([]).stream()
+    }
+    docs = [
+        adoc for adoc in db.collection("activities").where("calorie_source", "==", "met_estimated").stream()
+        if adoc.to_dict().get("block_id") not in locked
+    ]
+    if not docs:
+        return {"estimated": 0, "changed": 0, "blocks": []}
+
+    rows = [adoc.to_dict() for adoc in docs]
+    result = estimate_calories(
+        [r.get("sport_category") for r in rows],
+        [r.get("moving_time_seconds") or 0 for r in rows],
+        [r.get("distance_meters") or 0 for r in rows],
+        [r.get("elevation_gain_meters") or 0 for r in rows],
+        [weights.get(r.get("player_id")) or np.nan for r in rows],
+    )
+    changed = np.flatnonzero(
+        ~np.isclose(result["calories"], [r.get("calories") or 0 for r in rows])
+        | (result["confidence"] != np.array([r.get("calorie_confidence") or "" for r in rows]))
+    )
+    blocks = sorted({rows[i]["block_id"] for i in changed})
+    playing = sorted(
+        {gid for i in changed for gid in competitions(athletes.get(rows[i].get("player_id"), {}))},
+        key=lambda gid: (gid is not None, gid or ""),
+    )
+    if not dry_run and len(changed):
+        writer = db.bulk_writer()
+        for i in changed:
+            writer.update(docs[i].reference, {
+                "calories": float(result["calories"][i]),
+                "calorie_confidence": str(result["confidence"][i]),
+            })
+        writer.close()
+        for block_id in blocks:
+            for group_id in playing:
+                rebuild_rollup(block_id, group_id)
+    return {"estimated": len(rows), "changed": len(changed), "blocks": blocks}
@@ -0,0 +1,86 @@
+"""
+Dashboard versioning — content-hashed dashboard snapshots and compact
+patches between them.
+
+Every computed dashboard gets a version (a hash of its content, so the
+same data has the same version on every instance). The most recent
+versions are kept in memory; a client that sends one of them gets back
+only the sections and block documents that changed, and a client that is
+too far behind (or talked to another instance) gets a full snapshot.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import orjson
+
+from services.scoring_service import get_dashboard_data
+
+DASHBOARD_HISTORY = 32
+
+# Sections replaced wholesale when they differ
+_SECTIONS = ("players", "scoreboard", "sport_breakdown", "projection")
+# Lists of per-block documents, patched by block_id
+_KEYED_LISTS = ("block_scores", "blocks")
+
+_history: OrderedDict[str, dict] = OrderedDict()
+_lock = threading.Lock()
+
+
+def dashboard_version(data: dict) -> str:
+    return hashlib.sha256(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+
+
+def _remember(version: str, data: dict) -> None:
+    with _lock:
+        _history[version] = data
+        _history.move_to_end(version)
+        while len(_history) > DASHBOARD_HISTORY:
+            _history.popitem(last=False)
+
+
+def get_versioned_dashboard() -> tuple[str, dict]:
+    """Compute the dashboard and return (version, data)."""
+    data = get_dashboard_data()
+    version = dashboard_version(data)
+    _remember(version, data)
+    return version, data
+
+
+def _diff_keyed(old: list[dict], new: list[dict]) -> dict | None:
+    old_by_id = {d.get("block_id"): d for d in old}
+    new_by_id = {d.get("block_id"): d for d in new}
+    upsert = [d for key, d in new_by_id.items() if old_by_id.get(key) != d]
+    remove = [key for key in old_by_id if key not in new_by_id]
+    if not upsert and not remove:
+        return None
+    return {"upsert": upsert, "remove": remove}
+
+
+def diff_dashboards(old: dict, new: dict) -> dict:
+    """Changed sections of `new` relative to `old`."""
+    changes = {}
+    for section in _SECTIONS:
+        if old.get(section) != new.get(section):
+            changes[section] = new.get(section)
+    for section in _KEYED_LISTS:
+        patch = _diff_keyed(old.get(section, []), new.get(section, []))
+        if patch is not None:
+            changes[section] = patch
+    return changes
+
+
+def get_dashboard_delta(since: str | None) -> dict:
+    """
+    Patch from the client's version to the current one:
+    {"version", "since", "full": False, "changes": {...}}, or
+    {"version", "full": True, "data": {...}} when `since` is unknown.
+    """
+    version, data = get_versioned_dashboard()
+    if since == version:
+        return {"version": version, "since": since, "full": False, "changes": {}}
+    with _lock:
+        base = _history.get(since) if since else None
+    if base is None:
+        return {"version": version, "full": True, "data": data}
+    return {"version": version, "since": since, "full": False, "changes": diff_dashboards(base, data)}
@@ -0,0 +1,150 @@
+"""
+Group (league) service — create groups, manage memberships, allocate
+athlete ids.
+
+A group is groups/{group_id} with athletes, blocks, scores and rollups
+subcollections (see tenancy.py). Memberships are keyed by the global
+player id, and the athlete document lists the athlete's groups, so sync
+updates every group's rollups from one ingest without looking at any
+other group. A membership holds only the membership itself; names, photos
+and connection status are always read from the root athlete document,
+which is the one OAuth and webhooks keep up to date. Nothing here lists
+or counts a whole collection.
+"""
+from datetime import datetime, timezone
+from google.cloud import firestore
+from google.cloud.firestore_v1.transforms import ArrayRemove, ArrayUnion
+from firebase_client import get_client, get_db
+from services.block_service import seed_blocks
+from services.rollup_service import rebuild_rollups
+from tenancy import GROUPS, competitors, group_collection
+
+COUNTERS = "counters"
+PROFILE_FIELDS = ("display_name", "strava_athlete_id", "status", "profile_photo")
+
+
+@firestore.transactional
+def _next_player_number(transaction, counter_ref, athletes) -> int:
+    snap = counter_ref.get(transaction=transaction)
+    number = (snap.to_dict().get("last", 0) if snap.exists else 0) + 1
+    # Step over slots created before the counter existed (seeded player_1, ...)
+    while athletes.document(f"player_{number}").get(transaction=transaction).exists:
+        number += 1
+    transaction.set(counter_ref, {"last": number})
+    return number
+
+
+def allocate_player_id() -> str:
+    """Next free player_N, from a counter document updated in a transaction."""
+    transaction = get_db().transaction()  # commits a unit of work's pending writes first
+    client = get_client()
+    number = _next_player_number(
+        transaction, client.collection(COUNTERS).document("athletes"), client.collection("athletes"),
+    )
+    return f"player_{number}"
+
+
+def create_group(name: str) -> dict:
+    """Create a group with an auto-generated id and seed its blocks."""
+    db = get_db()
+    ref = db.collection(GROUPS).document()
+    group = {
+        "group_id": ref.id,
+        "name": name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    ref.set(group)
+    seed_blocks(ref.id)
+    return group
+
+
+def get_group(group_id: str) -> dict:
+    """The group document; raises ValueError if it does not exist."""
+    doc = get_db().collection(GROUPS).document(group_id).get()
+    if not doc.exists:
+        raise ValueError(f"Group {group_id} not found")
+    return doc.to_dict()
+
+
+def _profiles(db, player_ids: list[str]) -> dict[str, dict]:
+    """Root athlete documents of the given players, from one get_all."""
+    if not player_ids:
+        return {}
+    refs = [db.collection("athletes").document(pid) for pid in player_ids]
+    return {snap.id: snap.to_dict() for snap in db.get_all(refs) if snap.exists}
+
+
+def group_athletes(db, group_id: str | None = None) -> list[dict]:
+    """
+    Athletes competing in a group as {"id": ..., **athlete document}, or
+    in the root competition for group_id None.
+    """
+    if group_id is None:
+        return [{"id": doc.id, **doc.to_dict()} for doc in competitors(db).stream()]
+    player_ids = [doc.id for doc in competitors(db, group_id).select([]).stream()]
+    profiles = _profiles(db, player_ids)
+    return [{"id": pid, **profiles[pid]} for pid in player_ids if pid in profiles]
+
+
+def list_members(group_id: str) -> list[dict]:
+    """Members with their current profile fields and membership details."""
+    get_group(group_id)
+    db = get_db()
+    members = {doc.id: doc.to_dict() for doc in group_collection(db, "athletes", group_id).stream()}
+    profiles = _profiles(db, list(members))
+    return [
+        {"id": pid, **{f: profiles[pid].get(f) for f in PROFILE_FIELDS}, "joined_at": member.get("joined_at")}
+        for pid, member in members.items()
+        if pid in profiles
+    ]
+
+
+def add_member(group_id: str, player_id: str) -> dict:
+    """
+    Add a registered athlete to a group. Their stored activities count in
+    the group from now on, so the group's rollups are rebuilt.
+    """
+    get_group(group_id)
+    db = get_db()
+    athlete_ref = db.collection("athletes").document(player_id)
+    athlete = athlete_ref.get()
+    if not athlete.exists:
+        raise ValueError(f"Player {player_id} not found")
+
+    member = {"joined_at": datetime.now(timezone.utc).isoformat()}
+    group_collection(db, "athletes", group_id).document(player_id).set(member)
+    athlete_ref.update({"groups": ArrayUnion([group_id])})
+    rebuild_rollups(group_id)
+    data = athlete.to_dict()
+    return {"id": player_id, **{f: data.get(f) for f in PROFILE_FIELDS}, **member}
+
+
+def remove_member(group_id: str, player_id: str) -> None:
+    """Remove an athlete from a group and drop their activities from its rollups."""
+    get_group(group_id)
+    db = get_db()
+    member_ref = group_collection(db, "athletes", group_id).document(player_id)
+    if not member_ref.get().exists:
+        raise ValueError(f"Player {player_id} is not in group {group_id}")
+    member_ref.delete()
+    db.collection("athletes").document(player_id).update({"groups": ArrayRemove([group_id])})
+    rebuild_rollups(group_id)
+
+
+def due_group_blocks(now: datetime | None = None) -> list[tuple[str, str]]:
+    """
+    (group_id, block_id) for every group block whose window has closed and
+    that is not locked yet, from one indexed collection-group query.
+    """
+    now = now or datetime.now(timezone.utc)
+    query = (
+        get_db().collection_group("blocks")
+        .where("locked", "==", False)
+        .where("window_close_utc", "<", now.isoformat())
+    )
+    due = []
+    for doc in query.stream():
+        group_ref = doc.reference.parent.parent
+        if group_ref is not None:  # root blocks belong to the default competition
+            due.append((group_ref.id, doc.id))
+    return sorted(due)
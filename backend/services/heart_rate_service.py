@@ -0,0 +1,45 @@
+"""
+Heart-rate calorie estimates for activities Strava has no energy data for.
+
+Fetches only the heartrate and time streams, and only for activities that
+need an estimate and report a heart rate. The series are reduced to a few
+numbers in calorie_service and the raw streams dropped; the reduced result
+is cached in hr_estimates/{activity_id} so an activity's streams are never
+fetched twice.
+"""
+from datetime import datetime, timezone
+from config import HR_CALORIES_ENABLED, HR_DEFAULT_AGE
+from firebase_client import get_db
+from services.calorie_service import estimate_from_heart_rate
+from services.strava_service import get_activity_streams
+
+HR_ESTIMATES = "hr_estimates"
+# Bump when the model changes so cached results are recomputed
+HR_MODEL_VERSION = 1
+
+
+def wants_heart_rate_estimate(activity: dict) -> bool:
+    """Whether sync should try the heart-rate estimator for a summary activity."""
+    return HR_CALORIES_ENABLED and bool(activity.get("has_heartrate"))
+
+
+async def heart_rate_calories(access_token: str, activity_id: str,
+                              weight_kg: float | None = None, sex: str | None = None) -> float | None:
+    """Calories from the activity's heart-rate stream (cached), or None if unusable."""
+    db = get_db()
+    cache_ref = db.collection(HR_ESTIMATES).document(str(activity_id))
+    cached = cache_ref.get()
+    if cached.exists and cached.to_dict().get("model") == HR_MODEL_VERSION:
+        return cached.to_dict().get("calories")
+
+    streams = await get_activity_streams(access_token, activity_id)
+    estimate = estimate_from_heart_rate(
+        streams.get("heartrate", []), streams.get("time", []),
+        weight_kg=weight_kg, age=HR_DEFAULT_AGE, sex=sex,
+    )
+    cache_ref.set({
+        **(estimate or {"calories": None}),
+        "model": HR_MODEL_VERSION,
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    })
+    return estimate["calories"] if estimate else None
@@ -0,0 +1,91 @@
+"""
+Maintenance service — bulk deletes for admin reset and test-data seeding.
+
+Documents are listed by key only (no field data), a page of 500 at a time,
+and each page is deleted in one WriteBatch. Batches are committed from a
+small thread pool so several are in flight at once. Collections whose
+documents have subcollections (groups) go through the client's
+recursive_delete instead.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+
+MAX_BATCH_DELETES = 500
+DELETE_WORKERS = 8
+
+ProgressCallback = Callable[[str, int], None]
+
+
+def _commit_deletes(db, refs) -> int:
+    batch = db.batch()
+    for ref in refs:
+        batch.delete(ref)
+    batch.commit()
+    return len(refs)
+
+
+def delete_collection(
+    db,
+    collection_name: str,
+    chunk_size: int = MAX_BATCH_DELETES,
+    workers: int = DELETE_WORKERS,
+    on_progress: ProgressCallback | None = None,
+) -> int:
+    """
+    Delete every document in a collection with batched, parallel commits.
+    Calls on_progress(collection_name, deleted_so_far) after each batch.
+    Returns the number of documents deleted.
+    """
+    chunk_size = min(chunk_size, MAX_BATCH_DELETES)
+    query = db.collection(collection_name).select([]).order_by("__name__").limit(chunk_size)
+    deleted = 0
+    in_flight = set()
+
+    def collect(done):
+        nonlocal deleted
+        for future in done:
+            deleted += future.result()
+            if on_progress:
+                on_progress(collection_name, deleted)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        last = None
+        while True:
+            page = query.start_after(last) if last is not None else query
+            refs = [snap.reference for snap in page.stream()]
+            if not refs:
+                break
+            last = {"__name__": refs[-1]}
+            in_flight.add(pool.submit(_commit_deletes, db, refs))
+            if len(in_flight) >= workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            if len(refs) < chunk_size:
+                break
+        collect(wait(in_flight).done)
+
+    return deleted
+
+
+def delete_collections(
+    db,
+    collection_names: list[str],
+    on_progress: ProgressCallback | None = None,
+) -> dict[str, int]:
+    """Delete several collections; returns documents deleted per collection."""
+    return {
+        name: delete_collection(db, name, on_progress=on_progress)
+        for name in collection_names
+    }
+
+
+def delete_recursively(db, collection_name: str, on_progress: ProgressCallback | None = None) -> int:
+    """Delete a collection and every subcollection beneath it; returns documents deleted."""
+    deleted = db.recursive_delete(db.collection(collection_name))
+    if on_progress:
+        on_progress(collection_name, deleted)
+    return deleted
+
+
+def print_progress(collection_name: str, deleted: int) -> None:
+    print(f"  {collection_name}: {deleted} deleted", flush=True)
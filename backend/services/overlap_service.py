@@ -0,0 +1,174 @@
+"""
+Duplicate-activity detection — the same ride recorded on a watch and a
+phone arrives as two Strava activities with different ids.
+
+Each athlete gets an interval index per sport of (start, start + elapsed)
+over their stored activities, kept in hour-wide time buckets: an interval
+sits in every bucket it touches, so a lookup only scans the buckets its
+own span touches, however long other activities are. Sync loads the
+stored activities a page of new ones could overlap, with one query on the
+page's time range (none for a page with nothing new). If a new activity
+overlaps an indexed one by at least OVERLAP_THRESHOLD of the shorter
+activity it is a duplicate:
+
+- flag:     stored with duplicate_status "pending" and left out of scoring
+            until reviewed (keep → counted, discard → stays out)
+- suppress: stored as "suppressed" and never counted
+- off:      no detection
+"""
+import math
+from datetime import datetime, timedelta
+from config import DUPLICATE_ACTIVITIES
+from firebase_client import get_db
+from models import Activity
+from services.rollup_service import record_activity
+
+OVERLAP_THRESHOLD = 0.5
+BUCKET_SECONDS = 3600
+# How far before a page's first activity stored ones are loaded: longer
+# recordings are only matched against activities in the same page
+LOOKBACK = timedelta(days=1)
+INDEX_FIELDS = ["activity_id", "player_id", "sport_category", "start_date_utc",
+                "elapsed_time_seconds", "moving_time_seconds", "duplicate_status"]
+
+
+def _epoch(start_date_utc: str) -> float:
+    return datetime.fromisoformat(start_date_utc.replace("Z", "+00:00")).timestamp()
+
+
+class IntervalIndex:
+    """Possibly overlapping [start, end) intervals tagged with an id, in fixed-width time buckets."""
+
+    def __init__(self, bucket_seconds: float = BUCKET_SECONDS):
+        self._bucket_seconds = bucket_seconds
+        self._buckets: dict[int, list[tuple[float, float, str]]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _buckets_of(self, start: float, end: float) -> range:
+        first = math.floor(start / self._bucket_seconds)
+        return range(first, max(math.ceil(end / self._bucket_seconds), first + 1))
+
+    def add(self, start: float, end: float, key: str) -> None:
+        for bucket in self._buckets_of(start, end):
+            self._buckets.setdefault(bucket, []).append((start, end, key))
+        self._count += 1
+
+    def overlapping(self, start: float, end: float) -> list[tuple[str, float, float]]:
+        """(id, overlap seconds, interval length) for every interval intersecting [start, end)."""
+        found = set()
+        for bucket in self._buckets_of(start, end):
+            for s, e, key in self._buckets.get(bucket, ()):
+                if min(e, end) - max(s, start) > 0:
+                    found.add((s, e, key))
+        return [(key, min(e, end) - max(s, start), e - s) for s, e, key in sorted(found)]
+
+
+class DuplicateDetector:
+    """Per-sport interval indexes over one athlete's counted activities."""
+
+    def __init__(self, mode: str | None = None, db=None, player_id: str | None = None):
+        self.mode = mode or DUPLICATE_ACTIVITIES
+        self._indexes: dict[str, IntervalIndex] = {}
+        self._indexed: set[str] = set()
+        self._db = db
+        self._player_id = player_id
+
+    @classmethod
+    def for_player(cls, db, player_id: str, mode: str | None = None) -> "DuplicateDetector":
+        """A detector for the athlete's stored activities, loaded window by window with load()."""
+        return cls(mode, db, player_id)
+
+    def load(self, start: datetime, end: datetime) -> None:
+        """
+        Index the athlete's stored activities that can overlap new ones
+        spanning [start, end), with one query on start_date_utc.
+        """
+        if self.mode == "off" or self._db is None:
+            return
+        query = (
+            self._db.collection("activities")
+            .where("player_id", "==", self._player_id)
+            .where("start_date_utc", ">=", (start - LOOKBACK).isoformat())
+            .where("start_date_utc", "<", end.isoformat())
+            .select(INDEX_FIELDS)
+        )
+        for doc in query.stream():
+            data = doc.to_dict()
+            if data.get("start_date_utc") and data.get("sport_category"):
+                self.add(Activity.from_firestore(data))
+
+    @staticmethod
+    def _interval(activity: Activity) -> tuple[float, float]:
+        start = _epoch(activity.start_date_utc)
+        duration = activity.elapsed_time_seconds or activity.moving_time_seconds
+        return start, start + max(duration, 1)
+
+    def add(self, activity: Activity) -> None:
+        if activity.counts and activity.activity_id not in self._indexed:
+            self._indexed.add(activity.activity_id)
+            start, end = self._interval(activity)
+            self._indexes.setdefault(activity.sport_category, IntervalIndex()).add(
+                start, end, activity.activity_id,
+            )
+
+    def find_duplicate(self, activity: Activity) -> str | None:
+        """Id of a counted activity this one substantially overlaps, if any."""
+        index = self._indexes.get(activity.sport_category)
+        if self.mode == "off" or index is None:
+            return None
+        start, end = self._interval(activity)
+        best = None
+        for key, overlap, length in index.overlapping(start, end):
+            if key == activity.activity_id:
+                continue
+            if overlap >= OVERLAP_THRESHOLD * min(end - start, length):
+                if best is None or overlap > best[1]:
+                    best = (key, overlap)
+        return best[0] if best else None
+
+    def check(self, activity: Activity) -> Activity:
+        """Tag the activity if it duplicates one already indexed, then index it."""
+        duplicate_of = self.find_duplicate(activity)
+        if duplicate_of is not None:
+            activity.duplicate_of = duplicate_of
+            activity.duplicate_status = "suppressed" if self.mode == "suppress" else "pending"
+        self.add(activity)
+        return activity
+
+
+def list_duplicates(player_id: str | None = None, status: str = "pending") -> list[dict]:
+    """Flagged activities with the activity each one overlaps."""
+    db = get_db()
+    query = db.collection("activities").where("duplicate_status", "==", status)
+    if player_id:
+        query = query.where("player_id", "==", player_id)
+    flagged = [doc.to_dict() for doc in query.stream()]
+    originals = db.get_all([db.collection("activities").document(a["duplicate_of"]) for a in flagged])
+    by_id = {snap.id: snap.to_dict() for snap in originals if snap.exists}
+    return [{"activity": a, "duplicate_of": by_id.get(a["duplicate_of"])} for a in flagged]
+
+
+def resolve_duplicate(activity_id: str, action: str) -> dict:
+    """
+    Review a flagged activity: "keep" counts it (adding it to its block's
+    rollup), "discard" leaves it out for good. Raises ValueError otherwise.
+    """
+    if action not in ("keep", "discard"):
+        raise ValueError(f"Unknown action: {action}")
+    db = get_db()
+    doc = db.collection("activities").document(activity_id).get()
+    if not doc.exists:
+        raise ValueError(f"Activity {activity_id} not found")
+    activity = Activity.from_firestore(doc.to_dict())
+    if activity.duplicate_status not in ("pending", "suppressed"):
+        raise ValueError(f"Activity {activity_id} is not awaiting review")
+    block = db.collection("blocks").document(activity.block_id).get()
+    if block.exists and block.to_dict().get("locked", False):
+        raise ValueError(f"Block {activity.block_id} is already locked")
+
+    activity.duplicate_status = "kept" if action == "keep" else "discarded"
+    record_activity(db, activity)
+    return activity.to_firestore()
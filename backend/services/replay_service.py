@@ -0,0 +1,136 @@
+"""
+Replay service — rescore the whole competition from raw activities.
+
+Loads every activity once, scores each block with the same pure
+aggregate_activities/score_block used for locking (ignoring locks and
+rollups), and diffs the results against the stored `scores` documents of
+the root competition or of a group, each counting only its own athletes'
+activities. Nothing is written. Blocks are scored in parallel
+across a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from config import BLOCK_DEFINITIONS
+from firebase_client import get_db
+from models import Activity
+from services.scoring_service import aggregate_activities, score_block
+from tenancy import GROUPS, competitors, group_collection
+
+# Fields that decide the result; timestamps and lock state are ignored
+COMPARED_FIELDS = (
+    "total_points",
+    "points_by_sport",
+    "bonus_points",
+    "calories_by_sport",
+    "clean_sweep_eligible",
+    "clean_sweep_achieved",
+    "clean_sweep_winner",
+)
+ACTIVITY_FIELDS = [
+    "player_id", "sport_category", "block_id", "calories",
+    "calorie_source", "distance_meters", "moving_time_seconds", "duplicate_status",
+]
+TOLERANCE = 1e-6
+
+
+def load_activities(db) -> dict[str, list[Activity]]:
+    """Every block's activities, from one pass over the collection."""
+    by_block: dict[str, list[Activity]] = {b["block_id"]: [] for b in BLOCK_DEFINITIONS}
+    for adoc in db.collection("activities").select(ACTIVITY_FIELDS).stream():
+        activity = Activity.from_firestore(adoc.to_dict())
+        if activity.block_id in by_block:
+            by_block[activity.block_id].append(activity)
+    return by_block
+
+
+def load_competition(
+    db, group_id: str | None = None, by_block: dict[str, list[Activity]] | None = None,
+) -> tuple[list[str], dict[str, list[Activity]]]:
+    """
+    Player ids and every block's activities of the competition's athletes,
+    from one pass over each collection. Pass by_block from load_activities()
+    to share that pass between groups.
+    """
+    player_ids = [pdoc.id for pdoc in competitors(db, group_id).select([]).stream()]
+    if by_block is None:
+        by_block = load_activities(db)
+    members = set(player_ids)
+    by_block = {
+        block_id: [a for a in activities if a.player_id in members]
+        for block_id, activities in by_block.items()
+    }
+    return player_ids, by_block
+
+
+def replay_block(job: tuple) -> dict:
+    """Score one block from its activities. Top-level so the pool can pickle it."""
+    block_id, sports, player_ids, activities = job
+    return score_block(block_id, sports, player_ids, aggregate_activities(activities))
+
+
+def replay_competition(player_ids: list[str], by_block: dict[str, list[Activity]],
+                       workers: int | None = None) -> dict[str, dict]:
+    """
+    Score every block. workers=0 runs in-process; otherwise blocks are
+    spread over a process pool (None = one worker per CPU).
+    """
+    jobs = [
+        (b["block_id"], b["sports"], player_ids, by_block.get(b["block_id"], []))
+        for b in BLOCK_DEFINITIONS
+    ]
+    if workers == 0:
+        results = map(replay_block, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(replay_block, jobs))
+    return {job[0]: result for job, result in zip(jobs, results)}
+
+
+def _differences(path: str, stored, replayed) -> list[dict]:
+    if isinstance(stored, dict) and isinstance(replayed, dict):
+        diffs = []
+        for key in sorted(set(stored) | set(replayed)):
+            diffs.extend(_differences(f"{path}.{key}", stored.get(key), replayed.get(key)))
+        return diffs
+    numbers = (int, float)
+    if isinstance(stored, numbers) and isinstance(replayed, numbers) \
+            and not isinstance(stored, bool) and not isinstance(replayed, bool):
+        same = abs(stored - replayed) <= TOLERANCE
+    else:
+        same = stored == replayed
+    return [] if same else [{"field": path, "stored": stored, "replayed": replayed}]
+
+
+def diff_scores(stored: dict[str, dict], replayed: dict[str, dict]) -> dict[str, dict]:
+    """
+    Per-block audit: "match", "differs" (with the differing fields) or
+    "unscored" when the block has no stored score yet.
+    """
+    report = {}
+    for block_id, result in replayed.items():
+        score = stored.get(block_id)
+        if score is None:
+            report[block_id] = {"status": "unscored", "differences": []}
+            continue
+        diffs = [
+            d for field in COMPARED_FIELDS
+            for d in _differences(field, score.get(field), result.get(field))
+        ]
+        report[block_id] = {"status": "differs" if diffs else "match", "differences": diffs}
+    return report
+
+
+def audit_scores(workers: int | None = None, group_id: str | None = None,
+                 by_block: dict[str, list[Activity]] | None = None) -> dict[str, dict]:
+    """Replay the competition (or a group's) and diff it against the stored scores."""
+    db = get_db()
+    player_ids, by_block = load_competition(db, group_id, by_block)
+    stored = {sdoc.id: sdoc.to_dict() for sdoc in group_collection(db, "scores", group_id).stream()}
+    return diff_scores(stored, replay_competition(player_ids, by_block, workers))
+
+
+def audit_all_scores(workers: int | None = None) -> dict[str | None, dict[str, dict]]:
+    """audit_scores() for the root competition (key None) and every group, loading the activities once."""
+    db = get_db()
+    by_block = load_activities(db)
+    group_ids = [None] + [gdoc.id for gdoc in db.collection(GROUPS).select([]).stream()]
+    return {group_id: audit_scores(workers, group_id, by_block) for group_id in group_ids}
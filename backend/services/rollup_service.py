@@ -0,0 +1,277 @@
+"""
+Block rollups — per-block running totals maintained at ingest time.
+
+rollups/{block_id} holds one entry per player and sport:
+
+    {"block_id": "block_2", "version": 1,
+     "players": {"player_1": {"Running": {"calories": 812.4, "distance": 10400,
+                                          "time": 3720, "count": 2, "estimated": 0}}}}
+
+Every activity write or delete applies Increment transforms to its entry,
+so scoring reads one document instead of streaming the block's activities.
+`estimated` counts MET-estimated activities (a flag could not be undone on
+delete). rebuild_rollup() recomputes a rollup from the activities for
+verification or repair, and stamps it with ROLLUP_VERSION; a rollup without
+it was started by increments alone (say, the first sync after an upgrade,
+over activities stored before rollups existed) and is rebuilt when read.
+
+Increments are not idempotent, so sync stores new activities with
+create_activities(): each activity is created (not set) in the same atomic
+batch as its increments, and one that already exists — stored meanwhile by
+an overlapping sync of the same athlete — fails the batch and is left out,
+so it is never counted twice.
+
+Each competition an athlete plays in has its own rollup, updated from the
+same write: rollups/{block_id} for the root competition (`root: True` on
+their athlete document) and groups/{group_id}/rollups/{block_id} for each
+group in their `groups` list. An athlete who only plays in groups adds no
+write to the root rollups.
+"""
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1.transforms import Increment
+from config import BLOCK_DEFINITIONS
+from firebase_client import get_db
+from models import Activity, SportTotals
+from tenancy import competitors, group_collection
+from unit_of_work import current_unit_of_work
+
+ROLLUPS = "rollups"
+ROLLUP_VERSION = 1  # bump to have every rollup rebuilt on its next read
+TOLERANCE = 1e-6
+MAX_IN_VALUES = 30  # Firestore's limit on `in` filter values
+MAX_BATCH_WRITES = 500
+
+_change_hooks: list = []
+
+
+def on_change(hook) -> None:
+    """Register hook(block_id), called once a change to that block's root rollup is committed."""
+    _change_hooks.append(hook)
+
+
+def _changed(block_id: str) -> None:
+    def run():
+        for hook in _change_hooks:
+            hook(block_id)
+
+    uow = current_unit_of_work()
+    if uow is not None:
+        uow.on_commit(run)
+    else:
+        run()
+
+
+def _entry_delta(activity: Activity, sign: int) -> dict:
+    return {
+        "calories": Increment(sign * activity.calories),
+        "distance": Increment(sign * activity.distance_meters),
+        "time": Increment(sign * activity.moving_time_seconds),
+        "count": Increment(sign),
+        "estimated": Increment(sign * int(activity.is_estimated)),
+    }
+
+
+def rollup_ref(db, block_id: str, group_id: str | None = None):
+    return group_collection(db, ROLLUPS, group_id).document(block_id)
+
+
+def competitions(athlete: dict) -> list[str | None]:
+    """Competitions an athlete document plays in; None is the root competition."""
+    root = [None] if athlete.get("root", True) else []
+    return root + list(athlete.get("groups") or [])
+
+
+def player_competitions(db, player_id: str) -> list[str | None]:
+    """Competitions the athlete plays in, from their athlete document."""
+    doc = db.collection("athletes").document(player_id).get()
+    return competitions(doc.to_dict()) if doc.exists else []
+
+
+def _rollup_delta(activity: Activity, sign: int) -> dict:
+    return {
+        "block_id": activity.block_id,
+        "players": {activity.player_id: {activity.sport_category: _entry_delta(activity, sign)}},
+    }
+
+
+def _apply(db, activity: Activity, sign: int, playing: list[str | None]) -> None:
+    for group_id in playing:
+        rollup_ref(db, activity.block_id, group_id).set(_rollup_delta(activity, sign), merge=True)
+    if None in playing:
+        _changed(activity.block_id)
+
+
+def _commit_created(db, activities: list[Activity], playing: list[str | None]) -> None:
+    """Create the activities and apply their increments in one batch; raises AlreadyExists."""
+    batch = db.batch()
+    for activity in activities:
+        batch.create(db.collection("activities").document(activity.activity_id), activity.to_firestore())
+        if activity.counts:
+            for group_id in playing:
+                batch.set(rollup_ref(db, activity.block_id, group_id), _rollup_delta(activity, 1), merge=True)
+    batch.commit()
+    if None in playing:
+        for block_id in sorted({a.block_id for a in activities if a.counts}):
+            _changed(block_id)
+
+
+def create_activities(
+    db, activities: list[Activity], playing: list[str | None] | None = None,
+) -> list[Activity]:
+    """
+    Store new activities of one athlete and add the counting ones to the
+    rollups of the competitions they play in (looked up unless given), committing each activity together with its increments. An
+    activity that is already stored fails its batch; the batch is then
+    retried one activity at a time and the stored ones are left out.
+    Returns the activities this call created.
+    """
+    if not activities:
+        return []
+    if playing is None:
+        playing = player_competitions(db, activities[0].player_id)
+    per_batch = MAX_BATCH_WRITES // (1 + len(playing))
+
+    created = []
+    for start in range(0, len(activities), per_batch):
+        chunk = activities[start:start + per_batch]
+        try:
+            _commit_created(db, chunk, playing)
+            created.extend(chunk)
+        except AlreadyExists:
+            if len(chunk) > 1:
+                created.extend(_create_each(db, chunk, playing))
+    return created
+
+
+def _create_each(db, activities: list[Activity], playing: list[str | None]) -> list[Activity]:
+    created = []
+    for activity in activities:
+        try:
+            _commit_created(db, [activity], playing)
+            created.append(activity)
+        except AlreadyExists:
+            pass
+    return created
+
+
+def record_activity(db, activity: Activity, playing: list[str | None] | None = None) -> None:
+    """
+    Store (overwrite) an activity and, if it counts toward scores, add it to
+    its block's rollups in the athlete's competitions (looked up unless
+    given). For an activity that was not counted before, such as a
+    reviewed duplicate; sync uses create_activities().
+    """
+    db.collection("activities").document(activity.activity_id).set(activity.to_firestore())
+    if activity.counts:
+        _apply(db, activity, 1, player_competitions(db, activity.player_id) if playing is None else playing)
+
+
+def remove_activity(db, activity: Activity, playing: list[str | None] | None = None) -> None:
+    """Delete a stored activity and, if it counted, subtract it from the rollups it is in."""
+    db.collection("activities").document(activity.activity_id).delete()
+    if activity.counts:
+        _apply(db, activity, -1, player_competitions(db, activity.player_id) if playing is None else playing)
+
+
+def totals_from_rollup(data: dict) -> dict[str, dict[str, SportTotals]]:
+    """Rollup document → {player_id: {sport_category: SportTotals}}."""
+    totals = {}
+    for pid, sports in (data.get("players") or {}).items():
+        for sport, entry in sports.items():
+            if (entry.get("count") or 0) <= 0:
+                continue
+            totals.setdefault(pid, {})[sport] = SportTotals(
+                calories=entry.get("calories", 0) or 0,
+                distance=entry.get("distance", 0) or 0,
+                time=entry.get("time", 0) or 0,
+                count=entry["count"],
+                is_estimated=(entry.get("estimated") or 0) > 0,
+            )
+    return totals
+
+
+def rollup_document(block_id: str, activities) -> dict:
+    """Rollup document for a block, computed from its activities."""
+    players: dict[str, dict[str, dict]] = {}
+    for a in activities:
+        if not a.counts:
+            continue
+        entry = players.setdefault(a.player_id, {}).setdefault(
+            a.sport_category,
+            {"calories": 0.0, "distance": 0.0, "time": 0, "count": 0, "estimated": 0},
+        )
+        entry["calories"] += a.calories
+        entry["distance"] += a.distance_meters
+        entry["time"] += a.moving_time_seconds
+        entry["count"] += 1
+        entry["estimated"] += int(a.is_estimated)
+    return {"block_id": block_id, "version": ROLLUP_VERSION, "players": players}
+
+
+def is_built(data: dict | None) -> bool:
+    """Whether a stored rollup was built from all of its block's activities."""
+    return bool(data) and data.get("version") == ROLLUP_VERSION
+
+
+def block_activities(db, block_id: str, group_id: str | None = None):
+    """The block's stored activities of the competition's athletes, as records."""
+    query = db.collection("activities").where("block_id", "==", block_id)
+    members = [doc.id for doc in competitors(db, group_id).select([]).stream()]
+    queries = [
+        query.where("player_id", "in", members[i:i + MAX_IN_VALUES])
+        for i in range(0, len(members), MAX_IN_VALUES)
+    ]
+    for q in queries:
+        for adoc in q.stream():
+            yield Activity.from_firestore(adoc.to_dict())
+
+
+def rebuild_rollup(block_id: str, group_id: str | None = None) -> dict[str, dict[str, SportTotals]]:
+    """Recompute a block's rollup from its activities, store it and return the totals."""
+    db = get_db()
+    doc = rollup_document(block_id, block_activities(db, block_id, group_id))
+    rollup_ref(db, block_id, group_id).set(doc)
+    if group_id is None:
+        _changed(block_id)
+    return totals_from_rollup(doc)
+
+
+def rebuild_rollups(group_id: str | None = None) -> dict[str, int]:
+    """Rebuild every block's rollup; returns {block_id: activity count}."""
+    rebuilt = {}
+    for block in BLOCK_DEFINITIONS:
+        totals = rebuild_rollup(block["block_id"], group_id)
+        rebuilt[block["block_id"]] = sum(t.count for sports in totals.values() for t in sports.values())
+    return rebuilt
+
+
+def get_block_totals(block_id: str, group_id: str | None = None) -> dict[str, dict[str, SportTotals]]:
+    """Per player and sport totals for a block, from its rollup (built on first use)."""
+    doc = rollup_ref(get_db(), block_id, group_id).get()
+    data = doc.to_dict() if doc.exists else None
+    if not is_built(data):
+        return rebuild_rollup(block_id, group_id)
+    return totals_from_rollup(data)
+
+
+def verify_rollup(block_id: str, group_id: str | None = None) -> list[dict]:
+    """
+    Compare a block's stored rollup with one recomputed from its activities.
+    Returns the mismatching entries (empty when they agree); writes nothing.
+    """
+    db = get_db()
+    doc = rollup_ref(db, block_id, group_id).get()
+    stored = totals_from_rollup(doc.to_dict() if doc.exists else {})
+    expected = totals_from_rollup(rollup_document(block_id, block_activities(db, block_id, group_id)))
+
+    mismatches = []
+    for pid in sorted(set(stored) | set(expected)):
+        for sport in sorted(set(stored.get(pid, {})) | set(expected.get(pid, {}))):
+            have = stored.get(pid, {}).get(sport, SportTotals()).to_dict()
+            want = expected.get(pid, {}).get(sport, SportTotals()).to_dict()
+            if any(abs(have[k] - want[k]) > TOLERANCE for k in have):
+                mismatches.append({
+                    "block_id": block_id, "player_id": pid, "sport": sport,
+                    "stored": have, "expected": want,
+                })
+    return mismatches
@@ -7,11 +7,19 @@ Scoring rules:
 - Clean sweep: if BOTH players logged ALL sports for the block AND one player won
   ALL sports → winner gets +1 bonus.
 - Block 1 special: Swimming only. Winner gets 2 + 1 bonus = 3 max.
+
+Every entry point takes an optional group_id to score a group's blocks
+from its own athletes, rollups and scores (None = the root competition).
 """
 from datetime import datetime, timezone
-from collections import defaultdict
+from typing import Iterable
 from config import BLOCK_DEFINITIONS
 from firebase_client import get_db
+from metrics import COMPUTATIONS, timed
+from models import Activity, SportTotals
+from services.group_service import group_athletes
+from services.rollup_service import get_block_totals
+from tenancy import competitors, group_collection
 
 
 def _get_block_def(block_id: str) -> dict | None:
@@ -19,60 +27,39 @@ def _get_block_def(block_id: str) -> dict | None:
         return next((b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None)
 
 
-def calculate_block_scores(block_id: str) -> dict:
+def aggregate_activities(
+    activities: Iterable[Activity],
+) -> dict[str, dict[str, SportTotals]]:
+    """Sum counted activities into {player_id: {sport_category: SportTotals}}."""
+    totals: dict[str, dict[str, SportTotals]] = {}
+    for a in activities:
+        if not a.counts:
+            continue
+        by_sport = totals.get(a.player_id)
+        if by_sport is None:
+            by_sport = totals[a.player_id] = {}
+        sport_totals = by_sport.get(a.sport_category)
+        if sport_totals is None:
+            sport_totals = by_sport[a.sport_category] = SportTotals()
+        sport_totals.add(a)
+    return totals
+
+
+def score_block(
+    block_id: str,
+    block_sports: list[str],
+    player_ids: list[str],
+    totals: dict[str, dict[str, SportTotals]],
+) -> dict:
     """
-    Calculate and write scores for a given block.
-    Returns the score document. Raises if block is already locked.
+    Apply the scoring rules to aggregated totals. Pure — no Firestore access;
+    returns the score document without timestamps or lock state.
     """
-    db = get_db()
-
-    # Check lock
-    block_doc = db.collection("blocks").document(block_id).get()
-    if block_doc.exists and block_doc.to_dict().get("locked", False):
-        raise ValueError(f"Block {block_id} is already locked — scores are immutable")
-
-    block_def = next(
-        (b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None
-    )
-    if block_def is None:
-        raise ValueError(f"Unknown block: {block_id}")
-
-    block_sports = block_def["sports"]  # e.g. ["Swimming"] or all three
     is_block_1 = block_id == "block_1"
 
-    # Get all players
-    players = []
-    for pdoc in db.collection("athletes").stream():
-        pdata = pdoc.to_dict()
-        players.append({"id": pdoc.id, **pdata})
-
-    player_ids = [p["id"] for p in players]
-
-    # Query activities for this block
-    activities_ref = db.collection("activities")
-    block_activities = list(
-        activities_ref.where("block_id", "==", block_id).stream()
-    )
-
-    # Group: {player_id: {sport_category: total_calories}}
-    calories_by_player_sport = defaultdict(lambda: defaultdict(float))
-    # Also track details for dashboard: distance, time, estimated flag
-    details_by_player_sport = defaultdict(
-        lambda: defaultdict(lambda: {"calories": 0, "distance": 0, "time": 0, "count": 0, "is_estimated": False})
-    )
-
-    for adoc in block_activities:
-        a = adoc.to_dict()
-        pid = a["player_id"]
-        sport = a["sport_category"]
-        cals = a.get("calories", 0) or 0
-        calories_by_player_sport[pid][sport] += cals
-        details_by_player_sport[pid][sport]["calories"] += cals
-        details_by_player_sport[pid][sport]["distance"] += a.get("distance_meters", 0) or 0
-        details_by_player_sport[pid][sport]["time"] += a.get("moving_time_seconds", 0) or 0
-        details_by_player_sport[pid][sport]["count"] += 1
-        if a.get("calorie_source") == "met_estimated":
-            details_by_player_sport[pid][sport]["is_estimated"] = True
+    def player_calories(pid: str, sport: str) -> float:
+        sport_totals = totals.get(pid, {}).get(sport)
+        return sport_totals.calories if sport_totals else 0.0
 
     # Score each sport
     calories_by_sport = {}  # {sport: {player_id: total}}
@@ -81,7 +68,7 @@ def calculate_block_scores(block_id: str) -> dict:
     for sport in block_sports:
         sport_calories = {}
         for pid in player_ids:
-            sport_calories[pid] = calories_by_player_sport[pid][sport]
+            sport_calories[pid] = player_calories(pid, sport)
         calories_by_sport[sport] = sport_calories
 
         # Determine who logged
@@ -117,7 +104,7 @@ def calculate_block_scores(block_id: str) -> dict:
     for pid in player_ids:
         # Player logged all sports in this block
         player_logged_all = all(
-            calories_by_player_sport[pid][sport] > 0 for sport in block_sports
+            player_calories(pid, sport) > 0 for sport in block_sports
         )
         clean_sweep_eligible[pid] = player_logged_all
 
@@ -156,9 +143,7 @@ def calculate_block_scores(block_id: str) -> dict:
         total += bonus_points.get(pid, 0)
         total_points[pid] = total
 
-    # Build score document
-    now_utc = datetime.now(timezone.utc).isoformat()
-    score_doc = {
+    return {
         "block_id": block_id,
         "calories_by_sport": calories_by_sport,
         "points_by_sport": points_by_sport,
@@ -168,33 +153,83 @@ def calculate_block_scores(block_id: str) -> dict:
         "bonus_points": bonus_points,
         "total_points": total_points,
         "details_by_player_sport": {
-            pid: dict(sports) for pid, sports in details_by_player_sport.items()
+            pid: {sport: t.to_dict() for sport, t in sports.items()}
+            for pid, sports in totals.items()
         },
-        "calculated_at": now_utc,
-        "locked": True,
     }
 
+
+@timed(COMPUTATIONS, name="block_scores")
+def calculate_block_scores(block_id: str, group_id: str | None = None) -> dict:
+    """
+    Calculate and write scores for a given block.
+    Returns the score document. Raises if block is already locked.
+    """
+    db = get_db()
+    blocks = group_collection(db, "blocks", group_id)
+
+    # Check lock
+    block_doc = blocks.document(block_id).get()
+    if block_doc.exists and block_doc.to_dict().get("locked", False):
+        raise ValueError(f"Block {block_id} is already locked — scores are immutable")
+
+    block_def = next(
+        (b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None
+    )
+    if block_def is None:
+        raise ValueError(f"Unknown block: {block_id}")
+
+    # Get all players
+    player_ids = [pdoc.id for pdoc in competitors(db, group_id).select([]).stream()]
+
+    # Per player and sport totals, from the block's rollup
+    totals = get_block_totals(block_id, group_id)
+
+    score_doc = score_block(block_id, block_def["sports"], player_ids, totals)
+
+    # Build score document
+    now_utc = datetime.now(timezone.utc).isoformat()
+    score_doc["calculated_at"] = now_utc
+    score_doc["locked"] = True
+
     # Write scores
-    db.collection("scores").document(block_id).set(score_doc)
+    group_collection(db, "scores", group_id).document(block_id).set(score_doc)
 
-    # Lock the block
-    db.collection("blocks").document(block_id).update(
+    # Lock the block (group blocks are seeded when the group is created)
+    blocks.document(block_id).update(
         {"locked": True, "calculated_at": now_utc}
     )
 
     return score_doc
 
 
-def get_all_scores() -> list[dict]:
+@timed(COMPUTATIONS, name="provisional_scores")
+def get_provisional_scores(block_id: str, group_id: str | None = None) -> dict:
+    """
+    Score a block from its current rollup without writing or locking
+    anything — the standings so far for an open block.
+    """
+    block_def = _get_block_def(block_id)
+    if block_def is None:
+        raise ValueError(f"Unknown block: {block_id}")
+    player_ids = [pdoc.id for pdoc in competitors(get_db(), group_id).select([]).stream()]
+    score_doc = score_block(block_id, block_def["sports"], player_ids, get_block_totals(block_id, group_id))
+    score_doc["locked"] = False
+    return score_doc
+
+
+@timed(COMPUTATIONS, name="all_scores")
+def get_all_scores(group_id: str | None = None) -> list[dict]:
     """Retrieve all scored blocks."""
     db = get_db()
     scores = []
-    for doc in db.collection("scores").stream():
+    for doc in group_collection(db, "scores", group_id).stream():
         scores.append(doc.to_dict())
     return scores
 
 
-def get_dashboard_data() -> dict:
+@timed(COMPUTATIONS, name="dashboard")
+def get_dashboard_data(group_id: str | None = None) -> dict:
     """
     Aggregate all data for the frontend dashboard:
     - scoreboard (totals, leader, margin)
@@ -204,16 +239,13 @@ def get_dashboard_data() -> dict:
     """
     db = get_db()
 
-    # All players
-    players = []
-    for pdoc in db.collection("athletes").stream():
-        pdata = pdoc.to_dict()
-        players.append({"id": pdoc.id, **pdata})
+    # All players (a group's profiles come from the root athlete documents)
+    players = group_athletes(db, group_id)
 
     player_ids = [p["id"] for p in players]
 
     # All scores
-    all_scores = get_all_scores()
+    all_scores = get_all_scores(group_id)
     all_scores.sort(key=lambda s: s.get("block_id", ""))
 
     # Scoreboard — total points
@@ -306,7 +338,7 @@ def get_dashboard_data() -> dict:
 
     # Get blocks info
     blocks = []
-    for bdoc in db.collection("blocks").stream():
+    for bdoc in group_collection(db, "blocks", group_id).stream():
         blocks.append(bdoc.to_dict())
     blocks.sort(key=lambda b: b.get("block_id", ""))
 
@@ -0,0 +1,81 @@
+"""
+Static dashboard snapshots — the full dashboard payload written to JSON
+files after each block lock, for Firebase Hosting / a CDN or the API's
+own cached snapshot endpoints.
+
+Each export writes an immutable `dashboard-{version}.json` and replaces
+`dashboard.json`, the latest pointer, atomically. Exports are off unless
+DASHBOARD_SNAPSHOT_DIR is set.
+"""
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import orjson
+
+from config import DASHBOARD_SNAPSHOT_DIR
+from services.dashboard_service import get_versioned_dashboard
+
+LATEST_NAME = "dashboard.json"
+SNAPSHOT_HISTORY = 20
+
+
+def snapshot_path(version: str | None = None, directory: str | None = None) -> str | None:
+    """Versioned or latest snapshot file; None when exports are disabled."""
+    directory = directory or DASHBOARD_SNAPSHOT_DIR
+    if not directory:
+        return None
+    return os.path.join(directory, f"dashboard-{version}.json" if version else LATEST_NAME)
+
+
+def _write_atomic(path: str, body: bytes) -> None:
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _prune(directory: str) -> None:
+    versioned = sorted(
+        (e for e in os.scandir(directory) if e.name.startswith("dashboard-") and e.name.endswith(".json")),
+        key=lambda e: e.stat().st_mtime,
+    )
+    for entry in versioned[:-SNAPSHOT_HISTORY]:
+        os.unlink(entry.path)
+
+
+def export_dashboard_snapshot(directory: str | None = None) -> dict | None:
+    """
+    Render the dashboard to the snapshot directory. Returns
+    {"version", "path"} or None when exports are disabled.
+    """
+    directory = directory or DASHBOARD_SNAPSHOT_DIR
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+
+    version, data = get_versioned_dashboard()
+    body = orjson.dumps({
+        **data,
+        "version": version,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    })
+    versioned = snapshot_path(version, directory)
+    if not os.path.exists(versioned):
+        _write_atomic(versioned, body)
+    _write_atomic(snapshot_path(None, directory), body)
+    _prune(directory)
+    return {"version": version, "path": versioned}
+
+
+def export_after_lock() -> None:
+    """Background-task wrapper: exports must never fail the scoring request."""
+    try:
+        export_dashboard_snapshot()
+    except Exception as e:
+        print(f"Dashboard snapshot export failed: {e}")
@@ -1,6 +1,13 @@
 """
 Strava API service — OAuth, token refresh, activity fetching.
+
+GET requests that fail with a 5xx or a network error are retried up to
+STRAVA_MAX_RETRIES times with exponential backoff and jitter. 429s are
+not retried: Strava's limits reset per 15 minutes, far beyond any backoff
+worth waiting for. OAuth POSTs are never retried (codes are single-use).
 """
+import asyncio
+import random
 import time
 import httpx
 from config import (
@@ -8,15 +15,60 @@ from config import (
     STRAVA_CLIENT_SECRET,
     STRAVA_TOKEN_URL,
     STRAVA_API_BASE,
+    STRAVA_MAX_RETRIES,
+    STRAVA_RETRY_BACKOFF_SECONDS,
 )
 from firebase_client import get_db
+from metrics import STRAVA_REQUESTS, STRAVA_RETRIES
+
+
+def _client() -> httpx.AsyncClient:
+    """HTTP client for Strava calls (benchmarks swap in an in-process transport)."""
+    return httpx.AsyncClient()
+
+
+PER_PAGE = 100
+
+
+async def _send(client: httpx.AsyncClient, method: str, endpoint: str, url: str, **kwargs) -> httpx.Response:
+    """Send one Strava request, recording its latency by endpoint and status."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        send = client.post if method == "POST" else client.get
+        resp = await send(url, **kwargs)
+        status = str(resp.status_code)
+        return resp
+    finally:
+        STRAVA_REQUESTS.labels(endpoint, status).observe(time.perf_counter() - start)
+
+
+def _backoff(attempt: int) -> float:
+    return STRAVA_RETRY_BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.0)
+
+
+async def _request(client: httpx.AsyncClient, method: str, endpoint: str, url: str, **kwargs) -> httpx.Response:
+    """Send a Strava request, retrying transient GET failures with backoff."""
+    retries = STRAVA_MAX_RETRIES if method == "GET" else 0
+    for attempt in range(retries + 1):
+        try:
+            resp = await _send(client, method, endpoint, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            STRAVA_RETRIES.labels(endpoint, "network").inc()
+        else:
+            if attempt == retries or resp.status_code < 500:
+                return resp
+            STRAVA_RETRIES.labels(endpoint, str(resp.status_code)).inc()
+        await asyncio.sleep(_backoff(attempt))
 
 
 async def exchange_code(code: str) -> dict:
     """Exchange authorization code for tokens + athlete info."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            STRAVA_TOKEN_URL,
+    async with _client() as client:
+        resp = await _request(
+            client, "POST", "oauth/token", STRAVA_TOKEN_URL,
             data={
                 "client_id": STRAVA_CLIENT_ID,
                 "client_secret": STRAVA_CLIENT_SECRET,
@@ -43,9 +95,9 @@ async def refresh_access_token(player_id: str) -> str:
         return player_data["access_token"]
 
     # Refresh
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            STRAVA_TOKEN_URL,
+    async with _client() as client:
+        resp = await _request(
+            client, "POST", "oauth/token", STRAVA_TOKEN_URL,
             data={
                 "client_id": STRAVA_CLIENT_ID,
                 "client_secret": STRAVA_CLIENT_SECRET,
@@ -70,56 +122,89 @@ async def refresh_access_token(player_id: str) -> str:
 
 async def get_athlete_profile(access_token: str) -> dict:
     """GET /athlete — returns authenticated athlete profile."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{STRAVA_API_BASE}/athlete",
+    async with _client() as client:
+        resp = await _request(
+            client, "GET", "athlete", f"{STRAVA_API_BASE}/athlete",
             headers={"Authorization": f"Bearer {access_token}"},
         )
         resp.raise_for_status()
         return resp.json()
 
 
-async def list_activities(
-    access_token: str, after_ts: int, before_ts: int
-) -> list[dict]:
+async def _activity_page(client: httpx.AsyncClient, access_token: str,
+                         after_ts: int, before_ts: int, page: int) -> list[dict]:
+    resp = await _request(
+        client, "GET", "athlete/activities", f"{STRAVA_API_BASE}/athlete/activities",
+        headers={"Authorization": f"Bearer {access_token}"},
+        params={
+            "after": after_ts,
+            "before": before_ts,
+            "page": page,
+            "per_page": PER_PAGE,
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def iter_activity_pages(access_token: str, after_ts: int, before_ts: int, start_page: int = 1):
     """
-    GET /athlete/activities with pagination.
-    Returns list of SummaryActivity objects.
+    Async generator of (page number, SummaryActivity list) from GET
+    /athlete/activities. The next page is requested as soon as a page is
+    yielded, so it downloads while the caller processes this one; at most
+    one page is ever fetched ahead, which keeps memory flat.
     """
-    all_activities = []
-    page = 1
-    per_page = 100
-
-    async with httpx.AsyncClient() as client:
-        while True:
-            resp = await client.get(
-                f"{STRAVA_API_BASE}/athlete/activities",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params={
-                    "after": after_ts,
-                    "before": before_ts,
-                    "page": page,
-                    "per_page": per_page,
-                },
-            )
-            resp.raise_for_status()
-            activities = resp.json()
-            if not activities:
-                break
-            all_activities.extend(activities)
-            if len(activities) < per_page:
-                break
-            page += 1
-
-    return all_activities
+    async with _client() as client:
+        def fetch(page: int) -> asyncio.Task:
+            return asyncio.create_task(_activity_page(client, access_token, after_ts, before_ts, page))
+
+        page, ahead = start_page, fetch(start_page)
+        try:
+            while ahead is not None:
+                activities = await ahead
+                if not activities:
+                    return
+                ahead = fetch(page + 1) if len(activities) == PER_PAGE else None
+                yield page, activities
+                page += 1
+        finally:
+            # Abandoned early: drop the prefetch (and any error it already raised)
+            if ahead is not None and not ahead.done():
+                ahead.cancel()
+            elif ahead is not None and not ahead.cancelled():
+                ahead.exception()
+
+
+async def list_activities(access_token: str, after_ts: int, before_ts: int):
+    """Async generator of SummaryActivity objects, fetched page by page."""
+    async for _, activities in iter_activity_pages(access_token, after_ts, before_ts):
+        for activity in activities:
+            yield activity
 
 
 async def get_activity_detail(access_token: str, activity_id: int) -> dict:
     """GET /activities/{id} — returns DetailedActivity with calories."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{STRAVA_API_BASE}/activities/{activity_id}",
+    async with _client() as client:
+        resp = await _request(
+            client, "GET", "activities/{id}", f"{STRAVA_API_BASE}/activities/{activity_id}",
             headers={"Authorization": f"Bearer {access_token}"},
         )
         resp.raise_for_status()
         return resp.json()
+
+
+async def get_activity_streams(access_token: str, activity_id: int, keys=("heartrate", "time")) -> dict:
+    """
+    GET /activities/{id}/streams — returns {key: [values]} for the
+    requested keys that the activity has.
+    """
+    async with _client() as client:
+        resp = await _request(
+            client, "GET", "activities/{id}/streams", f"{STRAVA_API_BASE}/activities/{activity_id}/streams",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params={"keys": ",".join(keys), "key_by_type": "true"},
+        )
+        if resp.status_code == 404:
+            return {}
+        resp.raise_for_status()
+        return {key: stream.get("data", []) for key, stream in resp.json().items()}
@@ -1,29 +1,108 @@
 """
 Activity sync service — fetches activities from Strava, filters, maps,
 assigns to blocks, and stores in Firestore.
+
+Each page of the activity list goes through a pipeline while the next
+page downloads (strava_service.iter_activity_pages prefetches one ahead):
+
+1. filter: one get_all for which activities are already stored, then the
+   block, lock and sport checks, all without calling Strava
+2. detail: detail (and heart-rate) requests for the survivors, at most
+   SYNC_DETAIL_CONCURRENCY in flight
+3. write: duplicate check and storage in listing order, committed as one
+   batch per page; each activity is created together with its rollup
+   increments, so an overlapping sync (say, a webhook create event followed
+   by an update) that stored it first makes it "skipped" rather than
+   counted twice
+
+Only one page is in flight in each stage, so a slow stage holds the
+others back instead of buffering the athlete's whole history.
+
+Strava returns activities oldest first when `after` is given, so earlier
+pages stay stable. If a Strava call still fails after strava_service's
+retries, the activities of the page before the failing one are stored,
+the page reached and the summaries on it not yet stored are saved to
+sync_checkpoints/{player_id}, and SyncInterrupted is raised; the next sync
+resumes from there instead of starting over. A completed sync deletes the
+checkpoint.
 """
-from datetime import datetime, timezone
+import asyncio
+from datetime import datetime, timedelta, timezone
+import httpx
 from config import (
     BLOCK_DEFINITIONS,
+    SYNC_DETAIL_CONCURRENCY,
     get_block_for_activity,
     get_sport_category,
 )
 from firebase_client import get_db
+from metrics import SYNC_INTERRUPTIONS, SYNC_STAGES, timed
+from models import Activity
+from services.calorie_service import DEFAULT_MET, estimate_activity
+from services.heart_rate_service import heart_rate_calories, wants_heart_rate_estimate
+from services.overlap_service import DuplicateDetector
+from services.rollup_service import competitions, create_activities
 from services.strava_service import (
     refresh_access_token,
-    list_activities,
+    iter_activity_pages,
     get_activity_detail,
 )
 
+# Flat MET values per sport (speed-banded tables live in calorie_service)
+MET_VALUES = DEFAULT_MET
+
+CHECKPOINTS = "sync_checkpoints"
+# Summary fields sync reads; pending activities are checkpointed with only these
+SUMMARY_FIELDS = (
+    "id", "name", "sport_type", "start_date", "moving_time", "elapsed_time",
+    "distance", "total_elevation_gain", "has_heartrate",
+)
+
+
+class SyncInterrupted(Exception):
+    """A Strava call failed after retries; progress so far is checkpointed."""
+
+    def __init__(self, player_id: str, synced: dict, checkpoint: dict | None, cause: httpx.HTTPError):
+        super().__init__(f"Sync for {player_id} interrupted: {cause}")
+        self.player_id = player_id
+        self.synced = synced
+        self.checkpoint = checkpoint
+        self.cause = cause
+
+    @property
+    def status_code(self) -> int | None:
+        """Strava's HTTP status, or None for a network error."""
+        response = getattr(self.cause, "response", None)
+        return response.status_code if response is not None else None
+
+    def to_dict(self) -> dict:
+        return {
+            "error": str(self.cause),
+            "strava_status": self.status_code,
+            "synced": self.synced,
+            "resume_page": self.checkpoint["page"] if self.checkpoint else None,
+            "pending": len(self.checkpoint["pending"]) if self.checkpoint else 0,
+        }
+
+
+def _load_checkpoint(db, player_id: str, after_ts: int, before_ts: int) -> dict | None:
+    doc = db.collection(CHECKPOINTS).document(player_id).get()
+    if not doc.exists:
+        return None
+    checkpoint = doc.to_dict()
+    # A checkpoint for a different window would skip the wrong pages
+    if (checkpoint.get("after"), checkpoint.get("before")) != (after_ts, before_ts):
+        return None
+    return checkpoint
+
 
 async def sync_player_activities(player_id: str) -> dict:
     """
-    Sync Strava activities for a player across all block windows.
-    Returns summary of synced activities.
+    Sync Strava activities for a player across all block windows,
+    resuming from the checkpoint of an interrupted sync if there is one.
+    Returns summary of synced activities; raises SyncInterrupted.
     """
     db = get_db()
-    access_token = await refresh_access_token(player_id)
-
     player_doc = db.collection("athletes").document(player_id).get()
     if not player_doc.exists:
         raise ValueError(f"Player {player_id} not found")
@@ -31,107 +110,249 @@ async def sync_player_activities(player_id: str) -> dict:
     player_data = player_doc.to_dict()
     strava_athlete_id = player_data.get("strava_athlete_id")
 
-    synced = {"new": 0, "skipped": 0, "ignored_sport": 0}
-
-    # Fetch athlete profile for weight (used in MET estimation)
-    from services.strava_service import get_athlete_profile
-    athlete_profile = await get_athlete_profile(access_token)
-    weight_kg = athlete_profile.get("weight", 80) or 80
-
-    # MET values for sport categories
-    MET_VALUES = {
-        "Running": 9.8,
-        "Cycling": 7.5,
-        "Swimming": 8.0,
-    }
-
     # Fetch all activities for the entire competition window
     from config import COMPETITION_START_UTC, COMPETITION_END_UTC
     after_ts = int(COMPETITION_START_UTC.timestamp())
     before_ts = int(COMPETITION_END_UTC.timestamp())
 
-    activities = await list_activities(access_token, after_ts, before_ts)
-
-    for activity in activities:
-        activity_id = str(activity["id"])
-
-        # Check if already stored
-        existing = db.collection("activities").document(activity_id).get()
-        if existing.exists:
-            synced["skipped"] += 1
-            continue
-
-        # Parse start_date
-        start_date_str = activity.get("start_date", "")
-        start_date_utc = datetime.fromisoformat(
-            start_date_str.replace("Z", "+00:00")
-        )
-
-        # 1. Map to block — discards if outside all blocks
-        block_id = get_block_for_activity(start_date_utc)
-        if block_id is None:
-            # Silently ignore if outside competition windows
-            synced["skipped"] += 1
-            continue
-
-        # 2. Check if the assigned block is locked
-        block_doc = db.collection("blocks").document(block_id).get()
-        if block_doc.exists and block_doc.to_dict().get("locked", False):
-            synced["skipped"] += 1
-            continue
-
-        # 3. Map sport type
-        sport_type = activity.get("sport_type", "")
-        sport_category = get_sport_category(sport_type)
-        if sport_category is None:
-            synced["ignored_sport"] += 1
-            continue
-
-        # 4. Check sport is valid for this specific block
-        block_def = next((b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None)
-        if block_def and sport_category not in block_def["sports"]:
-            synced["ignored_sport"] += 1
-            continue
+    checkpoint_ref = db.collection(CHECKPOINTS).document(player_id)
+    checkpoint = _load_checkpoint(db, player_id, after_ts, before_ts)
+    page = checkpoint["page"] if checkpoint else 1
+    pending = list(checkpoint["pending"]) if checkpoint else []
 
-        # Fetch detailed activity for base calorie/kj data
-        detail = await get_activity_detail(access_token, activity["id"])
-        
-        # Calories Fallback Chain
-        calories = detail.get("calories", 0) or 0
-        kilojoules = detail.get("kilojoules", 0) or 0
-        moving_time_seconds = activity.get("moving_time", 0) or 0
-        
-        calorie_source = "strava_native"
-        
-        if calories == 0:
-            if kilojoules > 0:
-                calories = round(kilojoules * 0.239, 2)
-                calorie_source = "kilojoules_derived"
-            else:
-                # MET Estimation
-                met = MET_VALUES.get(sport_category, 1.0)
-                duration_hours = moving_time_seconds / 3600.0
-                calories = round(met * weight_kg * duration_hours, 2)
-                calorie_source = "met_estimated"
-
-        # Store
-        db.collection("activities").document(activity_id).set(
-            {
-                "activity_id": activity_id,
+    synced = {
+        "new": 0, "skipped": 0, "ignored_sport": 0, "duplicates": 0,
+        "resumed_from_page": page if checkpoint else None,
+    }
+
+    try:
+        with timed(SYNC_STAGES, stage="refresh_token"):
+            access_token = await refresh_access_token(player_id)
+
+        # Fetch athlete profile for weight (used in MET estimation)
+        from services.strava_service import get_athlete_profile
+        with timed(SYNC_STAGES, stage="athlete_profile"):
+            athlete_profile = await get_athlete_profile(access_token)
+        weight_kg = athlete_profile.get("weight") or None
+        if weight_kg and weight_kg != player_data.get("weight_kg"):
+            # Kept for re-estimating calories later without calling Strava
+            db.collection("athletes").document(player_id).update({"weight_kg": weight_kg})
+
+        # Watch + phone recordings of the same session overlap in time
+        detector = DuplicateDetector.for_player(db, player_id)
+
+        context = {
+            "player_id": player_id,
+            "strava_athlete_id": strava_athlete_id,
+            "access_token": access_token,
+            "athlete_profile": athlete_profile,
+            "weight_kg": weight_kg,
+            "detector": detector,
+            "playing": competitions(player_data),
+            "locked": {
+                bdoc.id for bdoc in db.collection("blocks").where("locked", "==", True).select([]).stream()
+            },
+            "details": asyncio.Semaphore(SYNC_DETAIL_CONCURRENCY),
+        }
+
+        if pending:
+            # Finish the interrupted page before listing the ones after it
+            await _sync_page(pending, context, synced)
+            page += 1
+        pages = iter_activity_pages(access_token, after_ts, before_ts, start_page=page)
+        try:
+            while True:
+                with timed(SYNC_STAGES, stage="list_activities"):
+                    item = await anext(pages, None)
+                if item is None:
+                    break
+                page, activities = item
+                pending = [{k: a[k] for k in SUMMARY_FIELDS if k in a} for a in activities]
+                await _sync_page(pending, context, synced)
+        finally:
+            await pages.aclose()
+    except httpx.HTTPError as e:
+        checkpoint = None
+        if page > 1 or pending:
+            checkpoint = {
                 "player_id": player_id,
-                "strava_athlete_id": strava_athlete_id,
-                "sport_type": sport_type,
-                "sport_category": sport_category,
-                "block_id": block_id,
-                "start_date_utc": start_date_utc.isoformat(),
-                "calories": calories,
-                "calorie_source": calorie_source,
-                "kilojoules": kilojoules,
-                "distance_meters": activity.get("distance", 0) or 0,
-                "moving_time_seconds": moving_time_seconds,
-                "name": activity.get("name", ""),
+                "after": after_ts,
+                "before": before_ts,
+                "page": page,
+                "pending": pending,
+                "error": str(e),
+                "failed_at": datetime.now(timezone.utc).isoformat(),
             }
-        )
-        synced["new"] += 1
+            checkpoint_ref.set(checkpoint)
+        interrupted = SyncInterrupted(player_id, synced, checkpoint, e)
+        SYNC_INTERRUPTIONS.labels(str(interrupted.status_code or "network")).inc()
+        raise interrupted from e
 
+    if synced["resumed_from_page"] is not None:
+        checkpoint_ref.delete()
     return synced
+
+
+async def _sync_page(summaries: list[dict], context: dict, synced: dict) -> None:
+    """
+    Run one page of summary activities through filter → detail → write.
+    Summaries are removed from the list as they are handled, so on an
+    error the list holds exactly the ones still to do.
+    """
+    db = get_db()
+    with timed(SYNC_STAGES, stage="existence_check"):
+        refs = [db.collection("activities").document(str(a["id"])) for a in summaries]
+        stored = {snap.id for snap in db.get_all(refs) if snap.exists}
+
+    outcomes = [_screen(a, stored, context["locked"]) for a in summaries]
+    spans = [
+        (outcome[2], outcome[2] + timedelta(seconds=max(a.get("elapsed_time") or a.get("moving_time") or 0, 1)))
+        for a, outcome in zip(summaries, outcomes) if isinstance(outcome, tuple)
+    ]
+    if spans:
+        # Only the stored activities the new ones could overlap
+        with timed(SYNC_STAGES, stage="duplicate_index"):
+            context["detector"].load(min(s for s, _ in spans), max(e for _, e in spans))
+    fetches = [
+        asyncio.create_task(_enrich(a, outcome, context)) if isinstance(outcome, tuple) else None
+        for a, outcome in zip(summaries, outcomes)
+    ]
+    records = await asyncio.gather(*(f for f in fetches if f is not None), return_exceptions=True)
+    results = iter(records)
+
+    # Created together with their rollup increments; see rollup_service.create_activities
+    new_records = []
+    done = 0
+    try:
+        for outcome, fetch in zip(outcomes, fetches):
+            if fetch is None:
+                synced[outcome] += 1
+            else:
+                record = next(results)
+                if isinstance(record, BaseException):
+                    raise record
+                context["detector"].check(record)
+                new_records.append(record)
+            done += 1
+    finally:
+        with timed(SYNC_STAGES, stage="store"):
+            created = create_activities(db, new_records, context["playing"])
+        # Stored meanwhile by an overlapping sync of the same athlete
+        synced["skipped"] += len(new_records) - len(created)
+        synced["new"] += len(created)
+        synced["duplicates"] += sum(1 for record in created if record.duplicate_of)
+        del summaries[:done]
+
+
+def _screen(activity: dict, stored: set[str], locked: set[str]) -> str | tuple[str, str, datetime]:
+    """The synced counter an activity is dropped under, or (block_id, sport_category, start) to fetch."""
+    # Already stored
+    if str(activity["id"]) in stored:
+        return "skipped"
+
+    # Parse start_date
+    start_date_str = activity.get("start_date", "")
+    start_date_utc = datetime.fromisoformat(
+        start_date_str.replace("Z", "+00:00")
+    )
+
+    # 1. Map to block — discards if outside all blocks
+    block_id = get_block_for_activity(start_date_utc)
+    if block_id is None:
+        # Silently ignore if outside competition windows
+        return "skipped"
+
+    # 2. Check if the assigned block is locked
+    if block_id in locked:
+        return "skipped"
+
+    # 3. Map sport type
+    sport_category = get_sport_category(activity.get("sport_type", ""))
+    if sport_category is None:
+        return "ignored_sport"
+
+    # 4. Check sport is valid for this specific block
+    block_def = next((b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None)
+    if block_def and sport_category not in block_def["sports"]:
+        return "ignored_sport"
+
+    return block_id, sport_category, start_date_utc
+
+
+def resolve_calories(
+    activity: dict,
+    detail: dict,
+    sport_category: str,
+    weight_kg: float | None,
+    hr_calories: float | None = None,
+) -> tuple[float, str, str | None]:
+    """
+    Calories fallback chain: Strava's own figure, else kilojoules, else a
+    heart-rate estimate (when one was made), else a MET estimate.
+    Returns (calories, calorie_source, calorie_confidence).
+    """
+    calories = detail.get("calories", 0) or 0
+    kilojoules = detail.get("kilojoules", 0) or 0
+    if calories != 0:
+        return calories, "strava_native", None
+    if kilojoules > 0:
+        return round(kilojoules * 0.239, 2), "kilojoules_derived", None
+    if hr_calories:
+        return hr_calories, "heart_rate_estimated", "high"
+    # MET Estimation (speed-banded, with climbing)
+    calories, confidence = estimate_activity(
+        sport_category,
+        activity.get("moving_time", 0) or 0,
+        activity.get("distance", 0) or 0,
+        activity.get("total_elevation_gain", 0) or 0,
+        weight_kg,
+    )
+    return calories, "met_estimated", confidence
+
+
+async def _enrich(activity: dict, screened: tuple[str, str, datetime], context: dict) -> Activity:
+    """Fetch an activity's detail and work out its calories."""
+    block_id, sport_category, start_date_utc = screened
+    activity_id = str(activity["id"])
+    access_token = context["access_token"]
+    weight_kg = context["weight_kg"]
+
+    async with context["details"]:
+        # Fetch detailed activity for base calorie/kj data
+        with timed(SYNC_STAGES, stage="activity_detail"):
+            detail = await get_activity_detail(access_token, activity["id"])
+
+        calories = detail.get("calories", 0) or 0
+        kilojoules = detail.get("kilojoules", 0) or 0
+        hr_calories = None
+        if calories == 0 and kilojoules <= 0 and wants_heart_rate_estimate(activity):
+            with timed(SYNC_STAGES, stage="heart_rate_streams"):
+                hr_calories = await heart_rate_calories(
+                    access_token, activity_id, weight_kg, context["athlete_profile"].get("sex"),
+                )
+
+    calories, calorie_source, calorie_confidence = resolve_calories(
+        activity, detail, sport_category, weight_kg, hr_calories,
+    )
+    moving_time_seconds = activity.get("moving_time", 0) or 0
+    distance_meters = activity.get("distance", 0) or 0
+    elevation_gain = activity.get("total_elevation_gain", 0) or 0
+
+    return Activity(
+        activity_id=activity_id,
+        player_id=context["player_id"],
+        strava_athlete_id=context["strava_athlete_id"],
+        sport_type=activity.get("sport_type", ""),
+        sport_category=sport_category,
+        block_id=block_id,
+        start_date_utc=start_date_utc.isoformat(),
+        calories=calories,
+        calorie_source=calorie_source,
+        kilojoules=kilojoules,
+        distance_meters=distance_meters,
+        moving_time_seconds=moving_time_seconds,
+        elapsed_time_seconds=activity.get("elapsed_time", 0) or 0,
+        elevation_gain_meters=elevation_gain,
+        calorie_confidence=calorie_confidence,
+        name=activity.get("name", ""),
+    )
@@ -0,0 +1,127 @@
+"""
+What-if scoring — "what do I need to win this block?"
+
+Adds hypothetical activities to a block's rollup totals and runs the same
+score_block used for locking, entirely in memory: nothing is written or
+locked. Each block's rollup, lock state and the player list are cached per
+instance, dropped whenever the rollup changes here and otherwise refreshed
+after WHAT_IF_CACHE_SECONDS, so repeated calls (a slider being dragged)
+cost no Firestore reads.
+"""
+import threading
+import time
+from dataclasses import replace
+from config import BLOCK_DEFINITIONS
+from firebase_client import get_db
+from models import SportTotals
+from services.rollup_service import (
+    ROLLUPS,
+    block_activities,
+    is_built,
+    on_change,
+    rollup_document,
+    totals_from_rollup,
+)
+from services.scoring_service import score_block
+from tenancy import competitors
+
+WHAT_IF_CACHE_SECONDS = 30
+
+_cache: dict[str, tuple[float, dict]] = {}
+_lock = threading.Lock()
+
+
+def forget(block_id: str | None = None) -> None:
+    """Drop the cached state for a block (or every block)."""
+    with _lock:
+        if block_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(block_id, None)
+
+
+on_change(forget)
+
+
+def _block_state(block_id: str) -> dict:
+    """Players, lock state and rollup totals for a block, cached."""
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(block_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    db = get_db()
+    block_ref = db.collection("blocks").document(block_id)
+    rollup_ref = db.collection(ROLLUPS).document(block_id)
+    snapshots = {snap.reference.path: snap for snap in db.get_all([block_ref, rollup_ref])}
+    block, rollup = snapshots[block_ref.path], snapshots[rollup_ref.path]
+    rollup_data = rollup.to_dict() if rollup.exists else None
+    if not is_built(rollup_data):
+        # Not built yet: compute it without storing anything
+        rollup_data = rollup_document(block_id, block_activities(db, block_id))
+    state = {
+        "player_ids": [pdoc.id for pdoc in competitors(db).select([]).stream()],
+        "locked": block.exists and block.to_dict().get("locked", False),
+        "totals": totals_from_rollup(rollup_data),
+    }
+    with _lock:
+        _cache[block_id] = (now + WHAT_IF_CACHE_SECONDS, state)
+    return state
+
+
+def _summary(score: dict, player_ids: list[str]) -> dict:
+    points = score["total_points"]
+    return {
+        "total_points": points,
+        "points_by_sport": score["points_by_sport"],
+        "calories_by_sport": score["calories_by_sport"],
+        "bonus_points": score["bonus_points"],
+        "clean_sweep_eligible": score["clean_sweep_eligible"],
+        "clean_sweep_achieved": score["clean_sweep_achieved"],
+        "clean_sweep_winner": score["clean_sweep_winner"],
+        "standings": sorted(player_ids, key=lambda pid: points[pid], reverse=True),
+    }
+
+
+def simulate_block(block_id: str, extra_activities: list[dict]) -> dict:
+    """
+    Score an open block as it stands and with the hypothetical activities
+    ({player_id, sport_category, calories, distance_meters?,
+    moving_time_seconds?}) added. Raises ValueError for unknown or locked
+    blocks, players or sports.
+    """
+    block_def = next((b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id), None)
+    if block_def is None:
+        raise ValueError(f"Unknown block: {block_id}")
+    state = _block_state(block_id)
+    if state["locked"]:
+        raise ValueError(f"Block {block_id} is already locked")
+    player_ids, sports = state["player_ids"], block_def["sports"]
+
+    totals = {pid: dict(by_sport) for pid, by_sport in state["totals"].items()}
+    for extra in extra_activities:
+        pid, sport = extra["player_id"], extra["sport_category"]
+        if pid not in player_ids:
+            raise ValueError(f"Unknown player: {pid}")
+        if sport not in sports:
+            raise ValueError(f"{sport} is not scored in {block_id}")
+        base = totals.setdefault(pid, {}).get(sport) or SportTotals()
+        totals[pid][sport] = replace(
+            base,
+            calories=base.calories + extra["calories"],
+            distance=base.distance + extra.get("distance_meters", 0),
+            time=base.time + extra.get("moving_time_seconds", 0),
+            count=base.count + 1,
+        )
+
+    current = score_block(block_id, sports, player_ids, state["totals"])
+    projected = score_block(block_id, sports, player_ids, totals)
+    return {
+        "block_id": block_id,
+        "current": _summary(current, player_ids),
+        "projected": _summary(projected, player_ids),
+        "points_change": {
+            pid: projected["total_points"][pid] - current["total_points"][pid] for pid in player_ids
+        },
+    }
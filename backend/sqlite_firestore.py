@@ -0,0 +1,220 @@
+"""
+SQLite-backed document store exposing the same client API as Firestore.
+
+Services keep talking to firebase_client.get_db(); with
+FIRESTORE_BACKEND=sqlite that returns a SQLiteFirestore, which reuses the
+in-memory client's query engine and replaces its storage with one SQLite
+table of JSON documents. Expression indexes cover the hot queries —
+activities by (block_id, player_id, sport_category) for scoring and by
+(player_id, start_date_utc) for listings — and equality/range filters on
+plain fields are pushed down to SQL so those indexes are used.
+
+    FIRESTORE_BACKEND=sqlite SQLITE_PATH=triathlon.db uvicorn main:app
+"""
+import base64
+import re
+import sqlite3
+from datetime import datetime
+
+import orjson
+
+from memory_firestore import DOCUMENT_ID, DocumentReference, FieldFilter, InMemoryFirestore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    parent        TEXT NOT NULL,     -- collection path
+    doc_id        TEXT NOT NULL,
+    collection_id TEXT NOT NULL,     -- last segment of parent, for collection groups
+    data          TEXT NOT NULL,     -- JSON
+    version       INTEGER NOT NULL,
+    update_time   TEXT NOT NULL,
+    PRIMARY KEY (parent, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS documents_collection_id ON documents (collection_id);
+CREATE INDEX IF NOT EXISTS documents_block_player_sport ON documents (
+    parent,
+    json_extract(data, '$.block_id'),
+    json_extract(data, '$.player_id'),
+    json_extract(data, '$.sport_category')
+);
+CREATE INDEX IF NOT EXISTS documents_player_start ON documents (
+    parent,
+    json_extract(data, '$.player_id'),
+    json_extract(data, '$.start_date_utc')
+);
+CREATE INDEX IF NOT EXISTS documents_strava_athlete ON documents (
+    parent,
+    json_extract(data, '$.strava_athlete_id')
+);
+"""
+
+# Planner statistics used until the first real ANALYZE: rows, then rows per
+# distinct prefix of each index. Without them SQLite assumes parent= on the
+# primary key is as selective as the expression indexes and scans the
+# whole collection.
+DEFAULT_STATS = [
+    ("documents", "documents", "10000 2500 1"),
+    ("documents", "documents_collection_id", "10000 2500"),
+    ("documents", "documents_block_player_sport", "10000 2500 300 150 50"),
+    ("documents", "documents_player_start", "10000 2500 1250 2"),
+    ("documents", "documents_strava_athlete", "10000 2500 2"),
+]
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_PUSHDOWN_OPS = {"==": "=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+# ─── JSON with Firestore value types ───
+
+def _encode_default(value):
+    if isinstance(value, datetime):
+        return {"$ts": value.isoformat()}
+    if isinstance(value, DocumentReference):
+        return {"$ref": value.path}
+    if isinstance(value, bytes):
+        return {"$bytes": base64.b64encode(value).decode()}
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+
+def _revive(value, client):
+    if isinstance(value, dict):
+        if len(value) == 1:
+            (key, inner), = value.items()
+            if key == "$ts":
+                return datetime.fromisoformat(inner)
+            if key == "$ref":
+                return DocumentReference(client, inner)
+            if key == "$bytes":
+                return base64.b64decode(inner)
+        return {k: _revive(v, client) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_revive(v, client) for v in value]
+    return value
+
+
+def _pushable(value) -> bool:
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+class SQLiteFirestore(InMemoryFirestore):
+    """Firestore client API over a SQLite file (or ":memory:")."""
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._seed_planner_stats()
+
+    def _seed_planner_stats(self) -> None:
+        self._conn.execute("ANALYZE sqlite_schema")  # creates sqlite_stat1 if missing
+        if self._conn.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl = 'documents'").fetchone():
+            return
+        with self._conn:
+            self._conn.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", DEFAULT_STATS)
+        self._conn.execute("ANALYZE sqlite_schema")  # reload statistics
+
+    def close(self) -> None:
+        self._conn.execute("PRAGMA optimize")  # refresh statistics from real data
+        self._conn.close()
+
+    # ── encoding ──
+
+    def _dumps(self, data: dict) -> str:
+        return orjson.dumps(data, default=_encode_default, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+
+    def _loads(self, text: str) -> dict:
+        data = orjson.loads(text)
+        return _revive(data, self) if '"$' in text else data
+
+    # ── storage primitives ──
+
+    def _load(self, path: str):
+        parent, doc_id = path.rsplit("/", 1)
+        row = self._conn.execute(
+            "SELECT data, version, update_time FROM documents WHERE parent = ? AND doc_id = ?",
+            (parent, doc_id),
+        ).fetchone()
+        if row is None:
+            return None
+        return self._loads(row[0]), row[1], datetime.fromisoformat(row[2])
+
+    def _store(self, path: str, data: dict | None, version: int, update_time: datetime) -> None:
+        parent, doc_id = path.rsplit("/", 1)
+        if data is None:
+            self._conn.execute("DELETE FROM documents WHERE parent = ? AND doc_id = ?", (parent, doc_id))
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+            (parent, doc_id, parent.rsplit("/", 1)[-1], self._dumps(data), version, update_time.isoformat()),
+        )
+
+    def _commit(self, writes: list[tuple], read_versions: dict | None = None):
+        # One SQLite transaction per batch: all-or-nothing and one fsync
+        with self._lock, self._conn:
+            return super()._commit(writes, read_versions)
+
+    @staticmethod
+    def _where(collection_path: str, all_descendants: bool, filters) -> tuple[str, list]:
+        """WHERE clause for a scan, with plain-field filters pushed down."""
+        if all_descendants:
+            clauses, params = ["collection_id = ?"], [collection_path]
+        else:
+            clauses, params = ["parent = ?"], [collection_path]
+        for flt in filters:
+            if not isinstance(flt, FieldFilter) or flt.field_path == DOCUMENT_ID:
+                continue
+            if not _FIELD.match(flt.field_path):
+                continue
+            expr = f"json_extract(data, '$.{flt.field_path}')"
+            if flt.op_string in _PUSHDOWN_OPS and _pushable(flt.value):
+                clauses.append(f"{expr} {_PUSHDOWN_OPS[flt.op_string]} ?")
+                params.append(flt.value)
+            elif flt.op_string == "in" and flt.value and all(_pushable(v) for v in flt.value):
+                clauses.append(f"{expr} IN ({', '.join('?' * len(flt.value))})")
+                params.extend(flt.value)
+        return " AND ".join(clauses), params
+
+    def _scan(self, collection_path: str, all_descendants: bool, filters=()):
+        where, params = self._where(collection_path, all_descendants, filters)
+        sql = f"SELECT parent, doc_id, data, update_time FROM documents WHERE {where}"
+        for parent, doc_id, data, update_time in self._conn.execute(sql, params).fetchall():
+            yield f"{parent}/{doc_id}", doc_id, self._loads(data), datetime.fromisoformat(update_time)
+
+    def _root_collections(self) -> list[str]:
+        rows = self._conn.execute(
+            "SELECT DISTINCT parent FROM documents WHERE instr(parent, '/') = 0 ORDER BY parent"
+        )
+        return [r[0] for r in rows]
+
+    def _paths_under(self, prefix: str) -> list[str]:
+        parent, _, doc_id = prefix.rpartition("/")
+        # '0' sorts right after '/', so [prefix/, prefix0) is everything beneath prefix
+        rows = self._conn.execute(
+            "SELECT parent, doc_id FROM documents"
+            " WHERE parent = ? OR (parent = ? AND doc_id = ?) OR (parent >= ? AND parent < ?)",
+            (prefix, parent, doc_id, prefix + "/", prefix + "0"),
+        )
+        return [f"{p}/{d}" for p, d in rows]
+
+    def _collection_ids(self, collection_path: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id FROM documents WHERE parent = ?", (collection_path,))
+            return [r[0] for r in rows]
+
+    def _subcollections(self, doc_path: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT parent FROM documents WHERE parent >= ? AND parent < ?",
+                (doc_path + "/", doc_path + "0"),
+            )
+            return sorted(p for (p,) in rows if "/" not in p[len(doc_path) + 1:])
+
+    def explain(self, query) -> list[str]:
+        """SQLite query plan for the scan behind a query (for checking index use)."""
+        where, params = self._where(query._collection_path, query._all_descendants, query._filters)
+        sql = f"EXPLAIN QUERY PLAN SELECT data FROM documents WHERE {where}"
+        return [row[-1] for row in self._conn.execute(sql, params)]
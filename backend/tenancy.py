@@ -0,0 +1,29 @@
+"""
+Group (league) tenancy for Firestore paths.
+
+Each group keeps its own athletes (memberships), blocks, scores and
+rollups under groups/{group_id}/...; group_id None is the original
+competition in the root collections. Activities, Strava tokens and the
+athlete registry stay global, so an athlete in several groups is synced
+once and every group they belong to is updated from that one ingest.
+
+Not every registered athlete competes in the root competition: those who
+do carry `root: True` on their athlete document, so an athlete who only
+plays in groups never touches the root rollups and the root roster is a
+query rather than the whole registry.
+"""
+GROUPS = "groups"
+
+
+def group_collection(db, name: str, group_id: str | None = None):
+    """A group's `name` subcollection, or the root collection for group_id None."""
+    if group_id is None:
+        return db.collection(name)
+    return db.collection(GROUPS).document(group_id).collection(name)
+
+
+def competitors(db, group_id: str | None = None):
+    """Query for a competition's athletes: the group's memberships, or the root competitors."""
+    if group_id is None:
+        return db.collection("athletes").where("root", "==", True)
+    return group_collection(db, "athletes", group_id)
@@ -0,0 +1,70 @@
+"""
+Shared pytest setup: make backend modules (config, services, ...) and the
+scripts/ tools importable by their top-level names, and provide an
+in-memory Firestore and an in-process fake Strava.
+"""
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+
+import firebase_client  # noqa: E402
+from memory_firestore import InMemoryFirestore  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Install a fresh InMemoryFirestore behind firebase_client.get_db()."""
+    fake = InMemoryFirestore()
+    firebase_client.set_db(fake)
+    yield fake
+    firebase_client.set_db(None)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    """Retry failed Strava calls without sleeping."""
+    monkeypatch.setattr("services.strava_service.STRAVA_RETRY_BACKOFF_SECONDS", 0)
+
+
+@pytest.fixture
+def make_raw():
+    """Build a raw Strava ride: make_raw(activity_id, athlete_id=42, day=7, calories=500.0)."""
+    def build(activity_id, athlete_id=42, day=7, calories=500.0):
+        return {
+            "id": activity_id,
+            "athlete": {"id": athlete_id},
+            "name": f"Ride {activity_id}",
+            "sport_type": "Ride",
+            "start_date": f"2026-03-{day:02d}T01:00:00Z",
+            "moving_time": 3600,
+            "elapsed_time": 3700,
+            "distance": 30000.0,
+            "calories": calories,
+            "kilojoules": 0.0,
+        }
+    return build
+
+
+@pytest.fixture
+def fake_strava(monkeypatch):
+    """
+    Point strava_service at an in-process scripts/fake_strava.py app for the
+    rest of the test: fake_strava(raws, **options) returns the FakeStravaState.
+    """
+    from fake_strava import FakeStravaState, create_app
+
+    def start(raws, **kwargs):
+        state = FakeStravaState(raws, **kwargs)
+        app = create_app(state)
+        monkeypatch.setattr(
+            "services.strava_service._client",
+            lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        )
+        monkeypatch.setattr("services.strava_service.STRAVA_API_BASE", "http://fake/api/v3")
+        return state
+    return start
@@ -0,0 +1,101 @@
+"""
+Tests for the activity listing: cursor pagination, filters and limits.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+    return TestClient(app)
+
+
+def _store(db, activity_id, start, block_id="block_2", sport="Cycling", player_id="player_1"):
+    db.collection("activities").document(activity_id).set({
+        "activity_id": activity_id,
+        "player_id": player_id,
+        "block_id": block_id,
+        "sport_category": sport,
+        "start_date_utc": start,
+    })
+
+
+def _ids(resp):
+    assert resp.status_code == 200
+    return [a["activity_id"] for a in resp.json()["activities"]]
+
+
+def _walk(client, path, limit, **params):
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["start_after"] = cursor
+        resp = client.get(path, params=query)
+        pages.append(_ids(resp))
+        cursor = resp.json()["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_activity_once_in_order(db, client):
+    for i in range(23):
+        _store(db, f"a{i:02d}", f"2026-03-07T{i:02d}:00:00+00:00")
+    _store(db, "other", "2026-03-07T05:30:00+00:00", player_id="player_2")
+
+    pages = _walk(client, "/api/activities/player_1", limit=5)
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    assert [a for p in pages for a in p] == [f"a{i:02d}" for i in range(23)]
+
+    # An exact multiple of the limit ends without an empty trailing page
+    assert [len(p) for p in _walk(client, "/api/activities/player_1", limit=23)] == [23]
+
+
+def test_identical_start_dates_are_ordered_by_id(db, client):
+    for activity_id in ("c", "a", "d", "b"):
+        _store(db, activity_id, "2026-03-07T08:00:00+00:00")
+    _store(db, "z", "2026-03-07T07:00:00+00:00")
+
+    pages = _walk(client, "/api/activities/player_1", limit=2)
+    assert pages == [["z", "a"], ["b", "c"], ["d"]]
+
+
+def test_filters(db, client):
+    _store(db, "swim", "2026-03-01T02:00:00+00:00", block_id="block_1", sport="Swimming")
+    _store(db, "ride", "2026-03-07T02:00:00+00:00")
+    _store(db, "run", "2026-03-07T09:00:00+00:00", sport="Running")
+    _store(db, "late", "2026-03-14T02:00:00+00:00", block_id="block_3", sport="Running")
+    path = "/api/activities/player_1"
+
+    assert _ids(client.get(path, params={"block_id": "block_2"})) == ["ride", "run"]
+    assert _ids(client.get(path, params={"sport": "Running"})) == ["run", "late"]
+    assert _ids(client.get(path, params={"after": "2026-03-07T02:00:00Z"})) == ["ride", "run", "late"]
+    assert _ids(client.get(path, params={"before": "2026-03-07T09:00:00+00:00"})) == ["swim", "ride", "run"]
+    # Offsets and naive timestamps are normalised to UTC
+    assert _ids(client.get(path, params={"after": "2026-03-07T17:00:00+09:00", "before": "2026-03-07T10:00:00"})) == ["run"]
+    assert _ids(client.get(path, params={"block_id": "block_2", "sport": "Running"})) == ["run"]
+    assert client.get(path, params={"after": "yesterday"}).status_code == 400
+
+
+def test_without_limit_or_cursor_everything_is_returned(db, client):
+    for i in range(150):
+        _store(db, f"a{i:03d}", f"2026-03-07T{i // 60:02d}:{i % 60:02d}:00+00:00")
+    resp = client.get("/api/activities/player_1")
+    assert len(_ids(resp)) == 150
+    assert resp.json()["next_cursor"] is None
+
+
+def test_limit_bounds(db, client):
+    _store(db, "a", "2026-03-07T08:00:00+00:00")
+    path = "/api/activities/player_1"
+    assert client.get(path, params={"limit": 0}).status_code == 422
+    assert client.get(path, params={"limit": 501}).status_code == 422
+    assert client.get(path, params={"limit": 1}).json()["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm9wZQ", "WzFd", "NQ"])
+def test_malformed_cursor_is_rejected(db, client, cursor):
+    # "bm9wZQ" is "nope", "WzFd" is [1], "NQ" is 5
+    resp = client.get("/api/activities/player_1", params={"start_after": cursor})
+    assert resp.status_code == 400
@@ -0,0 +1,55 @@
+"""
+Tests for the dashboard SSE broadcaster.
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from services import dashboard_service
+from services.broadcast_service import DashboardBroadcaster, event_stream
+from tests.test_dashboard import seed
+
+
+def parse(event: bytes) -> dict:
+    lines = event.decode().strip().split("\n")
+    assert lines[0] == "event: dashboard"
+    return json.loads(lines[2].removeprefix("data: "))
+
+
+@pytest.mark.asyncio
+async def test_one_computation_fanned_out_to_all_subscribers(db):
+    seed(db)
+    broadcaster = DashboardBroadcaster()
+    with patch("services.broadcast_service.COALESCE_SECONDS", 0):
+        subscribers = [await broadcaster.subscribe() for _ in range(3)]
+        snapshot = parse(subscribers[0][1])
+        assert snapshot["full"] is True
+
+        db.collection("scores").document("block_2").update({"total_points": {"p1": 0, "p2": 9}})
+        with patch("services.broadcast_service.get_versioned_dashboard",
+                   wraps=dashboard_service.get_versioned_dashboard) as compute:
+            broadcaster.notify()
+            broadcaster.notify()
+            events = [await asyncio.wait_for(q.get(), 2) for q, _ in subscribers]
+        broadcaster._task.cancel()
+
+    assert compute.call_count == 1
+    assert all(e is events[0] for e in events)      # serialized once
+    patch_event = parse(events[0])
+    assert patch_event["since"] == snapshot["version"]
+    assert [d["block_id"] for d in patch_event["changes"]["block_scores"]["upsert"]] == ["block_2"]
+    assert broadcaster.broadcasts == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_snapshot_and_unsubscribes(db):
+    seed(db)
+    broadcaster = DashboardBroadcaster()
+    queue, snapshot = await broadcaster.subscribe()
+    with patch("services.broadcast_service.broadcaster", broadcaster):
+        stream = event_stream(queue, snapshot)
+        assert await stream.__anext__() == snapshot
+        await stream.aclose()
+    assert broadcaster.subscriber_count == 0
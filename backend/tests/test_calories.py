@@ -0,0 +1,77 @@
+"""
+Tests for the vectorized calorie estimator and the stored-activity backfill.
+"""
+import numpy as np
+import pytest
+
+from services.calorie_service import DEFAULT_MET, estimate_activity, estimate_calories, reestimate_stored
+from services.rollup_service import get_block_totals, record_activity
+from tests.test_rollups import activity
+
+
+def test_speed_picks_met_band():
+    # 1 h each: 8 km/h jog, 14 km/h run, 28 km/h ride, 3 km/h swim
+    result = estimate_calories(
+        ["Running", "Running", "Cycling", "Swimming"],
+        [3600] * 4, [8000, 14000, 28000, 3000], weight_kg=[70] * 4,
+    )
+    np.testing.assert_allclose(result["met"], [9.0, 12.8, 12.0, 9.8])
+    np.testing.assert_allclose(result["calories"], np.array([9.0, 12.8, 12.0, 9.8]) * 70)
+    assert list(result["confidence"]) == ["high"] * 4
+
+
+def test_missing_inputs_lower_confidence():
+    result = estimate_calories(
+        ["Running", "Cycling", "Rowing"], [1800, 1800, 1800], [5000, 0, 5000],
+        weight_kg=[np.nan, 70, 70],
+    )
+    assert list(result["confidence"]) == ["medium", "low", "low"]
+    assert result["met"][1] == DEFAULT_MET["Cycling"]
+    assert result["calories"][0] == pytest.approx(10.5 * 80 * 0.5)  # default weight
+
+
+def test_climbing_adds_work_against_gravity():
+    flat, _ = estimate_activity("Cycling", 3600, 25000, 0, 75)
+    hilly, _ = estimate_activity("Cycling", 3600, 25000, 1000, 75)
+    swim_flat, _ = estimate_activity("Swimming", 3600, 3000, 0, 75)
+    swim_hilly, _ = estimate_activity("Swimming", 3600, 3000, 1000, 75)
+    assert hilly - flat == pytest.approx(75 * 9.81 * 1000 / 0.25 / 4184, abs=0.01)
+    assert swim_hilly == swim_flat
+
+
+def test_batch_matches_single_estimates():
+    rng = np.random.default_rng(3)
+    n = 1000
+    sports = rng.choice(["Running", "Cycling", "Swimming"], n)
+    times, distances = rng.integers(0, 10000, n), rng.uniform(0, 60000, n)
+    elevations, weights = rng.uniform(0, 800, n), rng.uniform(45, 110, n)
+
+    batch = estimate_calories(sports, times, distances, elevations, weights)
+
+    for i in range(0, n, 97):
+        single = estimate_activity(sports[i], times[i], distances[i], elevations[i], weights[i])
+        assert single == (batch["calories"][i], batch["confidence"][i])
+
+
+def test_reestimate_updates_unlocked_blocks_and_rollups(db):
+    db.collection("athletes").document("p1").set({"weight_kg": 60, "root": True})
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": False})
+    db.collection("blocks").document("block_3").set({"block_id": "block_3", "locked": True})
+    stale = activity(1, calories=999.0, source="met_estimated")
+    locked = activity(2, calories=999.0, source="met_estimated")
+    locked.block_id = "block_3"
+    native = activity(3, calories=123.0)
+    for record in (stale, locked, native):
+        record_activity(db, record)
+
+    assert reestimate_stored(dry_run=True) == {"estimated": 1, "changed": 1, "blocks": ["block_2"]}
+    assert db.collection("activities").document("1").get().to_dict()["calories"] == 999.0
+
+    reestimate_stored()
+
+    expected, _ = estimate_activity("Running", 1800, 5000, 0, 60)
+    updated = db.collection("activities").document("1").get().to_dict()
+    assert (updated["calories"], updated["calorie_confidence"]) == (expected, "high")
+    assert db.collection("activities").document("2").get().to_dict()["calories"] == 999.0
+    assert get_block_totals("block_2")["p1"]["Running"].calories == pytest.approx(expected + 123.0)
+    assert reestimate_stored()["changed"] == 0
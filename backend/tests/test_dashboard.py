@@ -0,0 +1,68 @@
+"""
+Tests for dashboard versions and delta patches.
+"""
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from services import dashboard_service
+from services.dashboard_service import get_dashboard_delta, get_versioned_dashboard
+
+
+def seed(db):
+    for pid in ("p1", "p2"):
+        db.collection("athletes").document(pid).set({"display_name": pid, "status": "connected", "root": True})
+    for block_id in ("block_1", "block_2"):
+        db.collection("blocks").document(block_id).set({"block_id": block_id, "locked": False})
+        db.collection("scores").document(block_id).set({
+            "block_id": block_id, "locked": True,
+            "total_points": {"p1": 3, "p2": 1}, "bonus_points": {},
+        })
+
+
+def test_unchanged_dashboard_has_same_version_and_empty_delta(db):
+    seed(db)
+    version, _ = get_versioned_dashboard()
+    assert get_versioned_dashboard()[0] == version
+    assert get_dashboard_delta(version) == {
+        "version": version, "since": version, "full": False, "changes": {},
+    }
+
+
+def test_delta_contains_only_changed_sections_and_blocks(db):
+    seed(db)
+    version, _ = get_versioned_dashboard()
+    db.collection("scores").document("block_2").update({"total_points": {"p1": 3, "p2": 5}})
+
+    delta = get_dashboard_delta(version)
+
+    assert delta["full"] is False
+    assert delta["version"] != version
+    changes = delta["changes"]
+    assert set(changes) == {"scoreboard", "block_scores", "projection"}
+    assert [d["block_id"] for d in changes["block_scores"]["upsert"]] == ["block_2"]
+    assert changes["block_scores"]["remove"] == []
+    assert changes["scoreboard"]["totals"] == {"p1": 6, "p2": 6}
+
+
+def test_unknown_or_evicted_version_gets_full_snapshot(db):
+    seed(db)
+    old, _ = get_versioned_dashboard()
+    with patch.object(dashboard_service, "DASHBOARD_HISTORY", 1):
+        db.collection("athletes").document("p1").update({"display_name": "Renamed"})
+        get_versioned_dashboard()
+        delta = get_dashboard_delta(old)
+    assert delta["full"] is True
+    assert delta["data"]["players"][0]["display_name"] == "Renamed"
+    assert get_dashboard_delta("nonsense")["full"] is True
+
+
+def test_dashboard_etag(db):
+    from main import app
+    seed(db)
+    client = TestClient(app)
+    resp = client.get("/api/dashboard")
+    etag = resp.headers["etag"]
+    assert resp.json()["version"] == etag.strip('"')
+    assert client.get("/api/dashboard", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/api/dashboard/delta?since={resp.json()['version']}").json()["changes"] == {}
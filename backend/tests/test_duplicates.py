@@ -0,0 +1,175 @@
+"""
+Tests for duplicate-activity detection: the interval index, flagging and
+suppressing overlaps at sync time, and reviewing flagged activities.
+"""
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from models import Activity
+from services.block_service import seed_blocks
+from services.overlap_service import DuplicateDetector, IntervalIndex
+from services.rollup_service import get_block_totals
+
+
+def test_interval_index_matches_brute_force():
+    rng = random.Random(7)
+    intervals = []
+    index = IntervalIndex()
+    for i in range(2000):
+        start = rng.uniform(0, 1e6)
+        end = start + rng.uniform(60, 20000)
+        intervals.append((start, end, str(i)))
+        index.add(start, end, str(i))
+
+    for _ in range(200):
+        start = rng.uniform(0, 1e6)
+        end = start + rng.uniform(60, 5000)
+        expected = {key for s, e, key in intervals if min(e, end) - max(s, start) > 0}
+        assert {key for key, _, _ in index.overlapping(start, end)} == expected
+
+
+def test_interval_index_lookup_does_not_scan_everything():
+    index = IntervalIndex()
+    for i in range(50_000):
+        index.add(i * 7200.0, i * 7200.0 + 3600, str(i))
+
+    began = time.perf_counter()
+    for i in range(1000):
+        hits = index.overlapping(i * 7200.0 + 1800, i * 7200.0 + 5400)
+        assert [key for key, _, _ in hits] == [str(i)]
+    assert time.perf_counter() - began < 0.5
+
+
+def test_a_long_interval_does_not_widen_other_lookups():
+    index = IntervalIndex()
+    index.add(0.0, 300 * 86400.0, "long")
+    for i in range(50_000):
+        index.add(400 * 86400 + i * 7200.0, 400 * 86400 + i * 7200.0 + 3600, str(i))
+    assert len(index) == 50_001
+
+    began = time.perf_counter()
+    for i in range(49_000, 50_000):
+        start = 400 * 86400 + i * 7200.0 + 1800
+        assert [key for key, _, _ in index.overlapping(start, start + 3600)] == [str(i)]
+    assert time.perf_counter() - began < 0.5
+    assert [key for key, _, _ in index.overlapping(86400.0, 86460.0)] == ["long"]
+
+
+def _activity(aid, start, elapsed=3600, sport="Cycling", status=None):
+    return Activity(
+        activity_id=aid, player_id="p1", sport_type="Ride", sport_category=sport, block_id="block_2",
+        start_date_utc=start, elapsed_time_seconds=elapsed, duplicate_status=status,
+    )
+
+
+def test_detector_needs_substantial_overlap_in_the_same_sport():
+    detector = DuplicateDetector("flag")
+    detector.add(_activity("a", "2026-03-07T01:00:00+00:00"))
+
+    assert detector.find_duplicate(_activity("b", "2026-03-07T01:40:00+00:00")) is None  # 20 min
+    assert detector.find_duplicate(_activity("c", "2026-03-07T01:00:00+00:00", sport="Running")) is None
+    # A short recording fully inside a long one is a duplicate of it
+    assert detector.find_duplicate(_activity("d", "2026-03-07T01:10:00+00:00", elapsed=900)) == "a"
+    # Discarded activities are not indexed
+    detector.add(_activity("e", "2026-03-07T05:00:00+00:00", status="discarded"))
+    assert detector.find_duplicate(_activity("f", "2026-03-07T05:00:00+00:00")) is None
+
+
+def _seed_player(db):
+    seed_blocks()
+    db.collection("athletes").document("p1").set({
+        "strava_athlete_id": "42", "access_token": "access-42", "token_expiry": 2**31,
+        "status": "connected", "root": True,
+    })
+
+
+def _watch_and_phone(make_raw):
+    phone = make_raw(2, calories=450.0)
+    phone["start_date"] = "2026-03-07T01:02:00Z"
+    return [make_raw(1, calories=500.0), phone, make_raw(3, day=8)]
+
+
+@pytest.mark.asyncio
+async def test_sync_flags_overlap_and_leaves_it_out_of_scoring(db, fake_strava, make_raw):
+    _seed_player(db)
+    fake_strava(_watch_and_phone(make_raw))
+    from services.sync_service import sync_player_activities
+    synced = await sync_player_activities("p1")
+
+    assert (synced["new"], synced["duplicates"]) == (3, 1)
+    flagged = db.collection("activities").document("2").get().to_dict()
+    assert (flagged["duplicate_of"], flagged["duplicate_status"]) == ("1", "pending")
+    assert get_block_totals("block_2")["p1"]["Cycling"].calories == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_suppress_mode_and_resync_against_stored_activities(db, fake_strava, make_raw):
+    _seed_player(db)
+    state = fake_strava(_watch_and_phone(make_raw)[:1])
+    with patch("services.overlap_service.DUPLICATE_ACTIVITIES", "suppress"):
+        from services.sync_service import sync_player_activities
+        await sync_player_activities("p1")
+        state.add_activity(_watch_and_phone(make_raw)[1])
+        synced = await sync_player_activities("p1")
+
+    assert synced["duplicates"] == 1
+    assert db.collection("activities").document("2").get().to_dict()["duplicate_status"] == "suppressed"
+    assert get_block_totals("block_2")["p1"]["Cycling"].count == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_reads_only_stored_activities_near_new_ones(db, fake_strava, make_raw):
+    _seed_player(db)
+    # Stored earlier, two weeks later in the competition
+    db.collection("activities").document("9").set(
+        _activity("9", "2026-03-21T01:00:00+00:00").to_firestore() | {"player_id": "p1"},
+    )
+    state = fake_strava(_watch_and_phone(make_raw))
+    from services.sync_service import sync_player_activities
+    db.reset_stats()
+    assert (await sync_player_activities("p1"))["duplicates"] == 1
+    # The existence check, and an index query (billed as one read) that finds nothing
+    assert db.stats["reads:activities"] == 3 + 1
+
+    # Nothing new: no index query at all
+    db.reset_stats()
+    assert (await sync_player_activities("p1"))["new"] == 0
+    assert db.stats["reads:activities"] == 3
+
+    # A later ride reads only the one stored within a day before it
+    late = make_raw(4, day=8)
+    late["start_date"] = "2026-03-08T03:00:00Z"
+    state.add_activity(late)
+    db.reset_stats()
+    assert (await sync_player_activities("p1"))["new"] == 1
+    assert db.stats["reads:activities"] == 4 + 1
+
+
+@pytest.mark.asyncio
+async def test_review_keep_and_discard(db, fake_strava, make_raw):
+    _seed_player(db)
+    raws = _watch_and_phone(make_raw)
+    extra = make_raw(4, day=8, calories=300.0)
+    extra["start_date"] = "2026-03-08T01:05:00Z"
+    fake_strava(raws + [extra])
+    from services.sync_service import sync_player_activities
+    await sync_player_activities("p1")
+
+    from main import app
+    client = TestClient(app)
+    listed = client.get("/api/activities/duplicates", params={"player_id": "p1"}).json()["duplicates"]
+    assert sorted(d["activity"]["activity_id"] for d in listed) == ["2", "4"]
+    assert {d["duplicate_of"]["activity_id"] for d in listed} == {"1", "3"}
+
+    assert client.post("/api/activities/duplicates/2", json={"action": "keep"}).status_code == 200
+    assert client.post("/api/activities/duplicates/4", json={"action": "discard"}).status_code == 200
+    assert client.post("/api/activities/duplicates/4", json={"action": "keep"}).status_code == 400
+    assert client.post("/api/activities/duplicates/1", json={"action": "maybe"}).status_code == 400
+
+    totals = get_block_totals("block_2")["p1"]["Cycling"]
+    assert (totals.count, totals.calories) == (3, 1450.0)
+    assert client.get("/api/activities/duplicates").json()["duplicates"] == []
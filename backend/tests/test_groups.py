@@ -0,0 +1,166 @@
+"""
+Tests for group tenancy: counter-allocated player ids, one ingest updating
+every group an athlete belongs to, and group scoring confined to the
+group's own subcollections.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.block_service import seed_blocks
+from services.group_service import add_member, create_group, due_group_blocks
+from services.rollup_service import get_block_totals, record_activity
+from models import Activity
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+    seed_blocks()
+    return TestClient(app)
+
+
+def _athlete(db, pid, strava_id):
+    db.collection("athletes").document(pid).set({
+        "display_name": pid, "strava_athlete_id": strava_id, "status": "connected",
+        "access_token": f"access-{strava_id}", "token_expiry": 2**31, "root": True,
+    })
+
+
+def _ride(aid, pid, calories, day=7):
+    return Activity(
+        activity_id=aid, player_id=pid, sport_type="Ride", sport_category="Cycling", block_id="block_2",
+        start_date_utc=f"2026-03-{day:02d}T01:00:00+00:00", calories=calories,
+    )
+
+
+def test_player_ids_come_from_a_counter(db, client):
+    for i in range(1, 51):
+        db.collection("athletes").document(f"player_{i}").set({"display_name": str(i)})
+    db.reset_stats()
+
+    # No counter yet: existing slots are stepped over, one read each
+    first = client.post("/api/register", json={"display_name": "Ann"}).json()["player_id"]
+    assert first == "player_51"
+    db.reset_stats()
+    second = client.post("/api/register", json={"display_name": "Bob"}).json()["player_id"]
+    assert second == "player_52"
+    assert db.stats["reads:athletes"] == 1
+    assert db.collection("counters").document("athletes").get().to_dict() == {"last": 52}
+
+
+@pytest.mark.asyncio
+async def test_one_ingest_updates_every_group_of_the_athlete(db, fake_strava, make_raw):
+    seed_blocks()
+    _athlete(db, "p1", "42")
+    _athlete(db, "p2", "43")
+    runners, riders = create_group("Runners")["group_id"], create_group("Riders")["group_id"]
+    add_member(runners, "p1")
+    add_member(runners, "p2")
+    add_member(riders, "p1")
+
+    raw = make_raw(1, calories=500.0)
+    state = fake_strava([raw, make_raw(2, day=8, calories=300.0)])
+    from services.sync_service import sync_player_activities
+    await sync_player_activities("p1")
+
+    assert state.calls["athlete/activities"] == 1
+    for group_id in (None, runners, riders):
+        assert get_block_totals("block_2", group_id)["p1"]["Cycling"].calories == 800.0
+    assert db.collection("activities").document("1").get().to_dict()["player_id"] == "p1"
+
+
+def test_membership_changes_rebuild_group_rollups(db, client):
+    _athlete(db, "p1", "42")
+    record_activity(db, _ride("1", "p1", 450.0))
+    group_id = client.post("/api/groups", json={"name": "Office"}).json()["group_id"]
+    assert get_block_totals("block_2", group_id) == {}
+
+    assert client.post(f"/api/groups/{group_id}/members", json={"player_id": "p1"}).status_code == 200
+    assert get_block_totals("block_2", group_id)["p1"]["Cycling"].calories == 450.0
+    assert client.post(f"/api/groups/{group_id}/members", json={"player_id": "nobody"}).status_code == 404
+
+    assert client.delete(f"/api/groups/{group_id}/members/p1").status_code == 200
+    assert get_block_totals("block_2", group_id) == {}
+    assert db.collection("athletes").document("p1").get().to_dict()["groups"] == []
+
+
+def test_group_only_athletes_stay_out_of_the_root_competition(db, client):
+    _athlete(db, "p1", "42")
+    group_id = client.post("/api/groups", json={"name": "Office"}).json()["group_id"]
+    resp = client.post("/api/register", json={"display_name": "Ann", "group_id": group_id})
+    ann = resp.json()["player_id"]
+    assert client.post("/api/register", json={"display_name": "Bo", "group_id": "nope"}).status_code == 404
+
+    assert db.collection("athletes").document(ann).get().to_dict()["groups"] == [group_id]
+    record_activity(db, _ride("1", ann, 450.0))
+    assert get_block_totals("block_2", group_id)[ann]["Cycling"].calories == 450.0
+    # Her activity adds no write to the root rollup, and she is not on the root roster
+    assert not db.collection("rollups").document("block_2").get().exists
+    assert [p["id"] for p in client.get("/api/dashboard").json()["players"]] == ["p1"]
+    assert [p["id"] for p in client.get(f"/api/groups/{group_id}/dashboard").json()["players"]] == [ann]
+
+
+def test_group_scoring_reads_and_writes_only_that_group(db, client):
+    for pid, strava_id in (("p1", "42"), ("p2", "43")):
+        _athlete(db, pid, strava_id)
+    small = create_group("Small")["group_id"]
+    big = create_group("Big")["group_id"]
+    for pid in ("p1", "p2"):
+        add_member(small, pid)
+    for i in range(40):
+        _athlete(db, f"x{i}", str(100 + i))
+        add_member(big, f"x{i}")
+    record_activity(db, _ride("1", "p1", 500.0))
+    record_activity(db, _ride("2", "p2", 300.0))
+
+    db.reset_stats()
+    resp = client.post(f"/api/groups/{small}/scores/calculate/block_2")
+    assert resp.status_code == 200
+    assert resp.json()["scores"]["total_points"] == {"p1": 2, "p2": 0}
+    # Members, block, rollup and scores of this group; never the big group's 40 members
+    assert db.stats["reads:groups"] < 10
+    assert db.stats["reads:athletes"] == 0
+    assert db.stats["reads:activities"] == 0
+
+    assert db.collection("groups").document(small).collection("blocks").document("block_2").get().to_dict()["locked"]
+    assert not db.collection("groups").document(big).collection("blocks").document("block_2").get().to_dict()["locked"]
+    assert not db.collection("blocks").document("block_2").get().to_dict()["locked"]
+    assert not db.collection("scores").document("block_2").get().exists
+    assert client.post(f"/api/groups/{small}/scores/calculate/block_2").status_code == 400
+
+    dashboard = client.get(f"/api/groups/{small}/dashboard").json()
+    assert dashboard["scoreboard"]["totals"] == {"p1": 2, "p2": 0}
+    assert client.get("/api/groups/missing/dashboard").status_code == 404
+
+
+def test_due_group_blocks_and_scheduled_job(db, client):
+    group_id = create_group("League")["group_id"]
+    march_10 = datetime(2026, 3, 10, tzinfo=timezone.utc)
+    assert due_group_blocks(march_10) == [(group_id, "block_1"), (group_id, "block_2")]
+
+    result = client.post("/api/scores/calculate-job").json()
+    assert result["groups"] == {group_id: ["block_1", "block_2", "block_3", "block_4", "block_5"]}
+    assert due_group_blocks() == []
+    assert result["block_id"] == "block_5"  # the root competition is scored as before
+
+
+def test_member_profiles_follow_the_athlete_document(db, client):
+    db.collection("athletes").document("p1").set({"display_name": "Player 1", "status": "pending"})
+    group_id = client.post("/api/groups", json={"name": "Office"}).json()["group_id"]
+    client.post(f"/api/groups/{group_id}/members", json={"player_id": "p1"})
+    assert set(db.collection("groups").document(group_id).collection("athletes").document("p1")
+               .get().to_dict()) == {"joined_at"}
+
+    # The OAuth callback only updates the root athlete document
+    db.collection("athletes").document("p1").update({
+        "display_name": "Ann", "status": "connected", "access_token": "secret",
+    })
+
+    [player] = client.get(f"/api/groups/{group_id}/dashboard").json()["players"]
+    assert (player["display_name"], player["status"]) == ("Ann", "connected")
+    assert "access_token" not in player
+    [member] = client.get(f"/api/groups/{group_id}").json()["players"]
+    assert (member["display_name"], member["status"]) == ("Ann", "connected")
+    assert "access_token" not in member and member["joined_at"]
@@ -0,0 +1,63 @@
+"""
+Tests for heart-rate calorie estimates: the Keytel model on arrays, stream
+fetching only when needed, and the cached reduced result.
+"""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from services.block_service import seed_blocks
+from services.calorie_service import estimate_from_heart_rate
+
+
+def test_keytel_model_on_steady_stream():
+    t = np.arange(0, 3601)
+    result = estimate_from_heart_rate(np.full(3601, 150), t, weight_kg=70, age=35, sex="M")
+
+    kj_per_min = -55.0969 + 0.6309 * 150 + 0.1988 * 70 + 0.2017 * 35
+    assert result["calories"] == pytest.approx(kj_per_min * 60 / 4.184, abs=0.01)
+    assert (result["avg_hr"], result["samples"], result["minutes"]) == (150.0, 3601, 60.0)
+
+
+def test_pauses_and_dropouts_are_not_counted():
+    t = np.concatenate([np.arange(0, 1800), np.arange(5400, 7200)])  # 1 h paused in the middle
+    steady = estimate_from_heart_rate(np.full(len(t), 140), t, weight_kg=70, sex="F")
+    assert steady["minutes"] == pytest.approx(60.0, abs=1)  # the gap counts as at most 30 s
+
+    hr = np.full(3600, 140.0)
+    hr[::3] = 0  # a third of the readings dropped out
+    assert estimate_from_heart_rate(hr, np.arange(3600), weight_kg=70)["samples"] == 2400
+
+    hr[::2] = 0
+    hr[1::4] = 0
+    assert estimate_from_heart_rate(hr, np.arange(3600), weight_kg=70) is None
+
+
+def _no_energy(make_raw, activity_id, has_heartrate):
+    raw = make_raw(activity_id, day=9, calories=0.0)
+    raw["has_heartrate"] = has_heartrate
+    return raw
+
+
+@pytest.mark.asyncio
+async def test_sync_uses_heart_rate_only_when_available_and_caches_result(db, fake_strava, make_raw):
+    seed_blocks()
+    db.collection("athletes").document("p1").set({
+        "strava_athlete_id": "42", "access_token": "access-42", "token_expiry": 2**31,
+    })
+    state = fake_strava([_no_energy(make_raw, 1, True), _no_energy(make_raw, 2, False)])
+    with patch("services.heart_rate_service.HR_CALORIES_ENABLED", True):
+        from services.sync_service import sync_player_activities
+        from services.heart_rate_service import heart_rate_calories
+        await sync_player_activities("p1")
+        cached = await heart_rate_calories("access-42", "1", 70.0)
+
+    with_hr = db.collection("activities").document("1").get().to_dict()
+    without_hr = db.collection("activities").document("2").get().to_dict()
+    assert with_hr["calorie_source"] == "heart_rate_estimated"
+    assert without_hr["calorie_source"] == "met_estimated"
+    assert state.calls["activities/{id}/streams"] == 1
+    assert cached == with_hr["calories"]
+    estimate = db.collection("hr_estimates").document("1").get().to_dict()
+    assert set(estimate) == {"calories", "avg_hr", "samples", "minutes", "model", "computed_at"}
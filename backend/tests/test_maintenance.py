@@ -0,0 +1,55 @@
+"""
+Tests for bulk deletes used by admin reset and test-data clearing.
+"""
+from fastapi.testclient import TestClient
+
+from config import BLOCK_DEFINITIONS
+from services.group_service import add_member, create_group
+from services.maintenance_service import delete_collection
+
+
+def fill(db, collection: str, count: int) -> None:
+    writer = db.bulk_writer()
+    for i in range(count):
+        writer.set(db.collection(collection).document(f"{i:05d}"), {"i": i})
+    writer.close()
+
+
+def test_delete_collection_batches_and_reports_progress(db):
+    fill(db, "activities", 1234)
+    fill(db, "scores", 3)
+    db.reset_stats()
+    progress = []
+
+    deleted = delete_collection(db, "activities", on_progress=lambda c, n: progress.append(n))
+    round_trips = db.stats["round_trips"]
+
+    assert deleted == 1234
+    assert len(progress) == 3 and max(progress) == 1234
+    assert list(db.collection("activities").stream()) == []
+    assert len(list(db.collection("scores").stream())) == 3
+    # 3 key-only page reads + 3 batch commits, not one round trip per document
+    assert round_trips == 6
+
+
+def test_admin_reset_clears_and_reseeds_players(db):
+    from main import app
+    fill(db, "activities", 700)
+    fill(db, "athletes", 4)
+    group_id = create_group("Runners")["group_id"]
+    add_member(group_id, "00001")
+    db.collection("counters").document("athletes").set({"last": 4})
+
+    resp = TestClient(app).get("/api/admin/reset")
+
+    assert resp.status_code == 200
+    assert resp.json()["deleted"] == {
+        "athletes": 4, "activities": 700, "scores": 0, "rollups": 0, "sync_checkpoints": 0, "counters": 1,
+        # The group, its blocks and rollups, and its one membership
+        "groups": 1 + 2 * len(BLOCK_DEFINITIONS) + 1,
+    }
+    assert list(db.collection("activities").stream()) == []
+    assert sorted(d.id for d in db.collection("athletes").stream()) == ["player_1", "player_2"]
+    for name in ("groups", "athletes", "blocks", "rollups", "counters"):
+        assert [d.reference.path for d in db.collection_group(name).stream()
+                if d.reference.path.startswith(("groups/", "counters/"))] == []
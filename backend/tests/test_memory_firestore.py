@@ -0,0 +1,152 @@
+"""
+Unit tests for the in-memory Firestore stand-in.
+Tests cover: document writes and transforms, query operators, ordering and
+cursors, projections, batches, transactions, get_all and op counters.
+"""
+import pytest
+from google.api_core.exceptions import NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter, Or
+from memory_firestore import InMemoryFirestore, MAX_BATCH_WRITES
+
+
+@pytest.fixture
+def fdb():
+    db = InMemoryFirestore()
+    acts = db.collection("activities")
+    for i, (pid, sport, cals) in enumerate([
+        ("p1", "Cycling", 800),
+        ("p1", "Running", 600),
+        ("p2", "Cycling", 500),
+        ("p2", "Swimming", 300),
+        ("p1", "Cycling", 200),
+    ]):
+        acts.document(f"a{i}").set({
+            "activity_id": f"a{i}",
+            "player_id": pid,
+            "sport_category": sport,
+            "calories": cals,
+            "start_date_utc": f"2026-03-0{i + 1}T10:00:00+00:00",
+            "tags": ["morning"] if i % 2 else ["evening"],
+        })
+    db.reset_stats()
+    return db
+
+
+class TestDocuments:
+
+    def test_set_get_update_delete(self):
+        db = InMemoryFirestore()
+        ref = db.collection("athletes").document("p1")
+        assert ref.get().exists is False
+
+        ref.set({"name": "A", "stats": {"rides": 1}})
+        ref.update({"stats.rides": firestore.Increment(2), "status": "connected"})
+        assert ref.get().to_dict() == {"name": "A", "stats": {"rides": 3}, "status": "connected"}
+
+        ref.set({"stats": {"runs": 1}}, merge=True)
+        assert ref.get().to_dict()["stats"] == {"rides": 3, "runs": 1}
+
+        ref.delete()
+        assert ref.get().exists is False
+
+    def test_update_missing_document_raises(self):
+        db = InMemoryFirestore()
+        with pytest.raises(NotFound):
+            db.collection("athletes").document("nope").update({"x": 1})
+
+    def test_snapshots_are_isolated_from_store(self):
+        db = InMemoryFirestore()
+        ref = db.collection("athletes").document("p1")
+        ref.set({"stats": {"rides": 1}})
+        ref.get().to_dict()["stats"]["rides"] = 99
+        assert ref.get().to_dict()["stats"]["rides"] == 1
+
+    def test_subcollections(self):
+        db = InMemoryFirestore()
+        group = db.collection("groups").document("g1")
+        group.collection("athletes").document("p1").set({"name": "A"})
+        db.collection("groups").document("g2").collection("athletes").document("p1").set({"name": "B"})
+
+        assert [d.to_dict()["name"] for d in group.collection("athletes").stream()] == ["A"]
+        assert len(list(db.collection_group("athletes").stream())) == 2
+        assert [c.id for c in group.collections()] == ["athletes"]
+
+
+class TestQueries:
+
+    def test_operators(self, fdb):
+        acts = fdb.collection("activities")
+        assert len(list(acts.where("calories", ">=", 500).stream())) == 3
+        assert len(list(acts.where("player_id", "!=", "p1").stream())) == 2
+        assert len(list(acts.where("sport_category", "in", ["Running", "Swimming"]).stream())) == 2
+        assert len(list(acts.where("tags", "array_contains", "morning").stream())) == 2
+        assert len(list(acts.where(filter=FieldFilter("calories", "<", 300)).stream())) == 1
+        either = Or([FieldFilter("calories", "==", 800), FieldFilter("calories", "==", 300)])
+        assert len(list(acts.where(filter=either).stream())) == 2
+
+    def test_order_limit_and_cursor(self, fdb):
+        query = (
+            fdb.collection("activities")
+            .where("player_id", "==", "p1")
+            .order_by("calories", direction=firestore.Query.DESCENDING)
+        )
+        first = list(query.limit(2).stream())
+        assert [d.id for d in first] == ["a0", "a1"]
+        rest = list(query.start_after(first[-1]).stream())
+        assert [d.id for d in rest] == ["a4"]
+        by_value = list(query.start_after({"calories": 800}).stream())
+        assert [d.id for d in by_value] == ["a1", "a4"]
+
+    def test_select_projects_fields(self, fdb):
+        docs = list(fdb.collection("activities").select(["calories"]).stream())
+        assert all(d.to_dict().keys() == {"calories"} for d in docs)
+        assert all(d.to_dict() == {} for d in fdb.collection("activities").select([]).stream())
+
+    def test_count(self, fdb):
+        result = fdb.collection("activities").where("player_id", "==", "p2").count().get()
+        assert result[0][0].value == 2
+
+
+class TestWritesAndCounters:
+
+    def test_batch_is_atomic(self):
+        db = InMemoryFirestore()
+        batch = db.batch()
+        batch.set(db.collection("a").document("1"), {"x": 1})
+        batch.update(db.collection("a").document("missing"), {"x": 2})
+        with pytest.raises(NotFound):
+            batch.commit()
+        assert db.collection("a").document("1").get().exists is False
+
+    def test_batch_limit(self):
+        db = InMemoryFirestore()
+        batch = db.batch()
+        for i in range(MAX_BATCH_WRITES + 1):
+            batch.set(db.collection("a").document(str(i)), {"i": i})
+        with pytest.raises(ValueError):
+            batch.commit()
+
+    def test_transactional_decorator(self):
+        db = InMemoryFirestore()
+        counter = db.collection("meta").document("counter")
+        counter.set({"n": 0})
+
+        @firestore.transactional
+        def bump(transaction):
+            n = counter.get(transaction=transaction).to_dict()["n"] + 1
+            transaction.update(counter, {"n": n})
+            return n
+
+        assert bump(db.transaction()) == 1
+        assert bump(db.transaction()) == 2
+
+    def test_round_trip_counters(self, fdb):
+        refs = [fdb.collection("activities").document(f"a{i}") for i in range(3)]
+        snaps = list(fdb.get_all(refs))
+        assert len(snaps) == 3
+        list(fdb.collection("activities").where("player_id", "==", "nobody").stream())
+
+        assert fdb.stats["round_trips"] == 2
+        assert fdb.stats["reads"] == 4           # 3 documents + 1 for an empty query
+        assert fdb.stats["reads:activities"] == 4
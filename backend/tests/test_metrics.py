@@ -0,0 +1,43 @@
+"""
+Tests for the /metrics endpoint and hot-path instrumentation.
+"""
+import time
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def sample(metric: str, **labels) -> float:
+    return REGISTRY.get_sample_value(metric, labels) or 0.0
+
+
+def test_sync_and_dashboard_are_instrumented(db, fake_strava, make_raw):
+    from main import app
+    db.collection("athletes").document("player_1").set({
+        "status": "connected",
+        "strava_athlete_id": "42",
+        "access_token": "access-42",
+        "token_expiry": int(time.time()) + 3600,
+    })
+    before = {
+        "detail": sample("strava_request_duration_seconds_count", endpoint="activities/{id}", status="200"),
+        "stage": sample("sync_stage_duration_seconds_count", stage="list_activities"),
+        "written": sample("firestore_documents_total", collection="activities", op="write"),
+        "dashboard": sample("computation_duration_seconds_count", name="dashboard"),
+    }
+    fake_strava([make_raw(i) for i in range(2)])
+
+    client = TestClient(app)
+    assert client.post("/api/activities/sync/player_1").status_code == 200
+    assert client.get("/api/dashboard").status_code == 200
+
+    assert sample("strava_request_duration_seconds_count",
+                  endpoint="activities/{id}", status="200") == before["detail"] + 2
+    # One wait per page, plus the one that finds the end of the list
+    assert sample("sync_stage_duration_seconds_count", stage="list_activities") == before["stage"] + 2
+    assert sample("firestore_documents_total", collection="activities", op="write") == before["written"] + 2
+    assert sample("computation_duration_seconds_count", name="dashboard") == before["dashboard"] + 1
+
+    body = client.get("/metrics").text
+    assert 'http_request_firestore_reads_count{route="/api/dashboard"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/activities/sync/{player_id}",status="200"}' in body
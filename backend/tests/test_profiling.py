@@ -0,0 +1,62 @@
+"""
+Tests for the opt-in request profiler and the admin profile endpoints.
+"""
+import marshal
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import profiling
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+    profiling._profiles.clear()
+    with patch("profiling.ADMIN_TOKEN", "secret"):
+        yield TestClient(app)
+    profiling._profiles.clear()
+
+
+def test_header_requires_admin_token(client):
+    resp = client.get("/api/dashboard", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+    assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_profiled_request_can_be_downloaded(client):
+    resp = client.get("/api/dashboard", headers={"X-Profile": "1", **ADMIN})
+    profile_id = resp.headers["x-profile-id"]
+
+    listed = client.get("/api/admin/profiles", headers=ADMIN).json()["profiles"]
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["path"] == "/api/dashboard"
+    assert listed[0]["trigger"] == "header"
+
+    text = client.get(f"/api/admin/profiles/{profile_id}", headers=ADMIN).text
+    assert "get_dashboard_data" in text
+    raw = client.get(f"/api/admin/profiles/{profile_id}?format=pstats", headers=ADMIN).content
+    assert any(func[2] == "get_dashboard_data" for func in marshal.loads(raw))
+
+
+def test_sampling_and_bounded_history(client):
+    with patch("profiling.PROFILE_SAMPLE_EVERY", 1), patch("profiling.PROFILE_HISTORY", 3):
+        for _ in range(5):
+            client.get("/health")
+    profiles = client.get("/api/admin/profiles", headers=ADMIN).json()["profiles"]
+    assert len(profiles) == 3
+    assert {p["trigger"] for p in profiles} == {"sampled"}
+
+
+def test_streaming_routes_are_never_profiled(client):
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/dashboard/stream",
+        "headers": [(b"x-profile", b"1"), (b"x-admin-token", b"secret")],
+    }
+    with patch("profiling.PROFILE_SAMPLE_EVERY", 1):
+        assert profiling._should_profile(scope) is None
+        assert profiling._should_profile({**scope, "path": "/api/dashboard"}) == "header"
@@ -0,0 +1,73 @@
+"""
+Tests for the replay engine: rescoring from raw activities, diffing against
+stored scores, no writes, and the process pool matching in-process results.
+"""
+from services.group_service import add_member, create_group
+from services.replay_service import audit_all_scores, audit_scores, load_competition, replay_competition
+from services.rollup_service import record_activity
+from services.scoring_service import calculate_block_scores
+from tests.test_rollups import activity
+
+
+def seed(db):
+    for pid in ("p1", "p2"):
+        db.collection("athletes").document(pid).set({"display_name": pid, "root": True})
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": False})
+    for i in range(20):
+        record_activity(db, activity(i, pid=("p1", "p2")[i % 2], calories=300.0 + i % 2))
+    calculate_block_scores("block_2")
+
+
+def test_replay_matches_stored_scores_and_writes_nothing(db):
+    seed(db)
+    db.reset_stats()
+
+    report = audit_scores(workers=0)
+
+    assert report["block_2"] == {"status": "match", "differences": []}
+    assert report["block_1"]["status"] == "unscored"
+    assert db.stats["writes"] == 0
+
+
+def test_replay_reports_drift_in_locked_block(db):
+    seed(db)
+    # Edit a stored activity behind the rollup's back: p1 now out-burns p2
+    db.collection("activities").document("0").update({"calories": 400.0})
+
+    report = audit_scores(workers=0)["block_2"]
+
+    assert report["status"] == "differs"
+    fields = {d["field"]: (d["stored"], d["replayed"]) for d in report["differences"]}
+    assert fields["total_points.p1"] == (0, 2)
+    assert fields["points_by_sport.Running.p2"] == (2, 0)
+    assert fields["calories_by_sport.Running.p1"] == (3000.0, 3100.0)
+
+
+def test_groups_are_replayed_from_their_members_activities(db):
+    seed(db)
+    group_id = create_group("Solo")["group_id"]
+    add_member(group_id, "p1")
+    calculate_block_scores("block_2", group_id)
+
+    player_ids, by_block = load_competition(db, group_id)
+    assert player_ids == ["p1"]
+    assert {a.player_id for a in by_block["block_2"]} == {"p1"}
+    assert audit_scores(workers=0, group_id=group_id)["block_2"]["status"] == "match"
+
+    # p2's activities are not in the group; p1's are
+    db.collection("activities").document("1").update({"calories": 900.0})
+    assert audit_scores(workers=0, group_id=group_id)["block_2"]["status"] == "match"
+    db.collection("activities").document("0").update({"calories": 400.0})
+
+    reports = audit_all_scores(workers=0)
+    assert list(reports) == [None, group_id]
+    assert reports[None]["block_2"]["status"] == "differs"
+    [diff] = reports[group_id]["block_2"]["differences"]
+    assert diff == {"field": "calories_by_sport.Running.p1", "stored": 3000.0, "replayed": 3100.0}
+
+
+def test_process_pool_matches_in_process(db):
+    seed(db)
+    player_ids, by_block = load_competition(db)
+    assert replay_competition(player_ids, by_block, workers=2) == \
+        replay_competition(player_ids, by_block, workers=0)
@@ -0,0 +1,36 @@
+"""
+Tests for orjson responses and gzip compression.
+"""
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from responses import ORJSONResponse
+
+
+def test_orjson_response_handles_firestore_values():
+    body = ORJSONResponse({
+        "at": datetime(2026, 3, 1, tzinfo=timezone.utc),
+        "by_block": {1: "a"},
+        "sports": {"Running"},
+    }).body
+    assert body == b'{"at":"2026-03-01T00:00:00+00:00","by_block":{"1":"a"},"sports":["Running"]}'
+
+
+def test_large_listing_is_gzipped(db):
+    from main import app
+    for i in range(50):
+        db.collection("activities").document(f"a{i:02d}").set({
+            "activity_id": f"a{i:02d}",
+            "player_id": "player_1",
+            "start_date_utc": f"2026-03-01T10:{i:02d}:00+00:00",
+            "name": "Morning Ride",
+        })
+    client = TestClient(app)
+
+    resp = client.get("/api/activities/player_1", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert len(resp.json()["activities"]) == 50
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
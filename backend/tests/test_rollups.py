@@ -0,0 +1,149 @@
+"""
+Tests for block rollups: maintained at ingest and delete, read by scoring,
+rebuilt and verified against the activities.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from config import BLOCK_DEFINITIONS
+from models import Activity
+from services.block_service import seed_blocks
+from services.rollup_service import (
+    create_activities,
+    get_block_totals,
+    rebuild_rollup,
+    record_activity,
+    remove_activity,
+    verify_rollup,
+)
+
+
+def activity(aid, pid="p1", sport="Running", calories=400.0, source="strava_native"):
+    return Activity(
+        activity_id=str(aid), player_id=pid, sport_type="Run", sport_category=sport,
+        block_id="block_2", start_date_utc="2026-03-09T08:00:00+00:00",
+        calories=calories, calorie_source=source, distance_meters=5000, moving_time_seconds=1800,
+    )
+
+
+@pytest.fixture(autouse=True)
+def athletes(db):
+    for pid in ("p1", "p2"):
+        db.collection("athletes").document(pid).set({"display_name": pid, "root": True})
+
+
+def test_ingest_and_delete_keep_rollup_in_step(db):
+    record_activity(db, activity(1, calories=400.0))
+    record_activity(db, activity(2, calories=250.5, source="met_estimated"))
+    record_activity(db, activity(3, pid="p2", sport="Cycling", calories=900.0))
+
+    totals = get_block_totals("block_2")
+    assert totals["p1"]["Running"].calories == pytest.approx(650.5)
+    assert totals["p1"]["Running"].count == 2
+    assert totals["p1"]["Running"].is_estimated is True
+    assert totals["p2"]["Cycling"].distance == 5000
+
+    remove_activity(db, activity(2, calories=250.5, source="met_estimated"))
+    remove_activity(db, activity(3, pid="p2", sport="Cycling", calories=900.0))
+
+    totals = get_block_totals("block_2")
+    assert totals["p1"]["Running"].is_estimated is False
+    assert totals["p1"]["Running"].count == 1
+    assert "p2" not in totals
+    assert verify_rollup("block_2") == []
+
+
+def test_create_activities_skips_stored_ones(db):
+    assert create_activities(db, [activity(1, calories=400.0)], playing=[None]) == [activity(1, calories=400.0)]
+
+    # A batch holding an already stored activity falls back to one per batch
+    created = create_activities(db, [activity(i, calories=400.0) for i in (0, 1, 2)], playing=[None])
+    assert [a.activity_id for a in created] == ["0", "2"]
+    assert create_activities(db, [activity(1)], playing=[None]) == []
+
+    assert get_block_totals("block_2")["p1"]["Running"].count == 3
+    assert get_block_totals("block_2")["p1"]["Running"].calories == pytest.approx(1200.0)
+    assert verify_rollup("block_2") == []
+
+
+def test_missing_rollup_is_rebuilt_and_drift_is_reported(db):
+    for i in range(3):
+        db.collection("activities").document(str(i)).set(activity(i).to_firestore())
+
+    assert verify_rollup("block_2")[0]["expected"]["count"] == 3
+    assert get_block_totals("block_2")["p1"]["Running"].count == 3
+    assert db.collection("rollups").document("block_2").get().exists
+
+    db.collection("activities").document("9").set(activity(9).to_firestore())
+    [mismatch] = verify_rollup("block_2")
+    assert (mismatch["stored"]["count"], mismatch["expected"]["count"]) == (3, 4)
+    rebuild_rollup("block_2")
+    assert verify_rollup("block_2") == []
+
+
+def test_rollup_started_by_increments_is_rebuilt_once(db):
+    # Activities stored before rollups existed, then the first sync after the upgrade
+    for i in range(3):
+        db.collection("activities").document(str(i)).set(activity(i).to_firestore())
+    create_activities(db, [activity(3)], playing=[None])
+    assert db.collection("rollups").document("block_2").get().to_dict()["players"]["p1"]["Running"]["count"] == 1
+
+    assert get_block_totals("block_2")["p1"]["Running"].count == 4
+    create_activities(db, [activity(4)], playing=[None])
+    db.reset_stats()
+    assert get_block_totals("block_2")["p1"]["Running"].count == 5
+    assert db.stats["reads:activities"] == 0
+    assert verify_rollup("block_2") == []
+
+
+def test_scoring_reads_rollup_not_activities(db):
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": False})
+    rebuild_rollup("block_2")
+    for i in range(200):
+        record_activity(db, activity(i, pid=("p1", "p2")[i % 2], calories=100.0 + i % 2))
+    db.reset_stats()
+
+    from services.scoring_service import calculate_block_scores
+    score = calculate_block_scores("block_2")
+
+    assert score["points_by_sport"]["Running"] == {"p1": 0, "p2": 2}
+    assert score["details_by_player_sport"]["p2"]["Running"]["count"] == 100
+    assert db.stats["reads:activities"] == 0
+    assert db.stats["reads:rollups"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_maintains_rollups(db, fake_strava, make_raw):
+    seed_blocks()
+    db.collection("athletes").document("p1").set({
+        "strava_athlete_id": "42", "access_token": "access-42", "token_expiry": 2**31, "root": True,
+    })
+    fake_strava([make_raw(i, day=1 + i % 28) for i in range(40)])
+    from services.sync_service import sync_player_activities
+    result = await sync_player_activities("p1")
+
+    rolled_up = sum(
+        t.count
+        for b in BLOCK_DEFINITIONS
+        for sports in get_block_totals(b["block_id"]).values()
+        for t in sports.values()
+    )
+    assert result["new"] > 0
+    assert rolled_up == result["new"] - result["duplicates"]  # same-day rides overlap
+    assert all(verify_rollup(b["block_id"]) == [] for b in BLOCK_DEFINITIONS)
+
+
+def test_webhook_delete_updates_rollup(db, monkeypatch):
+    from main import app
+    monkeypatch.setattr("routers.webhooks.STRAVA_WEBHOOK_SUBSCRIPTION_ID", "7")
+    db.collection("athletes").document("p1").set({"strava_athlete_id": "42", "root": True})
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": False})
+    record_activity(db, activity(1))
+    record_activity(db, activity(2))
+
+    resp = TestClient(app).post("/api/webhooks/strava", json={
+        "object_type": "activity", "aspect_type": "delete", "object_id": 1, "owner_id": 42, "subscription_id": 7,
+    })
+
+    assert resp.json()["status"] == "deleted"
+    assert get_block_totals("block_2")["p1"]["Running"].count == 1
@@ -4,67 +4,24 @@ Tests cover: base scoring, clean sweep eligibility, clean sweep bonus,
 Block 1 edge case, and locked block immutability.
 """
 import pytest
-from unittest.mock import MagicMock, patch
-from collections import defaultdict
-from datetime import datetime, timezone
-
-
-# ─── Helpers to build a mock Firestore ───
-
-class MockDoc:
-    def __init__(self, doc_id, data, exists=True):
-        self.id = doc_id
-        self._data = data
-        self.exists = exists
-        self.reference = MagicMock()
-
-    def to_dict(self):
-        return self._data
-
-
-class MockCollection:
-    def __init__(self, docs=None):
-        self._docs = {d.id: d for d in (docs or [])}
-
-    def document(self, doc_id):
-        ref = MagicMock()
-        doc = self._docs.get(doc_id, MockDoc(doc_id, {}, exists=False))
-        ref.get.return_value = doc
-        ref.set = MagicMock()
-        ref.update = MagicMock()
-        return ref
-
-    def where(self, field, op, value):
-        results = [d for d in self._docs.values() if d._data.get(field) == value]
-        mock = MagicMock()
-        mock.stream.return_value = results
-        return mock
-
-    def stream(self):
-        return list(self._docs.values())
-
-
-class MockDB:
-    def __init__(self, collections):
-        self._colls = collections
-
-    def collection(self, name):
-        return self._colls.get(name, MockCollection())
+from unittest.mock import patch
+from memory_firestore import InMemoryFirestore
 
 
 # ─── Test fixtures ───
 
 def make_player(pid, name):
-    return MockDoc(pid, {
+    return pid, {
         "display_name": name,
         "status": "connected",
         "strava_athlete_id": f"strava_{pid}",
-    })
+        "root": True,
+    }
 
 
 def make_activity(aid, pid, sport_type, sport_cat, block_id, calories,
                   distance=5000, time_s=1800):
-    return MockDoc(str(aid), {
+    return str(aid), {
         "activity_id": str(aid),
         "player_id": pid,
         "sport_type": sport_type,
@@ -74,15 +31,42 @@ def make_activity(aid, pid, sport_type, sport_cat, block_id, calories,
         "distance_meters": distance,
         "moving_time_seconds": time_s,
         "start_date_utc": "2026-03-07T10:00:00+00:00",
-    })
+    }
 
 
 def make_block(block_id, locked=False):
-    return MockDoc(block_id, {
+    return block_id, {
         "block_id": block_id,
         "locked": locked,
         "calculated_at": None,
-    })
+    }
+
+
+def make_db(players=(), blocks=(), activities=()):
+    """
+    In-memory Firestore seeded with the given (doc_id, data) pairs, plus the
+    block rollups that ingest would have maintained for the activities.
+    """
+    from models import Activity
+    from services.rollup_service import rollup_document
+    db = InMemoryFirestore()
+    for name, docs in (("athletes", players), ("blocks", blocks), ("activities", activities)):
+        for doc_id, data in docs:
+            db.collection(name).document(doc_id).set(data)
+    records = [Activity.from_firestore(data) for _, data in activities]
+    for block_id in {a.block_id for a in records}:
+        db.collection("rollups").document(block_id).set(
+            rollup_document(block_id, [a for a in records if a.block_id == block_id])
+        )
+    db.reset_stats()
+    return db
+
+
+def run_scoring(db, block_id):
+    """Run calculate_block_scores with `db` behind firebase_client.get_db()."""
+    with patch("firebase_client._db", db):
+        from services.scoring_service import calculate_block_scores
+        return calculate_block_scores(block_id)
 
 
 # ─── Tests ───
@@ -91,20 +75,10 @@ class TestBaseScoring:
     """Test basic point-award logic."""
 
     def _run_scoring(self, activities, block_id="block_2"):
-        """Helper to run calculate_block_scores with mock Firestore."""
+        """Helper to run calculate_block_scores against an in-memory Firestore."""
         players = [make_player("p1", "Alpha"), make_player("p2", "Beta")]
         blocks = [make_block(block_id, locked=False)]
-
-        db = MockDB({
-            "athletes": MockCollection(players),
-            "blocks": MockCollection(blocks),
-            "activities": MockCollection(activities),
-            "scores": MockCollection(),
-        })
-
-        with patch("backend.services.scoring_service.get_db", return_value=db):
-            from services.scoring_service import calculate_block_scores
-            return calculate_block_scores(block_id)
+        return run_scoring(make_db(players, blocks, activities), block_id)
 
     def test_higher_calories_wins(self):
         """Player with more calories gets 2 points."""
@@ -174,15 +148,7 @@ class TestCleanSweep:
     def _run_scoring(self, activities, block_id="block_2"):
         players = [make_player("p1", "Alpha"), make_player("p2", "Beta")]
         blocks = [make_block(block_id, locked=False)]
-        db = MockDB({
-            "athletes": MockCollection(players),
-            "blocks": MockCollection(blocks),
-            "activities": MockCollection(activities),
-            "scores": MockCollection(),
-        })
-        with patch("backend.services.scoring_service.get_db", return_value=db):
-            from services.scoring_service import calculate_block_scores
-            return calculate_block_scores(block_id)
+        return run_scoring(make_db(players, blocks, activities), block_id)
 
     def test_clean_sweep_achieved(self):
         """Player wins all 3 sports + both logged all 3 → +1 bonus."""
@@ -241,15 +207,7 @@ class TestBlock1EdgeCase:
     def _run_scoring(self, activities):
         players = [make_player("p1", "Alpha"), make_player("p2", "Beta")]
         blocks = [make_block("block_1", locked=False)]
-        db = MockDB({
-            "athletes": MockCollection(players),
-            "blocks": MockCollection(blocks),
-            "activities": MockCollection(activities),
-            "scores": MockCollection(),
-        })
-        with patch("backend.services.scoring_service.get_db", return_value=db):
-            from services.scoring_service import calculate_block_scores
-            return calculate_block_scores("block_1")
+        return run_scoring(make_db(players, blocks, activities), "block_1")
 
     def test_block1_swim_winner_gets_3(self):
         """Block 1: swimming winner gets 2 base + 1 bonus = 3."""
@@ -283,13 +241,66 @@ class TestLockedBlockImmutability:
     def test_locked_block_raises(self):
         players = [make_player("p1", "Alpha"), make_player("p2", "Beta")]
         blocks = [make_block("block_2", locked=True)]
-        db = MockDB({
-            "athletes": MockCollection(players),
-            "blocks": MockCollection(blocks),
-            "activities": MockCollection(),
-            "scores": MockCollection(),
-        })
-        with patch("backend.services.scoring_service.get_db", return_value=db):
-            from services.scoring_service import calculate_block_scores
-            with pytest.raises(ValueError, match="already locked"):
-                calculate_block_scores("block_2")
+        db = make_db(players, blocks)
+        with pytest.raises(ValueError, match="already locked"):
+            run_scoring(db, "block_2")
+
+    def test_scoring_writes_and_locks(self):
+        """Scores are persisted and the block is locked, in a fixed number of round trips."""
+        players = [make_player("p1", "Alpha"), make_player("p2", "Beta")]
+        db = make_db(players, [make_block("block_1")], [
+            make_activity(1, "p1", "Swim", "Swimming", "block_1", 450),
+        ])
+        run_scoring(db, "block_1")
+        stats = dict(db.stats)
+
+        assert db.collection("scores").document("block_1").get().to_dict()["total_points"]["p1"] == 3
+        assert db.collection("blocks").document("block_1").get().to_dict()["locked"] is True
+        # block read, athletes query, rollup read, score write, lock update
+        assert stats["round_trips"] == 5
+        assert stats["writes"] == 2
+
+
+class TestAggregation:
+    """Test typed activity records and the pure aggregation/scoring helpers."""
+
+    def test_activity_round_trip(self):
+        doc = make_activity(1, "p1", "Ride", "Cycling", "block_2", 800)[1]
+        from models import Activity
+        record = Activity.from_firestore(doc)
+        assert record.calories == 800
+        assert record.calorie_source == "strava_native"
+        assert Activity.from_firestore(record.to_firestore()) == record
+
+    def test_aggregate_sums_per_player_sport(self):
+        from models import Activity
+        from services.scoring_service import aggregate_activities
+        records = [
+            Activity.from_firestore(make_activity(1, "p1", "Ride", "Cycling", "block_2", 300)[1]),
+            Activity.from_firestore(make_activity(2, "p1", "GravelRide", "Cycling", "block_2", 200)[1]),
+            Activity.from_firestore({
+                **make_activity(3, "p2", "Run", "Running", "block_2", 400)[1],
+                "calorie_source": "met_estimated",
+            }),
+        ]
+        totals = aggregate_activities(records)
+
+        assert totals["p1"]["Cycling"].calories == 500
+        assert totals["p1"]["Cycling"].count == 2
+        assert totals["p1"]["Cycling"].distance == 10000
+        assert totals["p1"]["Cycling"].is_estimated is False
+        assert totals["p2"]["Running"].is_estimated is True
+        assert "Running" not in totals["p1"]
+
+    def test_score_block_is_pure(self):
+        from models import Activity
+        from services.scoring_service import aggregate_activities, score_block
+        totals = aggregate_activities([
+            Activity.from_firestore(make_activity(1, "p1", "Swim", "Swimming", "block_1", 450)[1]),
+            Activity.from_firestore(make_activity(2, "p2", "Swim", "Swimming", "block_1", 320)[1]),
+        ])
+        result = score_block("block_1", ["Swimming"], ["p1", "p2"], totals)
+
+        assert result["total_points"] == {"p1": 3, "p2": 0}
+        assert result["details_by_player_sport"]["p1"]["Swimming"]["count"] == 1
+        assert "locked" not in result
@@ -0,0 +1,56 @@
+"""
+Tests for the synthetic dataset generator: reproducible from its seed,
+Strava-shaped raw activities, unique ids, and stored records mapped the
+way sync maps them.
+"""
+from seed_test_data import FIRST_ACTIVITY_ID, generate_dataset
+
+RAW_FIELDS = {
+    "id", "athlete", "name", "sport_type", "type", "start_date", "moving_time", "elapsed_time",
+    "distance", "total_elevation_gain", "has_heartrate", "calories", "kilojoules",
+}
+
+
+def _dump(seed, athletes=5, per_athlete=30):
+    return [
+        (athlete, raw, stored.to_firestore() if stored else None)
+        for athlete, raw, stored in generate_dataset(seed, athletes, per_athlete)
+    ]
+
+
+def test_same_seed_gives_the_same_dataset():
+    assert _dump(7) == _dump(7)
+    assert _dump(7) != _dump(8)
+    # An athlete's activities do not depend on how many athletes follow
+    assert _dump(7, athletes=2) == _dump(7)[:len(_dump(7, athletes=2))]
+
+
+def test_ids_are_unique_and_uncapped_per_athlete():
+    rows = _dump(3, athletes=4, per_athlete=300)
+    ids = [raw["id"] for _, raw, _ in rows]
+    assert ids == list(range(FIRST_ACTIVITY_ID, FIRST_ACTIVITY_ID + len(ids)))
+    assert len({athlete["player_id"] for athlete, _, _ in rows}) == 4
+
+
+def test_output_shape():
+    rows = _dump(11)
+    assert any(stored is None for _, _, stored in rows)   # outside windows / wrong sport
+    sources = set()
+    for athlete, raw, stored in rows:
+        assert set(raw) == RAW_FIELDS
+        assert raw["athlete"]["id"] == int(athlete["strava_athlete_id"])
+        assert raw["start_date"].endswith("Z")
+        if stored is None:
+            continue
+        assert stored["activity_id"] == str(raw["id"])
+        assert stored["player_id"] == athlete["player_id"]
+        assert stored["block_id"].startswith("block_")
+        assert stored["calories"] > 0
+        sources.add(stored["calorie_source"])
+        if raw["calories"]:
+            assert (stored["calories"], stored["calorie_source"]) == (raw["calories"], "strava_native")
+        elif raw["kilojoules"]:
+            assert stored["calorie_source"] == "kilojoules_derived"
+        else:
+            assert stored["calorie_source"] == "met_estimated" and stored["calorie_confidence"]
+    assert sources == {"strava_native", "kilojoules_derived", "met_estimated"}
@@ -0,0 +1,94 @@
+"""
+Tests for schema-versioned lazy seeding.
+"""
+import copy
+from datetime import timedelta
+from unittest.mock import patch
+
+import firebase_client
+from config import BLOCK_DEFINITIONS
+from services.block_service import ensure_seeded
+from services.group_service import create_group
+
+
+def test_seeds_once_in_one_read_and_one_batch(db):
+    assert ensure_seeded() is True
+    assert db.stats["round_trips"] == 5      # schema get, groups, athletes, get_all, batch
+    assert len(list(db.collection("blocks").stream())) == len(BLOCK_DEFINITIONS)
+    assert sorted(d.id for d in db.collection("athletes").stream()) == ["player_1", "player_2"]
+
+    db.reset_stats()
+    assert ensure_seeded() is False
+    assert db.stats["round_trips"] == 1
+
+
+def test_schema_change_reseeds_without_overwriting(db):
+    ensure_seeded()
+    db.collection("athletes").document("player_1").update({"status": "connected"})
+    db.collection("blocks").document(BLOCK_DEFINITIONS[0]["block_id"]).delete()
+    db.collection("athletes").document("legacy").set({"display_name": "Registered before groups"})
+
+    with patch("services.block_service.schema_version", return_value="next"):
+        assert ensure_seeded() is True
+
+    assert db.collection("athletes").document("player_1").get().to_dict()["status"] == "connected"
+    assert db.collection("blocks").document(BLOCK_DEFINITIONS[0]["block_id"]).get().exists
+    assert db.collection("athletes").document("legacy").get().to_dict()["root"] is True
+
+
+def test_definition_changes_update_existing_blocks_but_keep_lock_state(db):
+    ensure_seeded()
+    group_id = create_group("Runners")["group_id"]
+    first = BLOCK_DEFINITIONS[0]["block_id"]
+    locked = {"locked": True, "calculated_at": "2026-03-02T12:00:00+00:00"}
+    db.collection("blocks").document(first).update(locked)
+    db.collection("groups").document(group_id).collection("blocks").document(first).update(locked)
+
+    changed = copy.deepcopy(BLOCK_DEFINITIONS)
+    changed[0]["label"] = "Opening week"
+    changed[0]["window_close_utc"] += timedelta(hours=12)
+    changed[0]["sports"] = ["Running"]
+    with patch("services.block_service.BLOCK_DEFINITIONS", changed):
+        db.reset_stats()
+        assert ensure_seeded() is True
+        assert db.stats["writes:blocks"] == 1
+        assert ensure_seeded() is False
+
+    for blocks in (db.collection("blocks"), db.collection("groups").document(group_id).collection("blocks")):
+        block = blocks.document(first).get().to_dict()
+        assert block == {
+            "block_id": first,
+            "label": "Opening week",
+            "window_open_utc": changed[0]["window_open_utc"].isoformat(),
+            "window_close_utc": changed[0]["window_close_utc"].isoformat(),
+            "sports": ["Running"],
+            **locked,
+        }
+        assert blocks.document(changed[1]["block_id"]).get().to_dict()["label"] == changed[1]["label"]
+
+
+def test_first_use_hook_runs_when_client_is_created(monkeypatch):
+    calls = []
+    monkeypatch.setenv("FIRESTORE_BACKEND", "memory")
+    monkeypatch.setattr(firebase_client, "_first_use_hooks", [lambda: calls.append(1)])
+    firebase_client.set_db(None)
+    try:
+        firebase_client.get_client()
+        firebase_client.get_client()
+        assert calls == [1]
+    finally:
+        firebase_client.set_db(None)
+
+
+def test_cold_start_request_sees_seeded_documents(monkeypatch):
+    # The first request creates the client, so seeding runs inside its unit of work
+    from fastapi.testclient import TestClient
+    from main import app
+    monkeypatch.setenv("FIRESTORE_BACKEND", "memory")
+    firebase_client.set_db(None)
+    try:
+        resp = TestClient(app).post("/api/activities/sync/player_1")
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Player not connected to Strava"
+    finally:
+        firebase_client.set_db(None)
@@ -0,0 +1,60 @@
+"""
+Tests for static dashboard snapshot export and serving.
+"""
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.snapshot_service import export_dashboard_snapshot
+from tests.test_dashboard import seed
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    with patch("services.snapshot_service.DASHBOARD_SNAPSHOT_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def test_export_writes_versioned_and_latest_files(db, snapshot_dir):
+    seed(db)
+    result = export_dashboard_snapshot()
+
+    latest = json.loads((snapshot_dir / "dashboard.json").read_text())
+    assert latest["version"] == result["version"]
+    assert latest["scoreboard"]["totals"] == {"p1": 6, "p2": 2}
+    assert os.path.basename(result["path"]) == f"dashboard-{result['version']}.json"
+
+
+def test_export_disabled_without_directory(db):
+    with patch("services.snapshot_service.DASHBOARD_SNAPSHOT_DIR", ""):
+        assert export_dashboard_snapshot() is None
+
+
+def test_snapshot_endpoints_serve_with_cache_headers(db, snapshot_dir):
+    from main import app
+    seed(db)
+    client = TestClient(app)
+    assert client.get("/api/dashboard/snapshot").status_code == 404
+
+    version = export_dashboard_snapshot()["version"]
+    resp = client.get("/api/dashboard/snapshot")
+    assert resp.status_code == 200
+    assert resp.json()["version"] == version
+    assert "max-age=300" in resp.headers["cache-control"]
+    assert client.get("/api/dashboard/snapshot",
+                      headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+
+    pinned = client.get(f"/api/dashboard/snapshot/{version}")
+    assert pinned.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_locking_a_block_exports_a_snapshot(db, snapshot_dir):
+    from main import app
+    from services.block_service import ensure_seeded
+    ensure_seeded()
+    resp = TestClient(app).post("/api/scores/calculate/block_1")
+    assert resp.status_code == 200
+    assert (snapshot_dir / "dashboard.json").exists()
@@ -0,0 +1,84 @@
+"""
+Tests for the SQLite document store: the in-memory client's test suite
+re-run against SQLite, plus persistence, value round-trips and index use.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from google.cloud import firestore
+
+from sqlite_firestore import SQLiteFirestore
+from tests import test_memory_firestore as shared
+from tests.test_memory_firestore import fdb  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(monkeypatch):
+    monkeypatch.setattr(shared, "InMemoryFirestore", SQLiteFirestore)
+
+
+class TestDocuments(shared.TestDocuments):
+    pass
+
+
+class TestQueries(shared.TestQueries):
+    pass
+
+
+class TestWritesAndCounters(shared.TestWritesAndCounters):
+    pass
+
+
+def test_data_persists_across_connections(tmp_path):
+    path = str(tmp_path / "store.db")
+    db = SQLiteFirestore(path)
+    db.collection("athletes").document("p1").set({
+        "joined": datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc),
+        "best": db.collection("activities").document("a1"),
+        "tags": ["$ts"],
+    })
+    db.collection("groups").document("g1").set({"name": "G"})
+    db.collection("groups").document("g1").collection("athletes").document("p2").set({"name": "B"})
+    db.close()
+
+    reopened = SQLiteFirestore(path)
+    data = reopened.collection("athletes").document("p1").get().to_dict()
+    assert data["joined"] == datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc)
+    assert data["best"].path == "activities/a1"
+    assert data["tags"] == ["$ts"]
+    assert [c.id for c in reopened.collections()] == ["athletes", "groups"]
+    assert len(list(reopened.collection_group("athletes").stream())) == 2
+    reopened.close()
+
+
+def test_failed_batch_leaves_no_partial_writes():
+    db = SQLiteFirestore()
+    db.collection("a").document("1").set({"n": 1})
+    batch = db.batch()
+    batch.update(db.collection("a").document("1"), {"n": firestore.Increment(1)})
+    batch.update(db.collection("a").document("missing"), {"n": 1})
+    with pytest.raises(Exception):
+        batch.commit()
+    assert db.collection("a").document("1").get().to_dict() == {"n": 1}
+
+
+def test_hot_queries_use_indexes():
+    db = SQLiteFirestore()
+    acts = db.collection("activities")
+    scoring = acts.where("block_id", "==", "block_1").where("player_id", "==", "p1") \
+        .where("sport_category", "==", "Running")
+    listing = acts.where("player_id", "==", "p1").where("start_date_utc", ">=", "2026-03-01")
+
+    assert any("documents_block_player_sport" in step for step in db.explain(scoring))
+    assert any("documents_player_start" in step for step in db.explain(listing))
+
+
+def test_recursive_delete():
+    db = SQLiteFirestore()
+    group = db.collection("groups").document("g1")
+    group.set({"name": "G"})
+    group.collection("athletes").document("p1").set({"name": "A"})
+    db.collection("groups").document("g10").set({"name": "other"})
+
+    assert db.recursive_delete(group) == 2
+    assert [d.id for d in db.collection("groups").stream()] == ["g10"]
@@ -3,6 +3,7 @@ Unit tests for Strava service — token refresh flow and sport type filtering.
 Uses mocked httpx responses.
 """
 import pytest
+import httpx
 from unittest.mock import patch, MagicMock, AsyncMock
 import time
 
@@ -11,38 +12,26 @@ class TestTokenRefresh:
     """Test Strava token refresh logic."""
 
     @pytest.mark.asyncio
-    async def test_reuses_valid_token(self):
+    async def test_reuses_valid_token(self, db):
         """If token_expiry is > 5 min from now, reuse existing token."""
-        mock_doc = MagicMock()
-        mock_doc.exists = True
-        mock_doc.to_dict.return_value = {
+        db.collection("athletes").document("player_1").set({
             "access_token": "valid_token",
             "refresh_token": "refresh_xyz",
             "token_expiry": int(time.time()) + 3600,  # 1 hour from now
-        }
-
-        mock_db = MagicMock()
-        mock_db.collection.return_value.document.return_value.get.return_value = mock_doc
+        })
 
-        with patch("backend.services.strava_service.get_db", return_value=mock_db):
-            from services.strava_service import refresh_access_token
-            token = await refresh_access_token("player_1")
-            assert token == "valid_token"
+        from services.strava_service import refresh_access_token
+        token = await refresh_access_token("player_1")
+        assert token == "valid_token"
 
     @pytest.mark.asyncio
-    async def test_refreshes_expired_token(self):
+    async def test_refreshes_expired_token(self, db):
         """If token is expired, call Strava refresh endpoint."""
-        mock_doc = MagicMock()
-        mock_doc.exists = True
-        mock_doc.to_dict.return_value = {
+        db.collection("athletes").document("player_1").set({
             "access_token": "old_token",
             "refresh_token": "refresh_xyz",
             "token_expiry": int(time.time()) - 100,  # expired
-        }
-
-        mock_db = MagicMock()
-        mock_db.collection.return_value.document.return_value.get.return_value = mock_doc
-        mock_db.collection.return_value.document.return_value.update = MagicMock()
+        })
 
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -57,25 +46,20 @@ class TestTokenRefresh:
         mock_client.__aenter__ = AsyncMock(return_value=mock_client)
         mock_client.__aexit__ = AsyncMock(return_value=False)
 
-        with patch("backend.services.strava_service.get_db", return_value=mock_db):
-            with patch("backend.services.strava_service.httpx.AsyncClient", return_value=mock_client):
-                from services.strava_service import refresh_access_token
-                token = await refresh_access_token("player_1")
-                assert token == "new_token"
+        with patch("services.strava_service.httpx.AsyncClient", return_value=mock_client):
+            from services.strava_service import refresh_access_token
+            token = await refresh_access_token("player_1")
+            assert token == "new_token"
+
+        stored = db.collection("athletes").document("player_1").get().to_dict()
+        assert stored["refresh_token"] == "new_refresh"
 
     @pytest.mark.asyncio
-    async def test_raises_for_unknown_player(self):
+    async def test_raises_for_unknown_player(self, db):
         """Refresh should raise ValueError for non-existent player."""
-        mock_doc = MagicMock()
-        mock_doc.exists = False
-
-        mock_db = MagicMock()
-        mock_db.collection.return_value.document.return_value.get.return_value = mock_doc
-
-        with patch("backend.services.strava_service.get_db", return_value=mock_db):
-            from services.strava_service import refresh_access_token
-            with pytest.raises(ValueError, match="not found"):
-                await refresh_access_token("nonexistent")
+        from services.strava_service import refresh_access_token
+        with pytest.raises(ValueError, match="not found"):
+            await refresh_access_token("nonexistent")
 
 
 class TestCaloriesFallback:
@@ -94,3 +78,42 @@ class TestCaloriesFallback:
         if calories == 0 and kilojoules > 0:
             calories = round(kilojoules * 0.239, 2)
         assert calories == 119.5
+
+
+class TestAgainstFakeStrava:
+    """Exercise the HTTP layer against scripts/fake_strava.py."""
+
+    @pytest.mark.asyncio
+    async def test_list_activities_paginates(self, fake_strava, make_raw):
+        state = fake_strava([make_raw(i) for i in range(250)])
+        from services.strava_service import list_activities
+        activities = [a async for a in list_activities("access-42", 0, 2**31)]
+
+        assert len(activities) == 250
+        assert state.calls["athlete/activities"] == 3
+        assert "calories" not in activities[0]  # summaries carry no calories
+
+    @pytest.mark.asyncio
+    async def test_detail_includes_calories(self, fake_strava, make_raw):
+        fake_strava([make_raw(7, calories=612.0)])
+        from services.strava_service import get_activity_detail
+        detail = await get_activity_detail("access-42", 7)
+        assert detail["calories"] == 612.0
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_surface(self, fake_strava, make_raw):
+        state = fake_strava([make_raw(1)], error_rate=1.0)
+        from services.strava_service import get_athlete_profile
+        with pytest.raises(httpx.HTTPStatusError):
+            await get_athlete_profile("access-42")
+        assert state.statuses[200] == 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_returns_429_with_headers(self, fake_strava, make_raw):
+        fake_strava([make_raw(1)], rate_limit=(1, 10))
+        from services.strava_service import get_athlete_profile
+        await get_athlete_profile("access-42")
+        with pytest.raises(httpx.HTTPStatusError) as exc:
+            await get_athlete_profile("access-42")
+        assert exc.value.response.status_code == 429
+        assert exc.value.response.headers["X-RateLimit-Usage"] == "2,2"
@@ -0,0 +1,163 @@
+"""
+Tests for resilient sync: per-call retries, checkpointing an interrupted
+sync and resuming from it, the sync endpoint's error responses, and the
+page pipeline's prefetching and bounded detail requests.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from services.block_service import seed_blocks
+from services.sync_service import CHECKPOINTS, SyncInterrupted
+
+
+def _rides(make_raw, count):
+    """Half-hour rides 40 minutes apart, all inside block_2."""
+    start = datetime(2026, 3, 6, 0, 0, tzinfo=timezone.utc)
+    raws = []
+    for i in range(count):
+        raw = make_raw(1000 + i)
+        raw["start_date"] = (start + timedelta(minutes=40 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        raw["moving_time"] = raw["elapsed_time"] = 1800
+        raws.append(raw)
+    return raws
+
+
+@pytest.fixture
+def player(db):
+    seed_blocks()
+    db.collection("athletes").document("p1").set({
+        "strava_athlete_id": "42", "access_token": "access-42", "token_expiry": 2**31,
+        "status": "connected", "root": True,
+    })
+    return "p1"
+
+
+def _count(metric: str, **labels) -> float:
+    return REGISTRY.get_sample_value(metric, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(db, player, fake_strava, make_raw):
+    state = fake_strava(_rides(make_raw, 3))
+    state.fail_next("activities/{id}", times=2, status=502)
+    state.fail_next("athlete/activities", times=1, status=500)
+    retries = {
+        "detail": _count("strava_retries_total", endpoint="activities/{id}", reason="502"),
+        "list": _count("strava_retries_total", endpoint="athlete/activities", reason="500"),
+    }
+    from services.sync_service import sync_player_activities
+    synced = await sync_player_activities(player)
+
+    assert synced["new"] == 3
+    assert (state.statuses[502], state.statuses[500]) == (2, 1)
+    assert _count("strava_retries_total", endpoint="activities/{id}", reason="502") == retries["detail"] + 2
+    assert _count("strava_retries_total", endpoint="athlete/activities", reason="500") == retries["list"] + 1
+    assert not db.collection(CHECKPOINTS).document(player).get().exists
+
+
+@pytest.mark.asyncio
+async def test_interrupted_sync_resumes_from_checkpoint(db, player, fake_strava, make_raw):
+    state = fake_strava(_rides(make_raw, 120))
+    # Strava goes down from the 111th detail request (page 2) on
+    state.fail_next("activities/{id}", times=1000, after=110)
+    interruptions = _count("sync_interruptions_total", status="503")
+    from services.sync_service import sync_player_activities
+    with pytest.raises(SyncInterrupted) as exc:
+        await sync_player_activities(player)
+
+    assert exc.value.synced["new"] == 110
+    assert exc.value.status_code == 503
+    assert _count("sync_interruptions_total", status="503") == interruptions + 1
+    checkpoint = db.collection(CHECKPOINTS).document(player).get().to_dict()
+    assert checkpoint["page"] == 2
+    assert [a["id"] for a in checkpoint["pending"]] == list(range(1110, 1120))
+    assert state.calls["athlete/activities"] == 2
+
+    state.outages.clear()
+    synced = await sync_player_activities(player)
+
+    assert (synced["new"], synced["skipped"], synced["resumed_from_page"]) == (10, 0, 2)
+    # Page 2 came from the checkpoint; only the (empty) page 3 was listed
+    assert state.calls["athlete/activities"] == 3
+    assert len(list(db.collection("activities").stream())) == 120
+    assert not db.collection(CHECKPOINTS).document(player).get().exists
+
+
+def test_sync_endpoint_reports_strava_failures(db, player, fake_strava, make_raw):
+    state = fake_strava(_rides(make_raw, 2))
+    state.fail_next("athlete/activities", times=4)
+    from main import app
+    resp = TestClient(app).post(f"/api/activities/sync/{player}")
+
+    assert resp.status_code == 502
+    detail = resp.json()["detail"]
+    assert (detail["strava_status"], detail["resume_page"], detail["synced"]["new"]) == (503, None, 0)
+
+
+def test_sync_endpoint_passes_rate_limits_through(db, player, fake_strava, make_raw):
+    state = fake_strava(_rides(make_raw, 2), rate_limit=(1, 100))
+    from main import app
+    resp = TestClient(app).post(f"/api/activities/sync/{player}")
+
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) > 0
+    assert state.statuses[429] == 1  # rate limits are not retried
+
+
+@pytest.mark.asyncio
+async def test_pages_are_prefetched_one_ahead(fake_strava, make_raw):
+    state = fake_strava(_rides(make_raw, 250))
+    from services.strava_service import iter_activity_pages
+    pages = iter_activity_pages("access-42", 0, 2**31)
+    page, activities = await anext(pages)
+    await asyncio.sleep(0.05)
+    # Page 2 downloads while page 1 is processed, but nothing further
+    assert (page, len(activities), state.calls["athlete/activities"]) == (1, 100, 2)
+    assert [p async for p, _ in pages] == [2, 3]
+    assert state.calls["athlete/activities"] == 3
+
+
+@pytest.mark.asyncio
+async def test_detail_requests_are_bounded(db, player, fake_strava, make_raw):
+    from services import sync_service
+    state = fake_strava(_rides(make_raw, 12), latency_ms=10)
+    in_flight, peak = 0, 0
+
+    async def tracked(access_token, activity_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await get_activity_detail(access_token, activity_id)
+        finally:
+            in_flight -= 1
+
+    from services.strava_service import get_activity_detail
+    with patch.object(sync_service, "get_activity_detail", tracked), \
+            patch.object(sync_service, "SYNC_DETAIL_CONCURRENCY", 3):
+        synced = await sync_service.sync_player_activities(player)
+
+    assert synced["new"] == 12
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_overlapping_syncs_count_each_activity_once(db, player, fake_strava, make_raw):
+    # A webhook create event and the update right after it each start a sync
+    from services.rollup_service import get_block_totals, verify_rollup
+    fake_strava(_rides(make_raw, 3))
+    from services.sync_service import sync_player_activities
+    first, second = await asyncio.gather(
+        sync_player_activities(player), sync_player_activities(player),
+    )
+
+    assert first["new"] + second["new"] == 3
+    assert first["skipped"] + second["skipped"] == 3
+    totals = get_block_totals("block_2")[player]["Cycling"]
+    assert totals.count == 3
+    assert verify_rollup("block_2") == []
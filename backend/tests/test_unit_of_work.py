@@ -0,0 +1,186 @@
+"""
+Unit tests for the request-scoped unit of work.
+Tests cover: identity-map reads, read-your-writes, deferred batched writes,
+query flushing and the per-request middleware.
+"""
+import time
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+
+from firebase_client import get_db
+from unit_of_work import UnitOfWork, UnitOfWorkMiddleware, current_unit_of_work
+
+
+def test_repeated_get_is_served_from_identity_map(db):
+    db.collection("athletes").document("p1").set({"status": "connected"})
+    db.reset_stats()
+
+    with UnitOfWork(lambda: db):
+        scoped = get_db()
+        for _ in range(3):
+            assert scoped.collection("athletes").document("p1").get().to_dict()["status"] == "connected"
+        assert current_unit_of_work().stats["cache_hits"] == 2
+    assert db.stats["round_trips"] == 1
+
+
+def test_query_results_populate_identity_map(db):
+    db.collection("athletes").document("p1").set({"status": "connected"})
+    db.reset_stats()
+
+    with UnitOfWork(lambda: db):
+        scoped = get_db()
+        assert len(list(scoped.collection("athletes").stream())) == 1
+        assert scoped.collection("athletes").document("p1").get().exists
+    assert db.stats["round_trips"] == 1
+
+
+def test_writes_are_deferred_and_readable(db):
+    db.collection("athletes").document("p1").set({"status": "connected", "token": "a"})
+    db.reset_stats()
+
+    with UnitOfWork(lambda: db) as uow:
+        scoped = get_db()
+        ref = scoped.collection("athletes").document("p1")
+        ref.get()
+        ref.update({"token": "b"})
+        scoped.collection("activities").document("a1").set({"calories": 100})
+        assert ref.get().to_dict() == {"status": "connected", "token": "b"}
+        assert db.stats["writes"] == 0
+    assert uow.stats["commits"] == 1
+    assert db.stats["round_trips"] == 2  # one read, one batch
+    assert db.collection("athletes").document("p1").get().to_dict()["token"] == "b"
+    assert db.collection("activities").document("a1").get().exists
+
+
+def test_transforms_and_queries_flush_pending_writes(db):
+    db.collection("athletes").document("p1").set({"n": 1, "status": "connected"})
+
+    with UnitOfWork(lambda: db):
+        scoped = get_db()
+        ref = scoped.collection("athletes").document("p1")
+        ref.update({"n": firestore.Increment(2)})
+        assert ref.get().to_dict()["n"] == 3
+        scoped.collection("athletes").document("p2").set({"status": "connected"})
+        connected = scoped.collection("athletes").where("status", "==", "connected").stream()
+        assert len(list(connected)) == 2
+
+
+def test_create_and_add_are_deferred(db):
+    db.collection("athletes").document("p1").set({"status": "connected"})
+    db.reset_stats()
+
+    with UnitOfWork(lambda: db):
+        scoped = get_db()
+        groups = scoped.collection("groups")
+        groups.document("g1").create({"name": "Runners"})
+        update_time, added = groups.add({"name": "Riders"})
+        assert update_time is None
+        assert added.get().to_dict() == {"name": "Riders"}
+        # The scope knows these exist, so a second create fails straight away
+        with pytest.raises(AlreadyExists):
+            groups.document("g1").create({"name": "Again"})
+        athlete = scoped.collection("athletes").document("p1")
+        athlete.get()
+        with pytest.raises(AlreadyExists):
+            athlete.create({"status": "new"})
+        assert db.stats["writes"] == 0
+    assert db.stats["round_trips"] == 2  # one read, one batch
+    assert {doc.to_dict()["name"] for doc in db.collection("groups").stream()} == {"Runners", "Riders"}
+
+
+def test_create_of_an_unseen_document_fails_on_commit(db):
+    db.collection("groups").document("g1").set({"name": "Runners"})
+
+    uow = UnitOfWork(lambda: db)
+    with pytest.raises(AlreadyExists):
+        with uow:
+            scoped = get_db()
+            scoped.collection("groups").document("g2").set({"name": "Riders"})
+            scoped.collection("groups").document("g1").create({"name": "Again"})
+    # The batch is atomic: neither write landed, and nothing stale is cached
+    assert not db.collection("groups").document("g2").get().exists
+    assert db.collection("groups").document("g1").get().to_dict() == {"name": "Runners"}
+    assert uow.get(db.collection("groups").document("g1")).to_dict() == {"name": "Runners"}
+
+
+def test_explicit_writers_drop_cached_snapshots(db):
+    with UnitOfWork(lambda: db):
+        scoped = get_db()
+        refs = [scoped.collection("blocks").document(b) for b in ("b1", "b2", "b3")]
+        assert not any(snap.exists for snap in scoped.get_all(refs))
+
+        batch = scoped.batch()
+        batch.set(refs[0], {"locked": False})
+        batch.commit()
+        writer = scoped.bulk_writer()
+        writer.set(refs[1], {"locked": False})
+        writer.close()
+
+        @firestore.transactional
+        def lock(transaction, ref):
+            ref.get(transaction=transaction)
+            transaction.set(ref, {"locked": True})
+
+        lock(scoped.transaction(), refs[2].raw)
+        assert [snap.to_dict() for snap in scoped.get_all(refs)] == [
+            {"locked": False}, {"locked": False}, {"locked": True},
+        ]
+
+        assert scoped.recursive_delete(scoped.collection("blocks")) == 3
+        assert not any(snap.exists for snap in scoped.get_all(refs))
+
+
+def test_background_tasks_get_their_own_scope(db):
+    app = FastAPI()
+    app.add_middleware(UnitOfWorkMiddleware, client_factory=lambda: db)
+    scopes = {}
+
+    def mark_seen(player_id):
+        scopes["sync_task"] = current_unit_of_work()
+        get_db().collection("athletes").document(player_id).update({"seen": True})
+
+    async def count_visit(player_id):
+        scopes["async_task"] = current_unit_of_work()
+        ref = get_db().collection("athletes").document(player_id)
+        ref.update({"visits": ref.get().to_dict()["visits"] + 1})
+
+    @app.post("/visit/{player_id}")
+    def visit(player_id: str, background_tasks: BackgroundTasks):
+        scopes["request"] = current_unit_of_work()
+        ref = get_db().collection("athletes").document(player_id)
+        ref.set({"visits": 1})
+        background_tasks.add_task(count_visit, player_id)
+        background_tasks.add_task(mark_seen, player_id)
+        return {}
+
+    assert TestClient(app).post("/visit/p1").status_code == 200
+    assert scopes["async_task"] is scopes["sync_task"] is not scopes["request"]
+    # The tasks read the request's committed write and their own writes were committed
+    assert db.collection("athletes").document("p1").get().to_dict() == {"visits": 2, "seen": True}
+    assert current_unit_of_work() is None
+
+
+def test_sync_request_reads_athlete_once(db, fake_strava, make_raw):
+    from main import app
+    db.collection("athletes").document("player_1").set({
+        "status": "connected",
+        "strava_athlete_id": "42",
+        "access_token": "access-42",
+        "refresh_token": "refresh-42",
+        "token_expiry": int(time.time()) + 3600,
+    })
+    db.reset_stats()
+    fake_strava([make_raw(i) for i in range(3)])
+
+    resp = TestClient(app).post("/api/activities/sync/player_1")
+
+    assert resp.status_code == 200
+    assert resp.json()["synced"]["new"] == 3
+    assert db.stats["reads:athletes"] == 1
+    assert db.stats["reads:blocks"] == 1
+    assert db.stats["writes:activities"] == 3
+    assert len(list(db.collection("activities").stream())) == 3
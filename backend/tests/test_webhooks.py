@@ -0,0 +1,56 @@
+"""
+Tests for the Strava webhook endpoint: only events for our push
+subscription may disconnect athletes or delete activities.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+DEAUTHORIZE = {"object_type": "athlete", "aspect_type": "update", "owner_id": 42,
+               "object_id": 42, "updates": {"authorized": "false"}}
+DELETE = {"object_type": "activity", "aspect_type": "delete", "owner_id": 42, "object_id": 1}
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    from main import app
+    monkeypatch.setattr("routers.webhooks.STRAVA_WEBHOOK_SUBSCRIPTION_ID", "7")
+    db.collection("athletes").document("p1").set({
+        "strava_athlete_id": "42", "status": "connected", "access_token": "secret",
+    })
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": False})
+    db.collection("activities").document("1").set({
+        "activity_id": "1", "player_id": "p1", "block_id": "block_2", "sport_category": "Running",
+        "sport_type": "Run", "start_date_utc": "2026-03-07T01:00:00+00:00", "calories": 300.0,
+    })
+    return TestClient(app)
+
+
+def _untouched(db):
+    athlete = db.collection("athletes").document("p1").get().to_dict()
+    return athlete["status"] == "connected" and db.collection("activities").document("1").get().exists
+
+
+@pytest.mark.parametrize("event", [DEAUTHORIZE, DELETE])
+@pytest.mark.parametrize("subscription", [{}, {"subscription_id": 8}, {"subscription_id": None}])
+def test_events_without_our_subscription_are_rejected(db, client, event, subscription):
+    resp = client.post("/api/webhooks/strava", json={**event, **subscription})
+    assert resp.status_code == 403
+    assert _untouched(db)
+
+
+def test_events_are_rejected_when_no_subscription_is_configured(db, client, monkeypatch):
+    monkeypatch.setattr("routers.webhooks.STRAVA_WEBHOOK_SUBSCRIPTION_ID", "")
+    resp = client.post("/api/webhooks/strava", json={**DEAUTHORIZE, "subscription_id": ""})
+    assert resp.status_code == 403
+    assert _untouched(db)
+
+
+def test_subscribed_events_are_handled(db, client):
+    resp = client.post("/api/webhooks/strava", json={**DELETE, "subscription_id": 7})
+    assert resp.json() == {"status": "deleted", "player_id": "p1"}
+    assert not db.collection("activities").document("1").get().exists
+
+    resp = client.post("/api/webhooks/strava", json={**DEAUTHORIZE, "subscription_id": 7})
+    assert resp.json() == {"status": "deauthorized", "player_id": "p1"}
+    athlete = db.collection("athletes").document("p1").get().to_dict()
+    assert athlete["status"] == "disconnected" and athlete["access_token"] is None
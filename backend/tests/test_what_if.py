@@ -0,0 +1,86 @@
+"""
+Tests for what-if scoring: hypothetical activities on cached rollups,
+no writes, cache invalidation on ingest, and the endpoint's validation.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from services import what_if_service
+from services.rollup_service import record_activity
+from services.what_if_service import simulate_block
+from tests.test_rollups import activity
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    what_if_service.forget()
+    yield
+    what_if_service.forget()
+
+
+def seed(db, locked=False):
+    for pid in ("p1", "p2"):
+        db.collection("athletes").document(pid).set({"display_name": pid, "root": True})
+    db.collection("blocks").document("block_2").set({"block_id": "block_2", "locked": locked})
+    record_activity(db, activity(1, pid="p1", sport="Running", calories=500.0))
+    record_activity(db, activity(2, pid="p2", sport="Running", calories=600.0))
+    record_activity(db, activity(3, pid="p2", sport="Cycling", calories=900.0))
+
+
+def test_hypothetical_activities_change_points_and_sweep(db):
+    seed(db)
+    result = simulate_block("block_2", [
+        {"player_id": "p1", "sport_category": "Running", "calories": 150.0},
+        {"player_id": "p1", "sport_category": "Cycling", "calories": 1000.0},
+    ])
+
+    assert result["current"]["total_points"] == {"p1": 0, "p2": 4}
+    assert result["current"]["standings"] == ["p2", "p1"]
+    assert result["projected"]["points_by_sport"]["Running"] == {"p1": 2, "p2": 0}
+    assert result["projected"]["clean_sweep_achieved"] is False  # nobody logged Swimming
+    assert result["projected"]["total_points"] == {"p1": 4, "p2": 0}
+    assert result["points_change"] == {"p1": 4, "p2": -4}
+
+
+def test_repeat_calls_are_served_from_cache_and_write_nothing(db):
+    seed(db)
+    simulate_block("block_2", [])
+    db.reset_stats()
+
+    for calories in range(0, 500, 50):
+        simulate_block("block_2", [{"player_id": "p1", "sport_category": "Running", "calories": calories}])
+
+    assert db.stats["round_trips"] == 0
+    assert db.stats["writes"] == 0
+
+
+def test_ingest_invalidates_cached_rollup(db):
+    seed(db)
+    assert simulate_block("block_2", [])["current"]["total_points"]["p1"] == 0
+
+    record_activity(db, activity(4, pid="p1", sport="Running", calories=200.0))
+
+    assert simulate_block("block_2", [])["current"]["total_points"]["p1"] == 2
+
+
+def test_endpoint_rejects_locked_blocks_and_unscored_sports(db):
+    from main import app
+    client = TestClient(app)
+    seed(db)
+
+    ok = client.post("/api/scores/block_2/what-if", json={
+        "activities": [{"player_id": "p1", "sport_category": "Swimming", "calories": 300}],
+    })
+    assert ok.status_code == 200
+    assert ok.json()["projected"]["points_by_sport"]["Swimming"] == {"p1": 2, "p2": 0}
+
+    bad_sport = client.post("/api/scores/block_1/what-if", json={
+        "activities": [{"player_id": "p1", "sport_category": "Running", "calories": 300}],
+    })
+    assert bad_sport.status_code == 400
+
+    db.collection("blocks").document("block_2").update({"locked": True})
+    what_if_service.forget()
+    locked = client.post("/api/scores/block_2/what-if", json={"activities": []})
+    assert locked.status_code == 400
+    assert "locked" in locked.json()["detail"]
@@ -0,0 +1,524 @@
+"""
+Request-scoped unit of work in front of Firestore.
+
+While a scope is active, firebase_client.get_db() returns a view that keeps
+an identity map of fetched documents — a second get() of the same document,
+or a get() of one already returned by a query, costs no round trip — and
+collects create/set/update/delete calls to commit them in batches when the
+scope ends. Reads always see the scope's own pending writes.
+
+UnitOfWorkMiddleware opens one scope per HTTP request and commits before
+the response starts, so a failed commit still turns into an error response.
+Background tasks, which run once the response is sent, get a fresh scope
+committed when they finish.
+"""
+import copy
+import time
+from contextvars import ContextVar
+from google.api_core.exceptions import AlreadyExists
+from metrics import FIRESTORE_DOCS, FIRESTORE_OPS, collection_label, timed
+
+MAX_BATCH_WRITES = 500
+
+_current: ContextVar["UnitOfWork | None"] = ContextVar("unit_of_work", default=None)
+
+
+def current_unit_of_work() -> "UnitOfWork | None":
+    return _current.get()
+
+
+def _is_transform(value) -> bool:
+    """Server-side transforms (Increment, SERVER_TIMESTAMP, ...) can't be applied locally."""
+    if isinstance(value, dict):
+        return any(_is_transform(v) for v in value.values())
+    return type(value).__module__.startswith("google.cloud.firestore")
+
+
+def _merge(target: dict, data: dict) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class CachedSnapshot:
+    """Snapshot reflecting a write made in this unit of work (not yet committed)."""
+
+    def __init__(self, reference, data: dict | None):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        value = self._data
+        for part in field_path.split("."):
+            value = value[part]
+        return copy.deepcopy(value)
+
+
+class UnitOfWork:
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self._client = None
+        self._snapshots: dict[str, object] = {}
+        self._pending: list[tuple] = []
+        self._dirty_docs: set[str] = set()
+        self._dirty_collections: set[str] = set()
+        self._commit_callbacks: list = []
+        self.stats = {"reads": 0, "cache_hits": 0, "deferred_writes": 0, "commits": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def view(self) -> "ScopedClient":
+        return ScopedClient(self)
+
+    # ── reads ──
+
+    def get(self, ref):
+        path = ref.path
+        if path in self._dirty_docs:
+            self.flush()
+        cached = self._snapshots.get(path)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        collection = collection_label(path)
+        with timed(FIRESTORE_OPS, collection=collection, op="get"):
+            snap = ref.get()
+        self._count_reads(collection, 1)
+        self._snapshots[path] = snap
+        return snap
+
+    def get_all(self, refs):
+        refs = list(refs)
+        if any(ref.path in self._dirty_docs for ref in refs):
+            self.flush()
+        missing = [ref for ref in refs if ref.path not in self._snapshots]
+        self.stats["cache_hits"] += len(refs) - len(missing)
+        if missing:
+            collection = collection_label(missing[0].path)
+            with timed(FIRESTORE_OPS, collection=collection, op="get_all"):
+                for snap in self.client.get_all(missing):
+                    self._snapshots[snap.reference.path] = snap
+            self._count_reads(collection, len(missing))
+        return [self._snapshots[ref.path] for ref in refs]
+
+    def before_query(self, collection_path: str) -> None:
+        if collection_path in self._dirty_collections:
+            self.flush()
+
+    def remember(self, snapshots, collection_path: str, cacheable: bool):
+        collection = collection_label(collection_path)
+        count, start = 0, time.perf_counter()
+        try:
+            for snap in snapshots:
+                count += 1
+                if cacheable:
+                    self._snapshots.setdefault(snap.reference.path, snap)
+                yield snap
+        finally:
+            FIRESTORE_OPS.labels(collection, "query").observe(time.perf_counter() - start)
+            self._count_reads(collection, count)
+
+    def forget(self, path: str) -> None:
+        """Drop a cached snapshot, e.g. for a document written around the unit of work."""
+        self._snapshots.pop(path, None)
+
+    def forget_under(self, path: str) -> None:
+        """Drop the cached snapshots of a collection or document and everything beneath it."""
+        prefix = path + "/"
+        for cached in [p for p in self._snapshots if p == path or p.startswith(prefix)]:
+            del self._snapshots[cached]
+
+    def _count_reads(self, collection: str, count: int) -> None:
+        self.stats["reads"] += count
+        FIRESTORE_DOCS.labels(collection, "read").inc(count)
+
+    # ── writes ──
+
+    def write(self, kind: str, ref, data=None, merge: bool = False) -> None:
+        path = ref.path
+        current = self._snapshots.get(path)
+        if kind == "create" and (path in self._dirty_docs or (current is not None and current.exists)):
+            # Known to exist already; otherwise the batch's create() checks on commit
+            raise AlreadyExists(f"Document already exists: {path}")
+        self._pending.append((kind, ref, data, merge))
+        self.stats["deferred_writes"] += 1
+        self._dirty_collections.add(path.rsplit("/", 1)[0])
+
+        # Keep the identity map warm when the result can be computed locally
+        if kind == "delete":
+            self._snapshots[path] = CachedSnapshot(ref, None)
+            self._dirty_docs.discard(path)
+            return
+        if _is_transform(data) or path in self._dirty_docs:
+            self._snapshots.pop(path, None)
+            self._dirty_docs.add(path)
+            return
+        if kind == "create" or (kind == "set" and not merge):
+            self._snapshots[path] = CachedSnapshot(ref, copy.deepcopy(data))
+        elif current is not None and current.exists:
+            new_data = current.to_dict()
+            if kind == "update":
+                for field_path, value in data.items():
+                    target, parts = new_data, field_path.split(".")
+                    for part in parts[:-1]:
+                        target = target.setdefault(part, {})
+                    target[parts[-1]] = copy.deepcopy(value)
+            else:
+                _merge(new_data, data)
+            self._snapshots[path] = CachedSnapshot(ref, new_data)
+        else:
+            self._snapshots.pop(path, None)
+            self._dirty_docs.add(path)
+
+    def on_commit(self, callback) -> None:
+        """Call callback() once the writes queued so far have been committed."""
+        self._commit_callbacks.append(callback)
+
+    def flush(self) -> None:
+        """Commit pending writes in batches of up to 500, in order."""
+        pending, self._pending = self._pending, []
+        self._dirty_docs.clear()
+        self._dirty_collections.clear()
+        for start in range(0, len(pending), MAX_BATCH_WRITES):
+            batch = self.client.batch()
+            for kind, ref, data, merge in pending[start:start + MAX_BATCH_WRITES]:
+                if kind == "create":
+                    batch.create(ref, data)
+                elif kind == "set":
+                    batch.set(ref, data, merge=merge)
+                elif kind == "update":
+                    batch.update(ref, data)
+                else:
+                    batch.delete(ref)
+                FIRESTORE_DOCS.labels(
+                    collection_label(ref.path), "delete" if kind == "delete" else "write"
+                ).inc()
+            try:
+                with timed(FIRESTORE_OPS, collection="batch", op="commit"):
+                    batch.commit()
+            except Exception:
+                # e.g. AlreadyExists from a create(): nothing from here on was written
+                for _, ref, _, _ in pending[start:]:
+                    self.forget(ref.path)
+                raise
+            self.stats["commits"] += 1
+        callbacks, self._commit_callbacks = self._commit_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        finally:
+            _current.reset(self._token)
+
+
+# ─── Scoped views mirroring the client API ───
+
+class QueryView:
+    def __init__(self, uow: UnitOfWork, query, collection_path: str, projected: bool = False):
+        self._uow = uow
+        self._query = query
+        self._collection_path = collection_path
+        self._projected = projected
+
+    def _wrap(self, query, projected=None):
+        return QueryView(self._uow, query, self._collection_path,
+                         self._projected if projected is None else projected)
+
+    def where(self, *args, **kwargs):
+        return self._wrap(self._query.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs):
+        return self._wrap(self._query.order_by(*args, **kwargs))
+
+    def limit(self, count):
+        return self._wrap(self._query.limit(count))
+
+    def limit_to_last(self, count):
+        return self._wrap(self._query.limit_to_last(count))
+
+    def offset(self, num):
+        return self._wrap(self._query.offset(num))
+
+    def start_at(self, cursor):
+        return self._wrap(self._query.start_at(cursor))
+
+    def start_after(self, cursor):
+        return self._wrap(self._query.start_after(cursor))
+
+    def end_at(self, cursor):
+        return self._wrap(self._query.end_at(cursor))
+
+    def end_before(self, cursor):
+        return self._wrap(self._query.end_before(cursor))
+
+    def select(self, field_paths):
+        return self._wrap(self._query.select(field_paths), projected=True)
+
+    def count(self, *args, **kwargs):
+        self._uow.before_query(self._collection_path)
+        return self._query.count(*args, **kwargs)
+
+    def stream(self, transaction=None):
+        self._uow.before_query(self._collection_path)
+        return self._uow.remember(
+            self._query.stream(transaction=transaction), self._collection_path, not self._projected
+        )
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction=transaction))
+
+
+class CollectionView(QueryView):
+    def __init__(self, uow: UnitOfWork, collection):
+        path = getattr(collection, "path", None) or "/".join(collection._path)
+        super().__init__(uow, collection, path)
+        self._collection = collection
+
+    @property
+    def id(self) -> str:
+        return self._collection.id
+
+    def document(self, document_id: str | None = None) -> "DocumentView":
+        ref = self._collection.document(document_id) if document_id else self._collection.document()
+        return DocumentView(self._uow, ref)
+
+    def add(self, document_data: dict, document_id: str | None = None):
+        """Create a document (auto-id by default); the update time is None as the write is deferred."""
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return None, ref
+
+    def list_documents(self, *args, **kwargs):
+        return [DocumentView(self._uow, r) for r in self._collection.list_documents(*args, **kwargs)]
+
+
+class DocumentView:
+    def __init__(self, uow: UnitOfWork, ref):
+        self._uow = uow
+        self._ref = ref
+
+    @property
+    def id(self) -> str:
+        return self._ref.id
+
+    @property
+    def path(self) -> str:
+        return self._ref.path
+
+    @property
+    def raw(self):
+        """The underlying client DocumentReference."""
+        return self._ref
+
+    def collection(self, collection_id: str) -> CollectionView:
+        return CollectionView(self._uow, self._ref.collection(collection_id))
+
+    def get(self, field_paths=None, transaction=None):
+        if field_paths is not None or transaction is not None:
+            return self._ref.get(field_paths=field_paths, transaction=transaction)
+        return self._uow.get(self._ref)
+
+    def create(self, document_data: dict):
+        """
+        Deferred like set(). Raises AlreadyExists now when the scope knows the
+        document exists; otherwise the commit does, failing its batch.
+        """
+        self._uow.write("create", self._ref, document_data)
+
+    def set(self, document_data: dict, merge: bool = False):
+        self._uow.write("set", self._ref, document_data, merge)
+
+    def update(self, field_updates: dict):
+        self._uow.write("update", self._ref, field_updates)
+
+    def delete(self):
+        self._uow.write("delete", self._ref)
+
+
+def _unwrap(ref):
+    if isinstance(ref, CollectionView):
+        return ref._collection
+    return ref.raw if isinstance(ref, DocumentView) else ref
+
+
+def _path(ref) -> str:
+    return getattr(ref, "path", None) or "/".join(ref._path)
+
+
+class ScopedClient:
+    """What get_db() returns inside a unit of work."""
+
+    def __init__(self, uow: UnitOfWork):
+        self._uow = uow
+
+    @property
+    def unit_of_work(self) -> UnitOfWork:
+        return self._uow
+
+    def collection(self, *path: str) -> CollectionView:
+        return CollectionView(self._uow, self._uow.client.collection(*path))
+
+    def document(self, *path: str) -> DocumentView:
+        return DocumentView(self._uow, self._uow.client.document(*path))
+
+    def collection_group(self, collection_id: str) -> QueryView:
+        return QueryView(self._uow, self._uow.client.collection_group(collection_id), collection_id)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        refs = [_unwrap(r) for r in references]
+        if field_paths is not None or transaction is not None:
+            return self._uow.client.get_all(refs, field_paths=field_paths, transaction=transaction)
+        return iter(self._uow.get_all(refs))
+
+    def batch(self):
+        """
+        Explicit batches bypass the unit of work; pending writes go first,
+        and the documents they write are dropped from the identity map.
+        """
+        self._uow.flush()
+        return _UnwrappingWriter(self._uow.client.batch(), self._uow)
+
+    def bulk_writer(self, **kwargs):
+        self._uow.flush()
+        return _UnwrappingWriter(self._uow.client.bulk_writer(**kwargs), self._uow)
+
+    def transaction(self, **kwargs):
+        self._uow.flush()
+        return _UnwrappingWriter(self._uow.client.transaction(**kwargs), self._uow)
+
+    def recursive_delete(self, reference, **kwargs) -> int:
+        """Like batch(): pending writes go first, and nothing deleted stays in the identity map."""
+        self._uow.flush()
+        ref = _unwrap(reference)
+        try:
+            deleted = self._uow.client.recursive_delete(ref, **kwargs)
+        finally:
+            self._uow.forget_under(_path(ref))
+        FIRESTORE_DOCS.labels(collection_label(_path(ref)), "delete").inc(deleted)
+        return deleted
+
+    def __getattr__(self, name):
+        return getattr(self._uow.client, name)
+
+
+class _UnwrappingWriter:
+    """
+    Batch/BulkWriter/Transaction wrapper accepting DocumentViews as
+    references. Written documents are dropped from the unit of work's
+    identity map when queued and again once committed, so later reads in
+    the scope fetch them instead of returning stale snapshots. Documents
+    committed by batches and bulk writers are counted like the unit of
+    work's own writes.
+    """
+
+    def __init__(self, writer, uow: UnitOfWork):
+        self._writer = writer
+        self._uow = uow
+        self._written: list[tuple[str, str]] = []
+
+    def _target(self, reference, kind: str):
+        ref = _unwrap(reference)
+        self._written.append((ref.path, kind))
+        self._uow.forget(ref.path)
+        return ref
+
+    def _committed(self, op: str, commit):
+        written, self._written = self._written, []
+        try:
+            with timed(FIRESTORE_OPS, collection="batch", op=op):
+                result = commit()
+        finally:
+            for path, _ in written:
+                self._uow.forget(path)
+        for path, kind in written:
+            FIRESTORE_DOCS.labels(collection_label(path), "delete" if kind == "delete" else "write").inc()
+        return result
+
+    def create(self, reference, document_data):
+        return self._writer.create(self._target(reference, "create"), document_data)
+
+    def set(self, reference, document_data, merge=False):
+        return self._writer.set(self._target(reference, "set"), document_data, merge=merge)
+
+    def update(self, reference, field_updates):
+        return self._writer.update(self._target(reference, "update"), field_updates)
+
+    def delete(self, reference):
+        return self._writer.delete(self._target(reference, "delete"))
+
+    def commit(self, *args, **kwargs):
+        return self._committed("commit", lambda: self._writer.commit(*args, **kwargs))
+
+    def flush(self):
+        return self._committed("flush", self._writer.flush)
+
+    def close(self):
+        return self._committed("close", self._writer.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def __len__(self):
+        return len(self._writer)
+
+
+class UnitOfWorkMiddleware:
+    """Pure ASGI middleware: one unit of work per HTTP request."""
+
+    def __init__(self, app, client_factory):
+        self.app = app
+        self.client_factory = client_factory
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        uow = UnitOfWork(self.client_factory)
+        background = UnitOfWork(self.client_factory)
+        scope.setdefault("state", {})["unit_of_work"] = uow
+
+        async def send_after_commit(message):
+            if message["type"] == "http.response.start":
+                # Commit before the status goes out so failures are reported
+                uow.flush()
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background tasks run next, still inside this call
+                _current.set(background)
+
+        try:
+            with uow:
+                await self.app(scope, receive, send_after_commit)
+        finally:
+            background.flush()
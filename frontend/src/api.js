@@ -29,16 +29,75 @@ export const api = {
     // Activities
     syncPlayer: (playerId) => apiFetch(`/api/activities/sync/${playerId}`, { method: 'POST' }),
     syncAll: () => apiFetch('/api/activities/sync-all', { method: 'POST' }),
-    getActivities: (playerId) => apiFetch(`/api/activities/${playerId}`),
+    getActivities: (playerId, params = {}) =>
+        apiFetch(`/api/activities/${playerId}?${new URLSearchParams(params)}`),
+    getDuplicates: (params = {}) =>
+        apiFetch(`/api/activities/duplicates?${new URLSearchParams(params)}`),
+    // action: 'keep' (count it) or 'discard'
+    reviewDuplicate: (activityId, action) =>
+        apiFetch(`/api/activities/duplicates/${activityId}`, {
+            method: 'POST',
+            body: JSON.stringify({ action }),
+        }),
 
     // Scores
     getScores: () => apiFetch('/api/scores'),
     getScore: (blockId) => apiFetch(`/api/scores/${blockId}`),
     calculateScore: (blockId) => apiFetch(`/api/scores/calculate/${blockId}`, { method: 'POST' }),
+    // Hypothetical [{ player_id, sport_category, calories }] on top of the open block; nothing is saved
+    simulateBlock: (blockId, activities) =>
+        apiFetch(`/api/scores/${blockId}/what-if`, {
+            method: 'POST',
+            body: JSON.stringify({ activities }),
+        }),
 
     // Dashboard
     getDashboard: () => apiFetch('/api/dashboard'),
+    getDashboardDelta: (since) =>
+        apiFetch(`/api/dashboard/delta?${new URLSearchParams(since ? { since } : {})}`),
+    // Server-Sent Events: a full snapshot, then deltas as data changes
+    subscribeDashboard: (onDelta) => {
+        const source = new EventSource(`${API_BASE}/api/dashboard/stream`);
+        source.addEventListener('dashboard', (event) => onDelta(JSON.parse(event.data)));
+        return source;
+    },
 
     // Blocks
     getBlocks: () => apiFetch('/api/blocks'),
+
+    // Groups
+    createGroup: (name) =>
+        apiFetch('/api/groups', { method: 'POST', body: JSON.stringify({ name }) }),
+    getGroup: (groupId) => apiFetch(`/api/groups/${groupId}`),
+    joinGroup: (groupId, playerId) =>
+        apiFetch(`/api/groups/${groupId}/members`, {
+            method: 'POST',
+            body: JSON.stringify({ player_id: playerId }),
+        }),
+    leaveGroup: (groupId, playerId) =>
+        apiFetch(`/api/groups/${groupId}/members/${playerId}`, { method: 'DELETE' }),
+    getGroupDashboard: (groupId) => apiFetch(`/api/groups/${groupId}/dashboard`),
 };
+
+function patchByBlockId(list = [], patch) {
+    const removed = new Set(patch.remove);
+    const upserts = new Map(patch.upsert.map((doc) => [doc.block_id, doc]));
+    const merged = list
+        .filter((doc) => !removed.has(doc.block_id))
+        .map((doc) => upserts.get(doc.block_id) ?? doc);
+    const known = new Set(merged.map((doc) => doc.block_id));
+    const added = patch.upsert.filter((doc) => !known.has(doc.block_id));
+    return [...merged, ...added].sort((a, b) => (a.block_id > b.block_id ? 1 : -1));
+}
+
+// Apply a /api/dashboard/delta response to the dashboard data we hold
+export function applyDashboardDelta(data, delta) {
+    if (delta.full || !data) return { ...delta.data, version: delta.version };
+    const next = { ...data, version: delta.version };
+    for (const [section, value] of Object.entries(delta.changes)) {
+        next[section] = section === 'block_scores' || section === 'blocks'
+            ? patchByBlockId(data[section], value)
+            : value;
+    }
+    return next;
+}
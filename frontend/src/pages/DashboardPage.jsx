@@ -1,5 +1,5 @@
-import { useState, useEffect } from 'react'
-import { api } from '../api'
+import { useState, useEffect, useRef } from 'react'
+import { api, applyDashboardDelta } from '../api'
 import HeaderBar from '../components/HeaderBar'
 import ScoreboardPanel from '../components/ScoreboardPanel'
 import WeekendBlockGrid from '../components/WeekendBlockGrid'
@@ -13,6 +13,11 @@ export default function DashboardPage() {
     const [loading, setLoading] = useState(true)
     const [syncing, setSyncing] = useState(false)
     const [error, setError] = useState(null)
+    const versionRef = useRef(null)
+
+    useEffect(() => {
+        versionRef.current = data?.version ?? null
+    }, [data])
 
     const fetchDashboard = async () => {
         try {
@@ -26,15 +31,42 @@ export default function DashboardPage() {
         }
     }
 
+    // After the first load, fetch only what changed since our version
+    const refreshDashboard = async () => {
+        const since = versionRef.current
+        if (!since) return fetchDashboard()
+        try {
+            const delta = await api.getDashboardDelta(since)
+            setData((current) => applyDashboardDelta(current, delta))
+            setError(null)
+        } catch (err) {
+            setError(err.message)
+        } finally {
+            setLoading(false)
+        }
+    }
+
     useEffect(() => {
         fetchDashboard()
+        if (typeof EventSource === 'undefined') return undefined
+        const source = api.subscribeDashboard((delta) => {
+            // A patch for a version we don't hold means we missed one: resync
+            if (!delta.full && delta.since !== versionRef.current) {
+                refreshDashboard()
+                return
+            }
+            versionRef.current = delta.version
+            setData((current) => applyDashboardDelta(current, delta))
+            setLoading(false)
+        })
+        return () => source.close()
     }, [])
 
     const handleSync = async () => {
         setSyncing(true)
         try {
             await api.syncAll()
-            await fetchDashboard()
+            await refreshDashboard()
         } catch (err) {
             console.error('Sync failed:', err)
         } finally {
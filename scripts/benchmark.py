@@ -0,0 +1,302 @@
+"""
+Benchmark harness for the sync, scoring and dashboard hot paths.
+
+Runs against an in-memory (or --backend sqlite) Firestore seeded with the synthetic dataset from
+seed_test_data.py and the fake Strava app from fake_strava.py (in-process,
+with configurable per-call latency and error rate), at
+several data sizes. Reports wall time, Firestore operations, Strava calls
+and peak memory, and writes everything as JSON so runs can be compared
+across commits:
+
+    python scripts/benchmark.py --sizes 10,100,1000 --output bench.json
+    python scripts/benchmark.py --output new.json --compare bench.json
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import httpx
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from memory_firestore import InMemoryFirestore, MAX_BATCH_WRITES
+from sqlite_firestore import SQLiteFirestore
+from config import BLOCK_DEFINITIONS
+from services.rollup_service import rebuild_rollups
+from seed_test_data import athlete_document, generate_athlete, generate_dataset
+from fake_strava import FakeStravaState, create_app
+
+FAKE_STRAVA_BASE = "http://fake-strava/api/v3"
+BACKENDS = {"memory": InMemoryFirestore, "sqlite": SQLiteFirestore}
+
+
+def fake_strava_client(app):
+    """Factory for strava_service._client that routes requests into the fake app."""
+    def factory():
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return factory
+
+
+def build_store(seed: int, athletes: int, per_athlete: int, backend: str = "memory"):
+    """Seed a store; returns (db, raw activities by player, stored count)."""
+    db = BACKENDS[backend]()
+    raw_by_player = {}
+    writes = []
+
+    def flush():
+        batch = db.batch()
+        for ref, data in writes:
+            batch.set(ref, data)
+        batch.commit()
+        writes.clear()
+
+    def queue(ref, data):
+        writes.append((ref, data))
+        if len(writes) >= MAX_BATCH_WRITES:
+            flush()
+
+    for block in BLOCK_DEFINITIONS:
+        queue(db.collection("blocks").document(block["block_id"]), {
+            "block_id": block["block_id"],
+            "label": block["label"],
+            "window_open_utc": block["window_open_utc"].isoformat(),
+            "window_close_utc": block["window_close_utc"].isoformat(),
+            "sports": block["sports"],
+            "locked": False,
+            "calculated_at": None,
+        })
+    for index in range(athletes):
+        athlete = generate_athlete(seed, index)
+        doc = athlete_document(athlete)
+        doc.update(access_token=f"access-{athlete['strava_athlete_id']}", token_expiry=2**31)
+        queue(db.collection("athletes").document(athlete["player_id"]), doc)
+
+    stored = 0
+    for athlete, raw, record in generate_dataset(seed, athletes, per_athlete):
+        raw_by_player.setdefault(athlete["player_id"], []).append(raw)
+        if record is not None:
+            queue(db.collection("activities").document(record.activity_id), record.to_firestore())
+            stored += 1
+    if writes:
+        flush()
+    with patch("firebase_client._db", db):
+        rebuild_rollups()
+    db.reset_stats()
+    return db, raw_by_player, stored
+
+
+def _measure(fn, trace_memory: bool):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def run_scenario(name: str, prepare, run, repeat: int) -> dict:
+    """
+    Time `run(state)` on fresh `prepare()` state `repeat` times, then once
+    more under tracemalloc for peak memory. Op counts come from the last
+    timed run.
+    """
+    times = []
+    for _ in range(repeat):
+        state = prepare()
+        elapsed, _ = _measure(lambda: run(state), trace_memory=False)
+        times.append(elapsed)
+        ops = dict(state["db"].stats)
+        strava = dict(state["strava"].calls) if "strava" in state else {}
+        strava_errors = {
+            str(k): v for k, v in state["strava"].statuses.items() if k != 200
+        } if "strava" in state else {}
+    state = prepare()
+    _, peak = _measure(lambda: run(state), trace_memory=True)
+    return {
+        "scenario": name,
+        "wall_s": {"min": min(times), "median": statistics.median(times)},
+        "firestore": {k: v for k, v in sorted(ops.items()) if ":" not in k},
+        "firestore_by_collection": {k: v for k, v in sorted(ops.items()) if ":" in k},
+        "strava_calls": sum(strava.values()),
+        "strava_calls_by_endpoint": strava,
+        "strava_errors": strava_errors,
+        "peak_mem_bytes": peak,
+    }
+
+
+def bench_size(args, athletes: int) -> list[dict]:
+    base_db, raw_by_player, stored = build_store(
+        args.seed, athletes, args.activities_per_athlete, args.backend,
+    )
+    sync_ids = random.Random(args.seed).sample(sorted(raw_by_player), min(args.sync_players, athletes))
+
+    def fresh_db(drop_activities_for=()):
+        db = copy_store(drop_activities_for)
+        if drop_activities_for:
+            with patch("firebase_client._db", db):
+                rebuild_rollups()
+            db.reset_stats()
+        return db
+
+    def copy_store(drop_activities_for):
+        if isinstance(base_db, SQLiteFirestore):
+            db = SQLiteFirestore()
+            base_db._conn.backup(db._conn)
+            with db._conn:
+                db._conn.executemany(
+                    "DELETE FROM documents WHERE parent = 'activities'"
+                    " AND json_extract(data, '$.player_id') = ?",
+                    [(pid,) for pid in drop_activities_for],
+                )
+            return db
+        db = InMemoryFirestore()
+        db._collections = {
+            cpath: {
+                doc_id: entry for doc_id, entry in docs.items()
+                if not (cpath == "activities" and entry[0]["player_id"] in drop_activities_for)
+            }
+            for cpath, docs in base_db._collections.items()
+        }
+        return db
+
+    # Sync: cold sync of athletes whose stored activities were removed
+    def prepare_sync():
+        strava = FakeStravaState(
+            (raw for pid in sync_ids for raw in raw_by_player[pid]),
+            latency_ms=args.strava_latency_ms, error_rate=args.strava_error_rate, seed=args.seed,
+        )
+        return {"db": fresh_db(set(sync_ids)), "strava": strava}
+
+    def run_sync(state):
+        from services import sync_service, strava_service
+        app = create_app(state["strava"])
+        with patch("firebase_client._db", state["db"]), \
+                patch.object(strava_service, "STRAVA_API_BASE", FAKE_STRAVA_BASE), \
+                patch.object(strava_service, "_client", fake_strava_client(app)):
+            for pid in sync_ids:
+                try:
+                    asyncio.run(sync_service.sync_player_activities(pid))
+                except httpx.HTTPStatusError as e:
+                    print(f"  sync {pid} failed: {e.response.status_code}", flush=True)
+
+    # Scoring: score every block from raw activities
+    def prepare_plain():
+        return {"db": fresh_db()}
+
+    def run_scoring(state):
+        from services.scoring_service import calculate_block_scores
+        with patch("firebase_client._db", state["db"]):
+            for block in BLOCK_DEFINITIONS:
+                calculate_block_scores(block["block_id"])
+
+    # Dashboard: all blocks scored, then build the full payload
+    def prepare_dashboard():
+        state = prepare_plain()
+        run_scoring(state)
+        state["db"].reset_stats()
+        return state
+
+    def run_dashboard(state):
+        from services.scoring_service import get_dashboard_data
+        with patch("firebase_client._db", state["db"]):
+            get_dashboard_data()
+
+    scenarios = [
+        ("sync", prepare_sync, run_sync),
+        ("scoring", prepare_plain, run_scoring),
+        ("dashboard", prepare_dashboard, run_dashboard),
+    ]
+    results = []
+    for name, prepare, run in scenarios:
+        if args.scenarios and name not in args.scenarios:
+            continue
+        result = run_scenario(name, prepare, run, args.repeat)
+        result.update(athletes=athletes, stored_activities=stored,
+                      raw_activities=sum(len(v) for v in raw_by_player.values()))
+        if name == "sync":
+            result.update(sync_players=len(sync_ids), strava_latency_ms=args.strava_latency_ms,
+                          strava_error_rate=args.strava_error_rate)
+        results.append(result)
+        print(f"  {name:<10} athletes={athletes:<6} wall={result['wall_s']['median'] * 1000:9.1f} ms  "
+              f"fs_round_trips={result['firestore'].get('round_trips', 0):<7} "
+              f"strava={result['strava_calls']:<6} peak={(result['peak_mem_bytes'] or 0) / 1e6:7.1f} MB",
+              flush=True)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print median wall-time and round-trip ratios against a previous run."""
+    key = lambda r: (r["scenario"], r["athletes"])
+    old = {key(r): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for r in current["results"]:
+        o = old.get(key(r))
+        if not o:
+            continue
+        wall = r["wall_s"]["median"] / o["wall_s"]["median"] if o["wall_s"]["median"] else float("nan")
+        rt_new, rt_old = r["firestore"].get("round_trips", 0), o["firestore"].get("round_trips", 0)
+        print(f"  {r['scenario']:<10} athletes={r['athletes']:<6} wall x{wall:5.2f}  "
+              f"round_trips {rt_old} → {rt_new}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated athlete counts")
+    parser.add_argument("--activities-per-athlete", type=int, default=50)
+    parser.add_argument("--sync-players", type=int, default=1, help="athletes to cold-sync per run")
+    parser.add_argument("--strava-latency-ms", type=float, default=20.0)
+    parser.add_argument("--strava-error-rate", type=float, default=0.0,
+                        help="probability of an injected 5xx per fake Strava call")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="memory")
+    parser.add_argument("--scenarios", nargs="*", choices=["sync", "scoring", "dashboard"])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": [],
+    }
+    for size in [int(s) for s in args.sizes.split(",")]:
+        report["results"].extend(bench_size(args, size))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
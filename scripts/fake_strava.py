@@ -0,0 +1,324 @@
+"""
+Local fake Strava API for load tests, benchmarks and offline development.
+
+Serves the endpoints the backend uses — OAuth authorize/token, /athlete,
+paginated /athlete/activities, /activities/{id} and its heartrate/time
+streams — from generated or
+JSONL-loaded data, and can inject latency, rate-limit headers, 429s and
+5xx errors (at random, or as a scripted outage with fail_next). It can
+also push webhook events to the backend.
+
+    python scripts/fake_strava.py --port 8001 --athletes 50 --latency-ms 40 \\
+        --error-rate 0.02 --webhook-url http://localhost:8000/api/webhooks/strava
+
+Then point the backend at it:
+
+    STRAVA_API_BASE=http://localhost:8001/api/v3 \\
+    STRAVA_AUTH_URL=http://localhost:8001/oauth/authorize uvicorn main:app
+"""
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlencode
+
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, RedirectResponse
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+RATE_WINDOW_S = 15 * 60
+DAY_S = 24 * 3600
+
+
+class FakeStravaState:
+    """Athletes, activities, call counters and fault-injection settings."""
+
+    def __init__(self, raw_activities, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 rate_limit: tuple[int, int] = (600, 30000), webhook_url: str | None = None,
+                 seed: int = 0):
+        self.athletes: dict[int, dict] = {}
+        self.activities: dict[int, list[dict]] = {}
+        self.by_id: dict[int, dict] = {}
+        for raw in raw_activities:
+            self.add_activity(raw)
+        for acts in self.activities.values():
+            acts.sort(key=lambda a: a["start_date"])
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.webhook_url = webhook_url
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.statuses = Counter()
+        self.outages: dict[str, list[int]] = {}
+        self._window_start = time.monotonic()
+        self._day_start = self._window_start
+        self._usage = [0, 0]
+
+    def fail_next(self, endpoint: str, times: int = 1, status: int = 503, after: int = 0) -> None:
+        """Answer the given endpoint with `status` `times` times, after `after` more successful calls."""
+        self.outages[endpoint] = [after, times, status]
+
+    def add_activity(self, raw: dict) -> None:
+        athlete_id = raw["athlete"]["id"]
+        self.athletes.setdefault(athlete_id, {
+            "id": athlete_id,
+            "firstname": "Athlete",
+            "lastname": str(athlete_id),
+            "weight": 70.0,
+            "profile": f"https://example.invalid/avatar/{athlete_id}.png",
+        })
+        self.activities.setdefault(athlete_id, []).append(raw)
+        self.by_id[raw["id"]] = raw
+
+    def rate_limit_headers(self) -> dict:
+        return {
+            "X-RateLimit-Limit": f"{self.rate_limit[0]},{self.rate_limit[1]}",
+            "X-RateLimit-Usage": f"{self._usage[0]},{self._usage[1]}",
+        }
+
+    async def admit(self, endpoint: str) -> JSONResponse | None:
+        """Account a call, sleep for latency, and return an error response if one is injected."""
+        self.calls[endpoint] += 1
+        now = time.monotonic()
+        if now - self._window_start >= RATE_WINDOW_S:
+            self._window_start, self._usage[0] = now, 0
+        if now - self._day_start >= DAY_S:
+            self._day_start, self._usage[1] = now, 0
+        self._usage[0] += 1
+        self._usage[1] += 1
+
+        delay = self.latency_ms + (self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        headers = self.rate_limit_headers()
+        outage = self.outages.get(endpoint)
+        if outage:
+            if outage[0] > 0:
+                outage[0] -= 1
+            elif outage[1] > 0:
+                outage[1] -= 1
+                self.statuses[outage[2]] += 1
+                return JSONResponse({"message": "Server Error"}, status_code=outage[2], headers=headers)
+        over_limit = self._usage[0] > self.rate_limit[0] or self._usage[1] > self.rate_limit[1]
+        if over_limit or self.rng.random() < self.throttle_rate:
+            self.statuses[429] += 1
+            retry_after = int(RATE_WINDOW_S - (now - self._window_start)) if over_limit else 1
+            return JSONResponse(
+                {"message": "Rate Limit Exceeded", "errors": [{"resource": "Application", "code": "exceeded"}]},
+                status_code=429, headers={**headers, "Retry-After": str(retry_after)},
+            )
+        if self.rng.random() < self.error_rate:
+            status = self.rng.choice([500, 502, 503])
+            self.statuses[status] += 1
+            return JSONResponse({"message": "Server Error"}, status_code=status, headers=headers)
+        self.statuses[200] += 1
+        return None
+
+
+def _athlete_from_token(state: FakeStravaState, request: Request) -> int:
+    auth = request.headers.get("Authorization", "")
+    token = auth.removeprefix("Bearer ").strip()
+    try:
+        athlete_id = int(token.removeprefix("access-").split("-")[0])
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Authorization Error")
+    if athlete_id not in state.athletes:
+        raise HTTPException(status_code=401, detail="Authorization Error")
+    return athlete_id
+
+
+def _tokens(athlete_id: int) -> dict:
+    issued = int(time.time())
+    return {
+        "token_type": "Bearer",
+        "access_token": f"access-{athlete_id}-{issued}",
+        "refresh_token": f"refresh-{athlete_id}",
+        "expires_at": issued + 6 * 3600,
+        "expires_in": 6 * 3600,
+    }
+
+
+def fake_streams(activity: dict, keys: list[str], interval_s: int = 5) -> dict:
+    """Deterministic time (and, if the activity has one, heartrate) streams."""
+    rng = random.Random(activity["id"])
+    times = list(range(0, int(activity.get("moving_time", 0)) + 1, interval_s))
+    streams = {}
+    if "time" in keys:
+        streams["time"] = times
+    if "heartrate" in keys and activity.get("has_heartrate"):
+        base = rng.uniform(125, 160)
+        streams["heartrate"] = [
+            round(base * min(1.0, 0.7 + t / 600 * 0.3) + rng.gauss(0, 3)) for t in times
+        ]
+    return streams
+
+
+def create_app(state: FakeStravaState) -> FastAPI:
+    app = FastAPI(title="Fake Strava API")
+    app.state.fake = state
+
+    @app.get("/oauth/authorize")
+    async def authorize(redirect_uri: str, state_param: str = Query("", alias="state"),
+                        athlete_id: int | None = None):
+        """Skip the consent page: redirect straight back with a code."""
+        chosen = athlete_id or next(iter(state.athletes), 1)
+        return RedirectResponse(f"{redirect_uri}?{urlencode({'code': f'code-{chosen}', 'state': state_param})}")
+
+    @app.post("/oauth/token")
+    @app.post("/api/v3/oauth/token")
+    async def token(request: Request):
+        if (error := await state.admit("oauth/token")) is not None:
+            return error
+        form = await request.form()
+        if form.get("grant_type") == "authorization_code":
+            athlete_id = int(str(form.get("code", "code-0")).removeprefix("code-"))
+            state.athletes.setdefault(athlete_id, {"id": athlete_id, "firstname": "Athlete",
+                                                   "lastname": str(athlete_id), "weight": 70.0})
+            return {**_tokens(athlete_id), "athlete": state.athletes[athlete_id]}
+        athlete_id = int(str(form.get("refresh_token", "refresh-0")).removeprefix("refresh-"))
+        return _tokens(athlete_id)
+
+    @app.get("/api/v3/athlete")
+    async def athlete(request: Request):
+        if (error := await state.admit("athlete")) is not None:
+            return error
+        athlete_id = _athlete_from_token(state, request)
+        return JSONResponse(state.athletes[athlete_id], headers=state.rate_limit_headers())
+
+    @app.get("/api/v3/athlete/activities")
+    async def athlete_activities(request: Request, after: int = 0, before: int = 2**62,
+                                 page: int = 1, per_page: int = 30):
+        if (error := await state.admit("athlete/activities")) is not None:
+            return error
+        athlete_id = _athlete_from_token(state, request)
+        per_page = min(per_page, 200)
+
+        def epoch(a):
+            return datetime.fromisoformat(a["start_date"].replace("Z", "+00:00")).timestamp()
+
+        matching = [a for a in state.activities.get(athlete_id, []) if after < epoch(a) < before]
+        chunk = matching[(page - 1) * per_page: page * per_page]
+        summaries = [{k: v for k, v in a.items() if k != "calories"} for a in chunk]
+        return JSONResponse(summaries, headers=state.rate_limit_headers())
+
+    @app.get("/api/v3/activities/{activity_id}")
+    async def activity_detail(activity_id: int, request: Request):
+        if (error := await state.admit("activities/{id}")) is not None:
+            return error
+        athlete_id = _athlete_from_token(state, request)
+        activity = state.by_id.get(activity_id)
+        if activity is None or activity["athlete"]["id"] != athlete_id:
+            return JSONResponse({"message": "Record Not Found"}, status_code=404)
+        return JSONResponse(activity, headers=state.rate_limit_headers())
+
+    @app.get("/api/v3/activities/{activity_id}/streams")
+    async def activity_streams(activity_id: int, request: Request, keys: str = "time",
+                               key_by_type: bool = True):
+        if (error := await state.admit("activities/{id}/streams")) is not None:
+            return error
+        athlete_id = _athlete_from_token(state, request)
+        activity = state.by_id.get(activity_id)
+        if activity is None or activity["athlete"]["id"] != athlete_id:
+            return JSONResponse({"message": "Record Not Found"}, status_code=404)
+        streams = fake_streams(activity, keys.split(","))
+        return JSONResponse(
+            {key: {"data": data, "series_type": "time", "original_size": len(data), "resolution": "high"}
+             for key, data in streams.items()},
+            headers=state.rate_limit_headers(),
+        )
+
+    @app.post("/_fake/push")
+    async def push(event: dict):
+        """Send a Strava-format webhook event to the configured webhook URL."""
+        if not state.webhook_url:
+            raise HTTPException(status_code=400, detail="No webhook URL configured")
+        payload = {
+            "object_type": "activity",
+            "aspect_type": "create",
+            "event_time": int(time.time()),
+            "subscription_id": 1,
+            "updates": {},
+            **event,
+        }
+        async with httpx.AsyncClient() as client:
+            resp = await client.post(state.webhook_url, json=payload)
+        return {"delivered": payload, "status_code": resp.status_code}
+
+    @app.post("/_fake/activities")
+    async def add_activity(raw: dict, push: bool = True):
+        """Add an activity (Strava DetailedActivity shape) and optionally push a create event."""
+        state.add_activity(raw)
+        if push and state.webhook_url:
+            async with httpx.AsyncClient() as client:
+                await client.post(state.webhook_url, json={
+                    "object_type": "activity", "aspect_type": "create",
+                    "object_id": raw["id"], "owner_id": raw["athlete"]["id"],
+                    "event_time": int(time.time()), "subscription_id": 1, "updates": {},
+                })
+        return {"id": raw["id"]}
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {"calls": dict(state.calls), "statuses": {str(k): v for k, v in state.statuses.items()}}
+
+    return app
+
+
+def load_raw_activities(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def generated_raw_activities(seed: int, athletes: int, per_athlete: int):
+    from seed_test_data import generate_dataset
+    for _, raw, _ in generate_dataset(seed, athletes, per_athlete):
+        yield raw
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--data", help="strava_activities.jsonl from seed_test_data --include-raw")
+    parser.add_argument("--athletes", type=int, default=10, help="generated athletes when --data is not given")
+    parser.add_argument("--activities-per-athlete", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 5xx per call")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="probability of a 429 per call")
+    parser.add_argument("--rate-limit", default="600,30000", help="15-minute,daily request limits")
+    parser.add_argument("--webhook-url", help="backend webhook endpoint for pushed events")
+    args = parser.parse_args(argv)
+
+    raws = (load_raw_activities(args.data) if args.data
+            else generated_raw_activities(args.seed, args.athletes, args.activities_per_athlete))
+    short, daily = (int(x) for x in args.rate_limit.split(","))
+    state = FakeStravaState(
+        raws, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, rate_limit=(short, daily),
+        webhook_url=args.webhook_url, seed=args.seed,
+    )
+    print(f"Fake Strava: {len(state.athletes)} athletes, {len(state.by_id)} activities "
+          f"→ http://{args.host}:{args.port}/api/v3")
+
+    import uvicorn
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Re-estimate calories for stored MET-estimated activities.
+
+Run after changing the MET tables or formula in
+backend/services/calorie_service.py: every MET-estimated activity in an
+unlocked block is re-estimated in one vectorized pass, changed ones are
+updated and the affected block rollups rebuilt. Locked blocks keep their
+calories (use scripts/replay_scores.py to see how a change would have
+scored them).
+
+    python scripts/reestimate_calories.py --dry-run
+    python scripts/reestimate_calories.py
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from services.calorie_service import reestimate_stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = reestimate_stored(dry_run=args.dry_run)
+    elapsed = time.perf_counter() - started
+
+    verb = "would change" if args.dry_run else "changed"
+    print(f"Re-estimated {result['estimated']:,} activities in {elapsed:.2f}s, "
+          f"{verb} {result['changed']:,} (blocks: {', '.join(result['blocks']) or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
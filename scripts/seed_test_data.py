@@ -6,18 +6,38 @@ for two players, covering all scoring scenarios:
 - One player missing a sport
 - Ties
 - Block 1 standalone Sunday (Swimming only)
+
+With --generate it instead produces a large synthetic dataset (thousands of
+athletes, millions of activities) for load and benchmark runs, reproducible
+from --seed, written via a BulkWriter or dumped to JSONL files:
+
+    python scripts/seed_test_data.py --generate --athletes 2000 \
+        --activities-per-athlete 500 --seed 7 --output data/
 """
 import sys
 import os
 import json
+import math
+import random
+import argparse
 from datetime import datetime, timezone, timedelta
 
-# Add project root to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
-from backend.firebase_client import get_db
-from backend.services.block_service import seed_blocks, seed_players
-from backend.config import BLOCK_DEFINITIONS
+# Backend modules import each other by top-level name (config, services, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from firebase_client import get_db
+from services.block_service import seed_blocks, seed_players
+from services.maintenance_service import delete_collections, print_progress
+from services.rollup_service import rebuild_rollups
+from services.sync_service import resolve_calories
+from config import (
+    BLOCK_DEFINITIONS,
+    COMPETITION_START_UTC,
+    COMPETITION_END_UTC,
+    get_block_for_activity,
+    get_sport_category,
+)
+from models import Activity
 
 # Player IDs
 P1 = "player_1"
@@ -25,15 +45,14 @@ P2 = "player_2"
 
 
 def clear_collections(db):
-    """Clear activities and scores collections for fresh seeding."""
-    for coll in ["activities", "scores"]:
-        docs = db.collection(coll).stream()
-        for doc in docs:
-            doc.reference.delete()
+    """Clear activities, rollups and scores collections for fresh seeding."""
+    delete_collections(db, ["activities", "rollups", "scores"], on_progress=print_progress)
 
     # Unlock all blocks
-    for doc in db.collection("blocks").stream():
-        doc.reference.update({"locked": False, "calculated_at": None})
+    batch = db.batch()
+    for doc in db.collection("blocks").select([]).stream():
+        batch.update(doc.reference, {"locked": False, "calculated_at": None})
+    batch.commit()
 
 
 def add_activity(db, activity_id, player_id, sport_type, sport_category,
@@ -171,6 +190,8 @@ def seed():
     add_activity(db, aid, P2, "Swim", "Swimming", "block_5", b5_start + timedelta(days=1, hours=1), 500, 3000, 3300, 0, "Championship Swim")
     aid += 1
 
+    rebuild_rollups()
+
     print("✅ Seeded test data successfully!")
     print(f"   Total activities: {aid - 1000}")
     print()
@@ -183,5 +204,275 @@ def seed():
     print("  TOTAL:   P1=17, P2=12")
 
 
+# ─── Synthetic dataset generator ───
+
+# Strava sport_type mix, including types the tracker ignores
+SPORT_TYPE_WEIGHTS = {
+    "Ride": 0.30,
+    "GravelRide": 0.05,
+    "MountainBikeRide": 0.05,
+    "Run": 0.28,
+    "TrailRun": 0.07,
+    "Swim": 0.17,
+    "Walk": 0.04,
+    "Hike": 0.02,
+    "Yoga": 0.02,
+}
+
+# category: (median moving time s, log-sigma, mean speed m/s, speed sd, MET)
+SPORT_PROFILES = {
+    "Cycling": (5400, 0.45, 7.5, 1.5, 7.5),
+    "Running": (2700, 0.35, 2.9, 0.4, 9.8),
+    "Swimming": (2400, 0.30, 0.85, 0.15, 8.0),
+    None: (3600, 0.40, 1.4, 0.3, 3.5),
+}
+
+# Home UTC offsets (hours) and how common they are among athletes
+HOME_UTC_OFFSETS = {9: 0.25, 8: 0.25, 1: 0.15, -8: 0.15, -5: 0.1, 0: 0.05, 5.5: 0.05}
+
+EDGE_FRACTION = 0.08       # activities placed within ±30 min of a window edge
+OUTSIDE_FRACTION = 0.05    # activities outside the competition entirely
+PROGRESS_EVERY = 50_000
+FIRST_ACTIVITY_ID = 10_000_000_000
+
+
+def _pick(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def generate_athlete(seed: int, index: int) -> dict:
+    """Deterministic athlete profile for slot `index`."""
+    rng = random.Random(f"{seed}:athlete:{index}")
+    return {
+        "player_id": f"player_{index + 1}",
+        "strava_athlete_id": str(10_000_000 + index),
+        "display_name": f"Athlete {index + 1}",
+        "weight_kg": round(min(max(rng.gauss(72, 11), 45), 120), 1),
+        "utc_offset_hours": _pick(rng, HOME_UTC_OFFSETS),
+    }
+
+
+def _start_time(rng: random.Random, utc_offset_hours: float) -> datetime:
+    roll = rng.random()
+    if roll < EDGE_FRACTION:
+        block = rng.choice(BLOCK_DEFINITIONS)
+        edge = block["window_open_utc"] if rng.random() < 0.5 else block["window_close_utc"]
+        return edge + timedelta(seconds=rng.randint(-1800, 1800))
+    if roll < EDGE_FRACTION + OUTSIDE_FRACTION:
+        base = COMPETITION_START_UTC if rng.random() < 0.5 else COMPETITION_END_UTC
+        return base + timedelta(days=rng.choice([-1, 1]) * rng.uniform(1, 10))
+
+    # Mostly weekend days, local morning or evening sessions
+    span_days = (COMPETITION_END_UTC - COMPETITION_START_UTC).days + 1
+    while True:
+        day = COMPETITION_START_UTC.date() + timedelta(days=rng.randrange(span_days))
+        if day.weekday() >= 4 or rng.random() < 0.3:
+            break
+    local_hour = rng.gauss(7, 1.2) if rng.random() < 0.6 else rng.gauss(18, 1.5)
+    local_hour = min(max(local_hour, 0), 23.99)
+    local = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(hours=local_hour)
+    return local - timedelta(hours=utc_offset_hours)
+
+
+def generate_strava_activities(seed: int, index: int, athlete: dict, mean_count: int,
+                               first_id: int = FIRST_ACTIVITY_ID):
+    """
+    Yield Strava-shaped (DetailedActivity subset) dicts for one athlete,
+    numbered from first_id. Count, sports, durations, speeds and energy
+    fields follow rough real-world distributions; apart from the ids, output
+    depends only on (seed, index).
+    """
+    rng = random.Random(f"{seed}:activities:{index}")
+    count = max(1, round(rng.gammavariate(4, mean_count / 4)))
+    for n in range(count):
+        sport_type = _pick(rng, SPORT_TYPE_WEIGHTS)
+        category = get_sport_category(sport_type)
+        median_s, sigma, speed, speed_sd, met = SPORT_PROFILES[category]
+
+        moving_time = int(median_s * math.exp(rng.gauss(0, sigma)))
+        distance = round(max(rng.gauss(speed, speed_sd), 0.2) * moving_time, 1)
+        calories = round(met * athlete["weight_kg"] * moving_time / 3600 * rng.uniform(0.85, 1.15), 1)
+        kilojoules = 0.0
+        source_roll = rng.random()
+        if category == "Cycling" and source_roll < 0.15:
+            kilojoules, calories = round(calories / 0.239, 1), 0.0   # power meter only
+        elif source_roll > 0.95:
+            calories = 0.0                                          # no energy data
+
+        start = _start_time(rng, athlete["utc_offset_hours"])
+        yield {
+            "id": first_id + n,
+            "athlete": {"id": int(athlete["strava_athlete_id"])},
+            "name": f"{sport_type} {n + 1}",
+            "sport_type": sport_type,
+            "type": sport_type,
+            "start_date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "moving_time": moving_time,
+            "elapsed_time": moving_time + int(rng.expovariate(1 / 300)),
+            "distance": distance,
+            "total_elevation_gain": round(distance * rng.uniform(0, 0.02), 1),
+            "has_heartrate": n % 10 < 7,
+            "calories": calories,
+            "kilojoules": kilojoules,
+        }
+
+
+def to_stored_activity(raw: dict, athlete: dict) -> Activity | None:
+    """Map a raw activity the way sync does; None if sync would drop it."""
+    start = datetime.fromisoformat(raw["start_date"].replace("Z", "+00:00"))
+    block_id = get_block_for_activity(start)
+    category = get_sport_category(raw["sport_type"])
+    if block_id is None or category is None:
+        return None
+    block_def = next(b for b in BLOCK_DEFINITIONS if b["block_id"] == block_id)
+    if category not in block_def["sports"]:
+        return None
+
+    # Raw activities carry their detail fields, so they serve as both
+    calories, source, confidence = resolve_calories(raw, raw, category, athlete["weight_kg"])
+
+    return Activity(
+        activity_id=str(raw["id"]),
+        player_id=athlete["player_id"],
+        strava_athlete_id=athlete["strava_athlete_id"],
+        sport_type=raw["sport_type"],
+        sport_category=category,
+        block_id=block_id,
+        start_date_utc=start.isoformat(),
+        calories=calories,
+        calorie_source=source,
+        kilojoules=raw["kilojoules"],
+        distance_meters=raw["distance"],
+        moving_time_seconds=raw["moving_time"],
+        elapsed_time_seconds=raw["elapsed_time"],
+        elevation_gain_meters=raw["total_elevation_gain"],
+        calorie_confidence=confidence,
+        name=raw["name"],
+    )
+
+
+def athlete_document(athlete: dict) -> dict:
+    return {
+        "display_name": athlete["display_name"],
+        "strava_athlete_id": athlete["strava_athlete_id"],
+        "weight_kg": athlete["weight_kg"],
+        "status": "connected",
+        "profile_photo": None,
+        "access_token": None,
+        "refresh_token": None,
+        "token_expiry": None,
+        "root": True,
+    }
+
+
+def generate_dataset(seed: int, athletes: int, activities_per_athlete: int):
+    """
+    Yield (athlete, raw_activity, stored_activity_or_None) tuples for the whole
+    dataset, one athlete at a time so memory stays flat at any size.
+    Activity ids come from one running counter across all athletes.
+    """
+    next_id = FIRST_ACTIVITY_ID
+    for index in range(athletes):
+        athlete = generate_athlete(seed, index)
+        for raw in generate_strava_activities(seed, index, athlete, activities_per_athlete, next_id):
+            next_id = raw["id"] + 1
+            yield athlete, raw, to_stored_activity(raw, athlete)
+
+
+def dump_dataset(output_dir: str, seed: int, athletes: int,
+                 activities_per_athlete: int, include_raw: bool = False) -> dict:
+    """Write athletes/blocks/activities (and optionally raw Strava) JSONL files."""
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {"athletes": 0, "activities": 0, "raw": 0}
+    files = {
+        name: open(os.path.join(output_dir, f"{name}.jsonl"), "w")
+        for name in ["athletes", "blocks", "activities"] + (["strava_activities"] if include_raw else [])
+    }
+    try:
+        for block in BLOCK_DEFINITIONS:
+            files["blocks"].write(json.dumps({
+                **block,
+                "window_open_utc": block["window_open_utc"].isoformat(),
+                "window_close_utc": block["window_close_utc"].isoformat(),
+                "locked": False,
+                "calculated_at": None,
+            }) + "\n")
+
+        last_player = None
+        for athlete, raw, stored in generate_dataset(seed, athletes, activities_per_athlete):
+            if athlete["player_id"] != last_player:
+                last_player = athlete["player_id"]
+                files["athletes"].write(json.dumps({"id": last_player, **athlete_document(athlete)}) + "\n")
+                counts["athletes"] += 1
+            counts["raw"] += 1
+            if include_raw:
+                files["strava_activities"].write(json.dumps({"player_id": last_player, **raw}) + "\n")
+            if stored is not None:
+                files["activities"].write(json.dumps(stored.to_firestore()) + "\n")
+                counts["activities"] += 1
+            if counts["raw"] % PROGRESS_EVERY == 0:
+                print(f"   … {counts['raw']:,} generated", flush=True)
+    finally:
+        for f in files.values():
+            f.close()
+    return counts
+
+
+def write_dataset(db, seed: int, athletes: int, activities_per_athlete: int) -> dict:
+    """Write the generated dataset to Firestore through a BulkWriter."""
+    seed_blocks()
+    writer = db.bulk_writer()
+    counts = {"athletes": 0, "activities": 0, "raw": 0}
+    last_player = None
+    for athlete, raw, stored in generate_dataset(seed, athletes, activities_per_athlete):
+        if athlete["player_id"] != last_player:
+            last_player = athlete["player_id"]
+            writer.set(db.collection("athletes").document(last_player), athlete_document(athlete))
+            counts["athletes"] += 1
+        counts["raw"] += 1
+        if stored is not None:
+            writer.set(db.collection("activities").document(stored.activity_id), stored.to_firestore())
+            counts["activities"] += 1
+        if counts["raw"] % PROGRESS_EVERY == 0:
+            print(f"   … {counts['raw']:,} generated", flush=True)
+    writer.close()
+    rebuild_rollups()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--generate", action="store_true",
+                        help="generate a large synthetic dataset instead of the fixed scenarios")
+    parser.add_argument("--athletes", type=int, default=1000)
+    parser.add_argument("--activities-per-athlete", type=int, default=200,
+                        help="mean number of raw Strava activities per athlete")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="dump JSONL files to this directory instead of Firestore")
+    parser.add_argument("--include-raw", action="store_true",
+                        help="also dump the raw Strava activities (with --output)")
+    parser.add_argument("--clear", action="store_true",
+                        help="only clear activities, rollups and scores and unlock blocks")
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        clear_collections(get_db())
+        print("✅ Cleared activities and scores")
+        return
+
+    if not args.generate:
+        seed()
+        return
+
+    if args.output:
+        counts = dump_dataset(args.output, args.seed, args.athletes,
+                              args.activities_per_athlete, args.include_raw)
+    else:
+        counts = write_dataset(get_db(), args.seed, args.athletes, args.activities_per_athlete)
+
+    print(f"✅ Generated {counts['athletes']:,} athletes, {counts['raw']:,} raw activities "
+          f"({counts['activities']:,} inside block windows), seed={args.seed}")
+
+
 if __name__ == "__main__":
-    seed()
+    main()